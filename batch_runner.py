@@ -0,0 +1,208 @@
+# Batch level runner for Cyber Shooter
+#
+# Plays levels without a window across a pool of processes, for balancing and regression sweeps.
+# Every combination of level, character, seed and input policy is one episode. Each worker starts one
+# headless game and reuses it for all of its episodes, so assets are only loaded once per process.
+# Results are written one JSON object per line as episodes finish.
+#
+# Policies:
+#   idle            never touches the keys
+#   runner          holds right, shoots and jumps every so often
+#   bot             runs right, turns to shoot whatever is close, jumps over walls and opens chests
+#   script:<path>   plays back a JSON list of [frames, [held actions], [pressed actions]]
+#
+# Usage: python batch_runner.py [--levels 1,2,3] [--characters biker,punk,cyborg] [--seeds 10] [--policies bot]
+#                               [--max-frames 28800] [--workers N] [--folder levels] [--output results.jsonl]
+
+
+import argparse
+import json
+import os
+import sys
+import traceback
+from multiprocessing import active_children, get_context
+from threading import Thread
+from time import perf_counter
+
+from scripts.headless import CHARACTERS, HeadlessLevel, run_episode
+from scripts.level_data import LEVEL_FOLDER
+
+# Game time a level can take before its own timer runs out, at 60 frames a second
+MAX_FRAMES = 60 * 60 * 8
+
+# Seconds the pool gets to exit on its own once all episodes are done, before its workers are killed
+POOL_EXIT_TIMEOUT = 30
+
+headless = None
+startup_error = None
+
+
+def idle_policy(level, frame, rng):
+    return (), ()
+
+
+def runner_policy(level, frame, rng):
+    pressed = []
+    if frame % 10 == 0:
+        pressed.append('shoot')
+    if rng.random() < 0.02:
+        pressed.append('jump')
+    return ('right', 'shoot'), pressed
+
+
+def bot_policy(level, frame, rng):
+    player = level.player
+    held = ['right']
+    pressed = []
+
+    # Anything close enough and at about the same height gets shot at
+    targets = list(level.enemies)
+    if hasattr(level.boss, 'rect') and not level.boss.dead:
+        targets.append(level.boss)
+    for target in targets:
+        dx = target.rect.centerx - player.rect.centerx
+        if abs(dx) < 224 and abs(target.rect.centery - player.rect.centery) < 48:
+            facing = (dx > 0) == (player.direction > 0)
+            held = [] if facing else ['right' if dx > 0 else 'left']
+            held.append('shoot')
+            if frame % 6 == 0:
+                pressed.append('shoot')
+            break
+
+    # Over walls and up ledges
+    tiles = level.tilemap.get_tiles_around('tiles', player.rect)
+    if player.rect.move(player.direction * 8, 0).collidelist(tiles) > -1 and frame % 20 == 0:
+        pressed.append('jump')
+    if player.actions['hang']:
+        pressed.append('up')
+    if rng.random() < 0.01:
+        pressed.append('jump')
+
+    # Chests and guns on the way
+    if frame % 30 == 0:
+        pressed.append('interact')
+
+    return held, pressed
+
+
+def script_policy(path):
+    segments = json.loads(open(path).read())
+    frames = []
+    for count, held, pressed in segments:
+        # Pressed actions only go down on the first frame of their segment
+        frames.append((held, pressed))
+        frames += [(held, ())] * (count - 1)
+
+    def policy(level, frame, rng):
+        return frames[frame] if frame < len(frames) else ((), ())
+    return policy
+
+
+POLICIES = {
+    'idle': idle_policy,
+    'runner': runner_policy,
+    'bot': bot_policy,
+}
+
+
+def get_policy(name):
+    if name.startswith('script:'):
+        return script_policy(name[len('script:'):])
+    return POLICIES[name]
+
+
+def start_worker():
+    global headless, startup_error
+    # An exception here would make the pool start a new worker forever, so it is handed to every episode instead
+    try:
+        headless = HeadlessLevel()
+    except Exception:
+        startup_error = traceback.format_exc()
+
+
+def work(episode):
+    level, character, seed, policy, max_frames, folder = episode
+    # Anything going wrong is written down as a failed episode, an exception would leave the pool stuck
+    try:
+        if headless is None:
+            raise RuntimeError(f'Worker could not start a game:\n{startup_error}')
+        result = run_episode(headless, level, CHARACTERS[character], seed, get_policy(policy), max_frames, folder)
+    except Exception:
+        result = {'level': level, 'seed': seed, 'completed': False, 'failed': True, 'frames': 0,
+                  'error': traceback.format_exc()}
+    result['character'] = character
+    result['policy'] = policy
+    return result
+
+
+def close_pool(pool):
+    pool.close()
+    joining = Thread(target=pool.join, daemon=True)
+    joining.start()
+    joining.join(POOL_EXIT_TIMEOUT)
+
+    # Workers that didn't exit are stuck in pygame, and SIGTERM can hang there too
+    if joining.is_alive():
+        for process in active_children():
+            process.kill()
+        joining.join(POOL_EXIT_TIMEOUT)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Play levels headless across a process pool')
+    parser.add_argument('--levels', default='1,2,3,4,5')
+    parser.add_argument('--characters', default=','.join(CHARACTERS))
+    parser.add_argument('--seeds', type=int, default=10)
+    parser.add_argument('--policies', default='bot')
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--folder', default=LEVEL_FOLDER, help='where the levels are, like generated stress levels')
+    parser.add_argument('--output', default='results.jsonl')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    levels = [int(level) for level in args.levels.split(',')]
+    characters = args.characters.split(',')
+    policies = args.policies.split(',')
+
+    for character in characters:
+        if character not in CHARACTERS:
+            print(f'Unknown character {character}. Choose from: {", ".join(CHARACTERS)}')
+            return 1
+    for policy in policies:
+        if not policy.startswith('script:') and policy not in POLICIES:
+            print(f'Unknown policy {policy}. Choose from: {", ".join(POLICIES)}, script:<path>')
+            return 1
+
+    episodes = [(level, character, seed, policy, args.max_frames, args.folder)
+                for level in levels for character in characters for policy in policies
+                for seed in range(args.seeds)]
+
+    start = perf_counter()
+    completed = errors = 0
+    # Workers are spawned rather than forked, SDL does not survive being copied into a child process.
+    # They are also left to exit on their own, since pygame quits on SIGTERM and can hang there
+    pool = get_context('spawn').Pool(args.workers, initializer=start_worker)
+    try:
+        with open(args.output, 'w') as output:
+            for i, result in enumerate(pool.imap_unordered(work, episodes), 1):
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+                completed += result['completed']
+                errors += 'error' in result
+                print(f'\r{i}/{len(episodes)} episodes, {completed} completed, {errors} errors', end='', flush=True)
+    finally:
+        close_pool(pool)
+
+    elapsed = perf_counter() - start
+    print(f'\nWrote {args.output}: {len(episodes)} episodes in {elapsed:.1f}s '
+          f'({len(episodes) / elapsed * 3600:.0f} an hour)')
+    if errors:
+        print(f'{errors} episodes raised an exception, see "error" in {args.output}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+# Asset build step for Cyber Shooter
+#
+# Lists every asset folder in a fixed order in the asset manifest, which levels rely on for tile indices.
+# Packs the loose sprites into texture atlases the game can load with far fewer files.
+# Run it again whenever the art changes, otherwise the game keeps using the old atlases.
+# The sprite pack keeps every image already decoded, so it has to be built after the atlases. It is rebuilt after
+# any step that leaves it out of date. The game also rebuilds it in the background when it finds it out of date,
+# and decodes the PNGs until the next time it starts.
+# Compiled levels are also rebuilt by the game itself when their sources change.
+#
+# Usage: python build_assets.py [manifest] [atlases] [levels] [pack]
+
+
+import sys
+import pygame
+
+pygame.init()
+
+from scripts.asset_manifest import build_manifest
+from scripts.atlas import build_atlases
+from scripts.level_data import build_levels
+from scripts.utils import build_sprite_pack, is_sprite_pack_stale
+
+
+STEPS = {
+    'manifest': build_manifest,
+    'atlases': build_atlases,
+    'levels': build_levels,
+    'pack': build_sprite_pack,
+}
+
+
+if __name__ == '__main__':
+    steps = sys.argv[1:] or list(STEPS)
+    for step in steps:
+        if step not in STEPS:
+            print(f'Unknown step {step}. Choose from: {", ".join(STEPS)}')
+            sys.exit(1)
+        STEPS[step]()
+
+    if is_sprite_pack_stale():
+        build_sprite_pack()
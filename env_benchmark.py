@@ -0,0 +1,60 @@
+# Level environment benchmark for Cyber Shooter
+#
+# Steps a batch of headless levels with random actions and reports how many steps a second the
+# environment manages, which is what limits how fast bots can play.
+#
+# With --boss every env starts at the boss fight, or with --save-state from a save state written by the game.
+#
+# Usage: python env_benchmark.py [--envs 8] [--steps 1000] [--level 1] [--character 1] [--folder levels]
+#                                [--boss] [--save-state PATH]
+
+
+import argparse
+import random
+import sys
+from time import perf_counter
+
+from scripts.environment import ACTIONS, VectorLevelEnv
+from scripts.headless import boss_fight_state
+from scripts.level_data import LEVEL_FOLDER
+from scripts.save_state import SaveState
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measure headless level steps per second')
+    parser.add_argument('--envs', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--character', type=int, default=1)
+    parser.add_argument('--folder', default=LEVEL_FOLDER, help='where the level is, like generated stress levels')
+    parser.add_argument('--boss', action='store_true', help='start every env at the boss fight')
+    parser.add_argument('--save-state', default=None, help='start every env from this save state')
+    args = parser.parse_args(argv)
+
+    envs = VectorLevelEnv(args.envs)
+    save_state = None
+    if args.boss:
+        save_state = boss_fight_state(envs.envs[0].headless, args.level, args.character, 0, args.folder)
+    elif args.save_state:
+        save_state = SaveState.read(args.save_state)
+    envs.reset([args.level] * args.envs, [args.character] * args.envs, range(args.envs), args.folder, save_state)
+
+    # Mostly running right, with everything else pressed now and then
+    rng = random.Random(0)
+    right = 1 << ACTIONS.index('right')
+    actions = [[right | rng.getrandbits(len(ACTIONS)) & rng.getrandbits(len(ACTIONS))
+                for _ in range(args.envs)] for _ in range(args.steps)]
+
+    start = perf_counter()
+    for step in actions:
+        envs.step(step)
+    elapsed = perf_counter() - start
+
+    steps = args.envs * args.steps
+    print(f'{steps} steps over {args.envs} envs in {elapsed:.2f}s: {steps / elapsed:.0f} steps/s, '
+          f'{elapsed / steps * 1e6:.0f} us a step')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,249 @@
+# Stress level generator for Cyber Shooter
+#
+# Writes bigger versions of the shipped levels, to see how the tile map, enemies and projectiles scale.
+# Each generated level takes its tileset, tile indices, enemy mix, boss and music from the shipped level with
+# the same number, so it loads and plays like the real one, just longer and busier.
+# Levels are written to their own folder per scale and are never mixed in with levels/. Load them with
+# load_level(number, folder), or pass the folder to env_benchmark.py or batch_runner.py.
+#
+# Usage: python generate_levels.py [--levels 1,2,3,4,5] [--scale 10] [--width COLUMNS] [--density 0.15]
+#                                  [--enemies COUNT] [--mix 0:3,2:1] [--chests COUNT] [--ramps 0.3]
+#                                  [--ladders 0.3] [--seed 0] [--output FOLDER]
+
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+
+from scripts.globals import ENEMY_NAMES, GUN_NAMES
+from scripts.level_data import LEVEL_FOLDER, TILE_SIZE, json_path
+
+LAYERS = ('offgrid', 'tiles', 'ramps', 'ladders', 'objects', 'animated objects', 'enemies', 'bosses', 'guns',
+          'pickups', 'checkpoints', 'boundaries')
+
+# The player starts at (252, 210), so the first columns stay flat and clear
+SPAWN_COLUMNS = 20
+BOSS_COLUMNS = 30
+CHECKPOINT_SPACING = 120
+
+# How deep the ground goes under its top tile, and how far it can wander from where it starts
+GROUND_DEPTH = 3
+GROUND_RANGE = (-3, 1)
+
+
+class Template:
+    # Everything a generated level borrows from a shipped one, worked out from how its cells sit together
+    def __init__(self, number):
+        self.number = number
+        data = json.loads(open(json_path(number)).read())
+        self.tileset = data['tileset']
+        self.layers = data['data']
+        self.width = max(value['pos'][0] for value in self.layers['tiles'].values()) // TILE_SIZE + 1
+
+        cells = {layer: {tuple(value['pos'][i] // TILE_SIZE for i in (0, 1)): value['index']
+                         for value in self.layers[layer].values()} for layer in LAYERS}
+        tiles = cells['tiles']
+
+        # Ground: top tiles have nothing above them, fill tiles have another tile above
+        self.top = self.most_common(index for (x, y), index in tiles.items() if (x, y - 1) not in tiles)
+        self.fill = self.most_common(index for (x, y), index in tiles.items() if (x, y - 1) in tiles)
+
+        # Where the player lands
+        column = sorted(y for (x, y) in tiles if x == 7 and y > 6)
+        self.ground = column[0] if column else 8
+
+        # Ramps going down to the right have ground on their left, going up have it on their right.
+        # Whatever sits under a ramp is the slope tile for it
+        self.ramp_down = self.most_common(index for (x, y), index in cells['ramps'].items() if (x - 1, y) in tiles)
+        self.ramp_up = self.most_common(index for (x, y), index in cells['ramps'].items() if (x + 1, y) in tiles)
+        self.under_ramp = {ramp: self.most_common(tiles[(x, y + 1)] for (x, y), index in cells['ramps'].items()
+                                                  if index == ramp and (x, y + 1) in tiles)
+                           for ramp in set(cells['ramps'].values())}
+
+        self.ladder = self.most_common(cells['ladders'].values())
+        self.checkpoint = self.most_common(cells['checkpoints'].values())
+        self.offgrid = sorted(set(cells['offgrid'].values()))
+        self.enemy_mix = Counter(cells['enemies'].values())
+        self.boss = self.most_common(cells['bosses'].values())
+        self.chests = len(cells['guns'])
+
+    @staticmethod
+    def most_common(indices):
+        counts = Counter(indices)
+        return counts.most_common(1)[0][0] if counts else None
+
+
+class LevelBuilder:
+    def __init__(self, template, width, rng):
+        self.template = template
+        self.width = width
+        self.rng = rng
+        self.layers = {layer: {} for layer in LAYERS}
+        self.heights = []
+
+    def put(self, layer, x, y, index):
+        self.layers[layer][f'{x},{y}'] = {'pos': [x * TILE_SIZE, y * TILE_SIZE], 'index': index}
+
+    def remove(self, layer, x, y):
+        self.layers[layer].pop(f'{x},{y}', None)
+
+    def has(self, layer, x, y):
+        return f'{x},{y}' in self.layers[layer]
+
+    def ground(self, ramps):
+        # Ground height takes a step every few columns, apart from the start and the boss arena
+        template = self.template
+        height = template.ground
+        lowest, highest = template.ground + GROUND_RANGE[1], template.ground + GROUND_RANGE[0]
+        for x in range(self.width):
+            flat = x < SPAWN_COLUMNS or x >= self.width - BOSS_COLUMNS
+            if not flat and self.rng.random() < 0.08:
+                height = min(max(height + self.rng.choice((-1, 1)), highest), lowest)
+            self.heights.append(height)
+
+        for x, height in enumerate(self.heights):
+            self.put('tiles', x, height, template.top)
+            for y in range(height + 1, height + GROUND_DEPTH + 1):
+                self.put('tiles', x, y, template.fill)
+
+        # Ramps on steps of one, if the tileset has them
+        for x in range(1, self.width - 1):
+            step = self.heights[x + 1] - self.heights[x]
+            if self.rng.random() >= ramps:
+                continue
+            if step == 1 and template.ramp_down is not None:
+                # Going down: the ramp sits on the next column, level with this one
+                self.put('ramps', x + 1, self.heights[x], template.ramp_down)
+                self.put('tiles', x + 1, self.heights[x + 1], template.under_ramp[template.ramp_down])
+            elif step == -1 and template.ramp_up is not None:
+                # Going up: the ramp sits on this column, level with the next one
+                self.put('ramps', x, self.heights[x + 1], template.ramp_up)
+                self.put('tiles', x, self.heights[x], template.under_ramp[template.ramp_up])
+
+    def platforms(self, density, ladders):
+        # Floating platforms above the ground, with ladders up to some of them
+        template = self.template
+        x = SPAWN_COLUMNS
+        while x < self.width - BOSS_COLUMNS:
+            length = self.rng.randint(3, 8)
+            if self.rng.random() < density * 8 / length:
+                y = min(self.heights[x:x + length]) - self.rng.randint(3, 4)
+                for i in range(x, min(x + length, self.width - BOSS_COLUMNS)):
+                    self.put('tiles', i, y, template.top)
+
+                if template.ladder is not None and self.rng.random() < ladders:
+                    column = x + self.rng.randrange(length)
+                    if column < self.width - BOSS_COLUMNS:
+                        for ladder_y in range(y, self.heights[column]):
+                            self.put('ladders', column, ladder_y, template.ladder)
+                        self.remove('tiles', column, y)
+            x += length + self.rng.randint(2, 6)
+
+    def decorate(self, density):
+        # Background scenery, which is most of what the tile map draws in the shipped levels
+        if not self.template.offgrid:
+            return
+        for x in range(self.width):
+            if self.rng.random() < density:
+                self.put('offgrid', x, self.heights[x] - 1, self.rng.choice(self.template.offgrid))
+
+    def spawn_cells(self, count):
+        # Somewhere on the ground, clear of ramps, the start and the boss, with nothing else there yet
+        cells = [(x, self.heights[x] - 1) for x in range(SPAWN_COLUMNS, self.width - BOSS_COLUMNS)]
+        cells = [(x, y) for x, y in cells if not any(self.has(layer, x, y) for layer in ('ramps', 'enemies', 'guns'))]
+        if count > len(cells):
+            raise ValueError(f'Only room for {len(cells)} more enemies and chests, not {count}. '
+                             f'Make the level wider or ask for fewer')
+        return self.rng.sample(cells, count)
+
+    def entities(self, enemies, mix, chests):
+        # Every enemy and chest gets a cell of its own, so the counts come out exactly as asked for
+        kinds, weights = zip(*sorted(mix.items()))
+        cells = self.spawn_cells(enemies + chests)
+        for x, y in cells[:enemies]:
+            self.put('enemies', x, y, self.rng.choices(kinds, weights)[0])
+        for x, y in cells[enemies:]:
+            self.put('guns', x, y, self.rng.randrange(len(GUN_NAMES)))
+
+        if self.template.boss is not None:
+            x = self.width - BOSS_COLUMNS // 2
+            self.put('bosses', x, self.heights[x] - 2, self.template.boss)
+
+        if self.template.checkpoint is not None:
+            for x in range(CHECKPOINT_SPACING, self.width - BOSS_COLUMNS, CHECKPOINT_SPACING):
+                self.put('checkpoints', x, self.heights[x] - 1, self.template.checkpoint)
+
+    def level(self):
+        return {'tileset': self.template.tileset, 'data': self.layers, 'text': []}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, weight = part.split(':')
+        if not 0 <= int(kind) < len(ENEMY_NAMES):
+            raise ValueError(f'No enemy {kind}, enemies go from 0 to {len(ENEMY_NAMES) - 1}')
+        mix[int(kind)] = float(weight)
+    return mix
+
+
+def generate(number, args):
+    template = Template(number)
+    rng = random.Random(f'{args.seed}-{number}-{args.scale}')
+    width = args.width or template.width * args.scale
+    enemies = args.enemies if args.enemies is not None else len(template.layers['enemies']) * args.scale
+    chests = args.chests if args.chests is not None else template.chests * args.scale
+    mix = parse_mix(args.mix) if args.mix else template.enemy_mix
+
+    builder = LevelBuilder(template, width, rng)
+    builder.ground(args.ramps)
+    builder.platforms(args.density, args.ladders)
+    builder.decorate(args.density)
+    builder.entities(enemies, mix, chests)
+    return builder.level()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Write scaled up stress versions of the shipped levels')
+    parser.add_argument('--levels', default='1,2,3,4,5')
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--width', type=int, default=None, help='columns, instead of the shipped width * scale')
+    parser.add_argument('--density', type=float, default=0.15, help='share of columns with platforms')
+    parser.add_argument('--enemies', type=int, default=None, help='instead of the shipped count * scale')
+    parser.add_argument('--mix', default=None, help='enemy index:weight pairs, instead of the shipped mix')
+    parser.add_argument('--chests', type=int, default=None, help='instead of the shipped count * scale')
+    parser.add_argument('--ramps', type=float, default=0.3, help='chance of a ramp on each step')
+    parser.add_argument('--ladders', type=float, default=0.3, help='chance of a ladder up to each platform')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    output = args.output or f'data/stress levels/x{args.scale}'
+    if os.path.normpath(output) == os.path.normpath(LEVEL_FOLDER):
+        print(f'Generated levels go in their own folder, not {LEVEL_FOLDER}')
+        return 1
+    os.makedirs(output, exist_ok=True)
+
+    for number in [int(level) for level in args.levels.split(',')]:
+        try:
+            level = generate(number, args)
+        except ValueError as error:
+            print(f'Level {number}: {error}')
+            return 1
+        path = json_path(number, output)
+        with open(path, 'w') as file:
+            file.write(json.dumps(level))
+
+        counts = ', '.join(f'{len(level["data"][layer])} {layer}' for layer in ('tiles', 'enemies', 'guns'))
+        print(f'Wrote {path}: {counts}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -2,6 +2,7 @@ import pickle
 import pygame
 import time
 from scripts.utils import TextButton, load_images_folder, debug_info, Timer, Animation, load_image
+from scripts.clock import GameClock
 from scripts.globals import SPECS, INDEX_TO_DIRECTION, GUN_NAMES, FPS
 
 
@@ -29,7 +30,8 @@ class Editor:
         }
 
         # Images and data
-        self.save_timer = Timer(1000 * 60)
+        self.clock = GameClock()
+        self.save_timer = Timer(1000 * 60, self.clock)
         self.gun_data = {}
         self.gun_images = {}
         self.bullet_images = {}
@@ -44,7 +46,7 @@ class Editor:
         self.effect_fps = 12
         self.direction_index = 2
         self.bullet_positions = []
-        self.fire_rate = Timer(1000)
+        self.fire_rate = Timer(1000, self.clock)
         self.fire_rate.activate()
 
         self.buttons = {
@@ -363,6 +365,7 @@ class Editor:
             # Delta time
             self.delta = time.time() - prev_time
             prev_time = time.time()
+            self.clock.advance(self.delta)
 
             # Update screen
             pygame.display.update()
@@ -3,6 +3,7 @@ import time
 import pickle
 
 from scripts.utils import TextButton, load_images_folder, debug_info, Animation, debug_rect, Timer
+from scripts.clock import GameClock
 from scripts.globals import SPECS, GUN_NAMES
 
 
@@ -29,7 +30,8 @@ class Editor:
 
         # Data
         self.loaded = False
-        self.save_timer = Timer(1000 * 60)
+        self.clock = GameClock()
+        self.save_timer = Timer(1000 * 60, self.clock)
         self.save_timer.activate()
         self.frame = 0
         self.auto_play = True
@@ -382,6 +384,7 @@ class Editor:
             current_time = time.time()
             self.delta = current_time - prev_time
             prev_time = current_time
+            self.clock.advance(self.delta)
 
             # Update screen
             pygame.display.update()
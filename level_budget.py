@@ -0,0 +1,291 @@
+# Level performance budget for Cyber Shooter
+#
+# Sweeps a screen sized camera across a level and counts what the game would have to handle at each spot,
+# straight from the level data without running the game:
+#   draws    cells the tile map draws, over the same margin TileMap.draw uses, per layer
+#   enemies  enemies inside the active radius around the screen, from where they are placed
+#   chests   chests close enough to the screen to be updated and drawn
+#   ramps    ramp cells around those enemies, which they collide against every frame
+# Any spot over a budget is a hotspot. Neighbouring hotspots are reported together as one span of the level,
+# worst first. The exit code is 1 when a level has hotspots, so this can run in CI after editing a level.
+#
+# Levels are numbers in --folder or paths to level JSON files.
+#
+# Usage: python level_budget.py [LEVEL ...] [--folder levels] [--step 1] [--max-draws 700] [--max-enemies 12]
+#                               [--max-chests 4] [--max-ramps 12] [--active-margin 64] [--ramp-radius 2]
+#                               [--top 10] [--heatmap FOLDER]
+
+
+import argparse
+import os
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+import pygame
+
+from scripts.globals import SCREEN_SIZE
+from scripts.level_data import EMPTY, LEVEL_FOLDER, TILE_SIZE, LevelData, compile_level, load_level
+
+# The layers TileMap.draw goes through, and how far past the screen it looks, in cells
+DRAW_LAYERS = ('offgrid', 'objects', 'tiles', 'ramps', 'ladders', 'checkpoints')
+DRAW_MARGIN = 5, 6
+
+# Chests are updated within 10 pixels of the screen, see ItemMap.draw
+CHEST_MARGIN = 10
+
+METRICS = ('draws', 'enemies', 'chests', 'ramps')
+
+# Heatmap colours, from nothing going on to over budget
+COLD = (20, 40, 90)
+WARM = (230, 200, 40)
+HOT = (220, 30, 30)
+
+
+class CellCounts:
+    # Summed area table of the non empty cells of a grid, so any window is counted in four lookups
+    def __init__(self, data, layers):
+        self.data = data
+        width = data.width
+        self.sums = [0] * ((width + 1) * (data.height + 1))
+
+        for y in range(data.height):
+            row = [0] * width
+            for layer in layers:
+                grid = data.grids[layer][y * width:(y + 1) * width]
+                row = [count + (index != EMPTY) for count, index in zip(row, grid)]
+
+            above = (width + 1) * y
+            below = above + width + 1
+            for x, total in enumerate(accumulate(row), 1):
+                self.sums[below + x] = self.sums[above + x] + total
+
+    def count(self, first_x, first_y, last_x, last_y):
+        # Cells from first to last, last not included, in level coordinates
+        data = self.data
+        x1 = min(max(first_x - data.origin[0], 0), data.width)
+        x2 = min(max(last_x - data.origin[0], 0), data.width)
+        y1 = min(max(first_y - data.origin[1], 0), data.height)
+        y2 = min(max(last_y - data.origin[1], 0), data.height)
+        if x1 >= x2 or y1 >= y2:
+            return 0
+
+        stride = data.width + 1
+        sums = self.sums
+        return sums[y2 * stride + x2] - sums[y1 * stride + x2] - sums[y2 * stride + x1] + sums[y1 * stride + x1]
+
+
+class Placed:
+    # Things on a table layer sorted along x, so the ones near a window can be found without going through all
+    def __init__(self, data, layer):
+        self.positions = sorted(pos for pos, index in data.entities(layer))
+        self.xs = [pos[0] for pos in self.positions]
+
+    def around(self, left, top, right, bottom):
+        # Placed things are a cell in size
+        start = bisect_right(self.xs, left - TILE_SIZE)
+        end = bisect_left(self.xs, right)
+        return [pos for pos in self.positions[start:end] if top - TILE_SIZE < pos[1] < bottom]
+
+
+class LevelBudget:
+    def __init__(self, data, args):
+        self.data = data
+        self.args = args
+        self.layer_counts = {layer: CellCounts(data, (layer,)) for layer in DRAW_LAYERS}
+        self.draw_counts = CellCounts(data, DRAW_LAYERS)
+        self.ramp_counts = self.layer_counts['ramps']
+        self.enemies = Placed(data, 'enemies')
+        self.chests = Placed(data, 'guns')
+
+        # Every camera position that shows some of the level. The camera never goes left of 0
+        left = max(data.origin[0] * TILE_SIZE, 0)
+        right = (data.origin[0] + data.width) * TILE_SIZE - SCREEN_SIZE[0]
+        top = data.origin[1] * TILE_SIZE
+        bottom = (data.origin[1] + data.height) * TILE_SIZE - SCREEN_SIZE[1]
+        if bottom < top:
+            top = bottom = top + (bottom - top) // 2
+
+        step = args.step * TILE_SIZE
+        self.xs = list(range(left, max(right, left) + 1, step))
+        self.ys = list(range(top, bottom + 1, step))
+
+    def window(self, camera_x, camera_y):
+        # What one camera position costs
+        args = self.args
+        first_x, first_y = camera_x // TILE_SIZE - DRAW_MARGIN[0], camera_y // TILE_SIZE - DRAW_MARGIN[0]
+        last_x = (camera_x + SCREEN_SIZE[0]) // TILE_SIZE + DRAW_MARGIN[1]
+        last_y = (camera_y + SCREEN_SIZE[1]) // TILE_SIZE + DRAW_MARGIN[1]
+
+        margin = args.active_margin
+        enemies = self.enemies.around(camera_x - margin, camera_y - margin, camera_x + SCREEN_SIZE[0] + margin,
+                                      camera_y + SCREEN_SIZE[1] + margin)
+        chests = self.chests.around(camera_x - CHEST_MARGIN, camera_y - CHEST_MARGIN,
+                                    camera_x + SCREEN_SIZE[0] + CHEST_MARGIN, camera_y + SCREEN_SIZE[1] + CHEST_MARGIN)
+
+        # Enemies look at the cells around themselves for ramps, and they walk around a bit
+        reach = args.ramp_radius + 1
+        ramps = 0
+        for x, y in enemies:
+            x, y = x // TILE_SIZE, y // TILE_SIZE
+            ramps += self.ramp_counts.count(x - reach, y - reach, x + reach + 1, y + reach + 1)
+
+        return {
+            'draws': self.draw_counts.count(first_x, first_y, last_x, last_y),
+            'enemies': len(enemies),
+            'chests': len(chests),
+            'ramps': ramps,
+        }
+
+    def layers(self, camera_x, camera_y):
+        first_x, first_y = camera_x // TILE_SIZE - DRAW_MARGIN[0], camera_y // TILE_SIZE - DRAW_MARGIN[0]
+        last_x = (camera_x + SCREEN_SIZE[0]) // TILE_SIZE + DRAW_MARGIN[1]
+        last_y = (camera_y + SCREEN_SIZE[1]) // TILE_SIZE + DRAW_MARGIN[1]
+        return {layer: counts.count(first_x, first_y, last_x, last_y) for layer, counts in self.layer_counts.items()}
+
+    def sweep(self):
+        # Rows of windows, top to bottom
+        return [[self.window(x, y) for x in self.xs] for y in self.ys]
+
+
+def budgets(args):
+    return {'draws': args.max_draws, 'enemies': args.max_enemies, 'chests': args.max_chests, 'ramps': args.max_ramps}
+
+
+def load(level, folder):
+    if level.isdigit():
+        return load_level(int(level), folder)
+
+    # A JSON file from anywhere, compiled in memory
+    match = re.search(r'level(\d+)\.json$', level)
+    return LevelData(int(match.group(1)) if match else 0, compile_level(level), os.path.dirname(level))
+
+
+def hotspots(budget, rows, limits):
+    # Columns with a window over budget, joined up into spans
+    spans = []
+    for column, x in enumerate(budget.xs):
+        over = [(row[column], y) for row, y in zip(rows, budget.ys)
+                if any(row[column][metric] > limits[metric] for metric in METRICS)]
+        if not over:
+            continue
+
+        worst = {metric: max(window[metric] for window, y in over) for metric in METRICS}
+        # Cameras closer than a screen apart see some of the same cells, so they are one span
+        if spans and budget.xs[column] - budget.xs[spans[-1]['end']] <= SCREEN_SIZE[0]:
+            span = spans[-1]
+            span['end'] = column
+            span['worst'] = {metric: max(span['worst'][metric], worst[metric]) for metric in METRICS}
+        else:
+            spans.append({'start': column, 'end': column, 'worst': worst})
+
+        # The window to look at when fixing it
+        window, y = max(over, key=lambda item: load_of(item[0], limits))
+        if load_of(window, limits) >= spans[-1].get('load', 0):
+            spans[-1].update(load=load_of(window, limits), camera=(x, y))
+
+    return sorted(spans, key=lambda span: -span['load'])
+
+
+def load_of(window, limits):
+    return max(window[metric] / limits[metric] if limits[metric] else 0 for metric in METRICS)
+
+
+def colour(load):
+    # Cold to warm up to the budget, hot over it
+    if load > 1:
+        return HOT
+    return tuple(round(a + (b - a) * load) for a, b in zip(COLD, WARM))
+
+
+def save_heatmap(path, budget, rows, limits):
+    # One band per metric, a pixel for each window, plus the band for all of them together
+    scale = 2
+    band_height = len(budget.ys) * scale
+    bands = ('load',) + METRICS
+    surface = pygame.Surface((len(budget.xs) * scale, (band_height + scale) * len(bands)))
+    surface.fill((0, 0, 0))
+
+    for band, metric in enumerate(bands):
+        top = band * (band_height + scale)
+        for row_number, row in enumerate(rows):
+            for column, window in enumerate(row):
+                if metric == 'load':
+                    load = load_of(window, limits)
+                else:
+                    load = window[metric] / limits[metric] if limits[metric] else 0
+                surface.fill(colour(load), (column * scale, top + row_number * scale, scale, scale))
+
+    pygame.image.save(surface, path)
+
+
+def report(name, budget, limits, top):
+    rows = budget.sweep()
+    windows = [window for row in rows for window in row]
+    peaks = {metric: max(window[metric] for window in windows) for metric in METRICS}
+    means = {metric: sum(window[metric] for window in windows) / len(windows) for metric in METRICS}
+
+    print(f'{name}: {budget.data.width}x{budget.data.height} cells, {len(windows)} camera positions')
+    for metric in METRICS:
+        print(f'  {metric:<8} mean {means[metric]:7.1f}   peak {peaks[metric]:5}   budget {limits[metric]}')
+
+    # Where the draws come from at the busiest spot
+    busiest = max(((x, y, window) for y, row in zip(budget.ys, rows) for x, window in zip(budget.xs, row)),
+                  key=lambda item: item[2]['draws'])[:2]
+    layers = ', '.join(f'{count} {layer}' for layer, count in budget.layers(*busiest).items() if count)
+    print(f'  busiest draws at camera {busiest}: {layers}')
+
+    spans = hotspots(budget, rows, limits)
+    if not spans:
+        print('  no hotspots')
+    for span in spans[:top]:
+        start, end = budget.xs[span['start']] // TILE_SIZE, budget.xs[span['end']] // TILE_SIZE
+        over = ', '.join(f'{metric} {span["worst"][metric]}' for metric in METRICS
+                         if span['worst'][metric] > limits[metric])
+        print(f'  hotspot columns {start}-{end + SCREEN_SIZE[0] // TILE_SIZE}: {over}, '
+              f'worst at camera {span["camera"]} ({span["load"]:.0%} of budget)')
+    if len(spans) > top:
+        print(f'  ... and {len(spans) - top} more')
+    return rows, spans
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Find the parts of a level that go over the performance budget')
+    parser.add_argument('levels', nargs='*', default=['1', '2', '3', '4', '5'], help='level numbers or JSON paths')
+    parser.add_argument('--folder', default=LEVEL_FOLDER, help='where numbered levels are')
+    parser.add_argument('--step', type=int, default=1, help='cells between camera positions')
+    parser.add_argument('--max-draws', type=int, default=700, help='tile map cells drawn in one frame')
+    parser.add_argument('--max-enemies', type=int, default=12, help='enemies around the screen')
+    parser.add_argument('--max-chests', type=int, default=4, help='chests around the screen')
+    parser.add_argument('--max-ramps', type=int, default=12, help='ramp cells near those enemies')
+    parser.add_argument('--active-margin', type=int, default=64, help='pixels past the screen enemies count in')
+    parser.add_argument('--ramp-radius', type=int, default=2, help='cells enemies wander from where they start')
+    parser.add_argument('--top', type=int, default=10, help='hotspots shown per level')
+    parser.add_argument('--heatmap', default=None, help='folder to save a heatmap image of each level in')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    limits = budgets(args)
+    if args.heatmap:
+        os.makedirs(args.heatmap, exist_ok=True)
+
+    over_budget = False
+    for level in args.levels:
+        data = load(level, args.folder)
+        budget = LevelBudget(data, args)
+        name = level if not level.isdigit() else f'{args.folder}/level{level}'
+        rows, spans = report(name, budget, limits, args.top)
+        over_budget = over_budget or bool(spans)
+
+        if args.heatmap:
+            path = f'{args.heatmap}/{os.path.splitext(os.path.basename(name))[0]}.png'
+            save_heatmap(path, budget, rows, limits)
+            print(f'  heatmap saved to {path}')
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -15,7 +15,9 @@ import os
 import json
 from pygame.constants import *
 from time import time
-from scripts.utils import TextButton, load_images_folder, debug_info, load_image, cut_sprite_sheet
+from scripts.asset_manifest import folder_files
+from scripts.utils import (TextButton, load_images_folder, debug_info, load_image, cut_sprite_sheet, load_font,
+                           render_text)
 
 # Set the environment variable to center the window
 os.environ['SDL_VIDEO_CENTERED'] = '1'
@@ -64,7 +66,7 @@ class LevelEditor:
         self.data = {}
         self.texts = []
         self.typed_text = ''
-        self.font = pygame.font.Font('assets/fonts/cyberpunk.otf', 28)
+        self.font = load_font('assets/fonts/cyberpunk.otf', 28)
         self.typing = False
         self.init_pos = [0, 0]
         self.drawing_mode = 'pencil'
@@ -236,7 +238,7 @@ class LevelEditor:
 
         for item in self.texts:
             pos, text = item
-            ttt = self.font.render(text, True, 'white')
+            ttt = render_text(self.font, text, 'white')
             self.screen.blit(ttt, (pos[0] - self.scroll[0], pos[1] - self.scroll[1]))
 
             if 3 in self.mouse_clicks and self.mouse_rect.colliderect((pos[0] - self.scroll[0], pos[1] - self.scroll[1]), ttt.get_size()):
@@ -459,20 +461,18 @@ class LevelEditor:
         }
 
         # Load enemy images
-        for root, _, files in os.walk('assets/sprites/enemies'):
-            for file in files:
-                if 'idle' in file.lower():
-                    image = load_image(root + '/' + file)
-                    size = image.get_height(), image.get_height()
-                    self.images['enemies'].append(cut_sprite_sheet(image, size)[0])
+        for file in folder_files('assets/sprites/enemies'):
+            if 'idle' in os.path.basename(file).lower():
+                image = load_image(file)
+                size = image.get_height(), image.get_height()
+                self.images['enemies'].append(cut_sprite_sheet(image, size)[0])
 
         # Load boss images
-        for root, _, files in os.walk('assets/sprites/bosses'):
-            for file in files:
-                if 'idle' in file.lower():
-                    image = load_image(root + '/' + file)
-                    size = image.get_height(), image.get_height()
-                    self.images['bosses'].append(cut_sprite_sheet(image, size)[0])
+        for file in folder_files('assets/sprites/bosses'):
+            if 'idle' in os.path.basename(file).lower():
+                image = load_image(file)
+                size = image.get_height(), image.get_height()
+                self.images['bosses'].append(cut_sprite_sheet(image, size)[0])
 
         # Load gun images
         for name in GUN_NAMES:
@@ -13,36 +13,58 @@
 
 
 # If this file does not run, perhaps try to pip install pygame
+# Bots that use the observations in scripts/observation.py also need numpy: pip install numpy
 
 # Import and initialize pygame
+import sys
 import pygame
 
+# Run with --profile-startup to see where the time goes before the first menu frame
+PROFILER = None
+if '--profile-startup' in sys.argv:
+    from scripts.profiler import StartupProfiler
+    PROFILER = StartupProfiler.from_args(sys.argv)
+
+# Run with --pipelined-render to draw level frames on a second thread, a frame behind the simulation. Only faster
+# on pygame builds whose blits let go of the GIL, see RenderThread in scripts/render.py
+PIPELINED_RENDER = '--pipelined-render' in sys.argv
+
+# Run with --rewind to keep the last few seconds of a level. Hold F7 to step back through them
+REWIND = '--rewind' in sys.argv
+
 pygame.init()
 pygame.mixer.set_num_channels(30)
 
 
 # Other imports
 import json
-from scripts.globals import SCREEN_SIZE
-pygame.display.set_mode(SCREEN_SIZE, pygame.SCALED)  # Don't mind this line here
-from scripts.utils import Timer, load_image
+from scripts.globals import SCREEN_SIZE, FPS
+from scripts.clock import GameClock
+from scripts.utils import Timer, load_image, load_font
 from time import time
+from scripts.render import RenderThread
 from states.state_manager import StateManager
 from scripts.audio import MUSIC
 
 
 class Game:
-    def __init__(self):
-        # Screen
-        self.screen = pygame.display.set_mode(SCREEN_SIZE, pygame.SCALED)
+    def __init__(self, headless=False):
+        # Screen. Headless games run levels for tools and never show a frame, see scripts/headless.py
+        self.headless = headless
+        self.screen = pygame.display.set_mode(SCREEN_SIZE, 0 if headless else pygame.SCALED)
         pygame.display.set_caption('Cyber Shooter')
         pygame.display.set_icon(load_image('assets/sprites/weapons/guns/02_1.png'))
+        self.render_thread = RenderThread(SCREEN_SIZE) if PIPELINED_RENDER else None
+        self.rewind = REWIND
 
         # Game loop
         self.running = True
         self.delta = 0
         self.frame_freeze = 0
-        self.hit_stop = Timer(1000)
+
+        # Time outside of levels, levels count their own
+        self.clock = GameClock()
+        self.hit_stop = Timer(1000, self.clock)
         self.prev_time = 0
 
         # Input
@@ -53,10 +75,10 @@ class Game:
 
         # Fonts for text
         self.fonts = {
-            15: pygame.font.Font('assets/fonts/cyberpunk.otf', 15),
-            17: pygame.font.Font('assets/fonts/cyberpunk.otf', 17),
-            7: pygame.font.Font('assets/fonts/cyberpunk.otf', 10),
-            'data 15': pygame.font.Font('assets/fonts/data-latin.ttf', 15),
+            15: load_font('assets/fonts/cyberpunk.otf', 15),
+            17: load_font('assets/fonts/cyberpunk.otf', 17),
+            7: load_font('assets/fonts/cyberpunk.otf', 10),
+            'data 15': load_font('assets/fonts/data-latin.ttf', 15),
         }
 
         # Data
@@ -99,14 +121,20 @@ class Game:
                 if event.type == pygame.MOUSEMOTION:
                     self.mouse_rect.topleft = event.pos
 
-            # Default screen colour
-            self.screen.fill('#03befc')
-
             # Update everything in between here
-            self.state_manager.update()
+            dirty = self.state_manager.update()
+
+            # Update screen. Menus only hand back what changed, and when nothing did the CPU gets a rest
+            if dirty is None:
+                pygame.display.update()
+            elif dirty:
+                pygame.display.update(dirty)
+            else:
+                pygame.time.wait(1000 // FPS)
 
-            # Update screen
-            pygame.display.update()
+            # Startup profiling ends with the first menu frame
+            if PROFILER is not None:
+                self.running = False
 
             # Reset inputs
             self.key_presses = set()
@@ -115,6 +143,10 @@ class Game:
             # Delta time and frame rate
             current_time = time()
             self.delta = current_time - prev_time
+            self.clock.advance(self.delta)
+
+        if self.render_thread is not None:
+            self.render_thread.stop()
 
     def quit(self):
         self.running = False
@@ -122,3 +154,5 @@ class Game:
 
 if __name__ == '__main__':
     Game().run()
+    if PROFILER is not None:
+        sys.exit(PROFILER.report())
@@ -0,0 +1,115 @@
+# Memory benchmark for Cyber Shooter
+#
+# Loads a level headless and reports how much Python heap it holds, and how many bytes each instance of the
+# classes a level has lots of takes up. Then it goes to the boss fight, fills the screen with projectiles and
+# reports the same again, with what one projectile costs including everything it owns.
+#
+# Bytes per instance is the object plus its __dict__ when it has one. Heap is what Python allocated for the
+# level, traced with tracemalloc. Images are shared between levels and their pixels belong to SDL, so neither
+# is counted. Levels keep how they started packed, for restarting, and its size is reported on a line of its own.
+#
+# Usage: python memory_benchmark.py [--level 1] [--character 1] [--projectiles 400] [--folder levels]
+
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+
+import pygame
+
+from scripts.camera import Camera
+from scripts.entity import Entity
+from scripts.headless import HeadlessLevel, boss_fight_state
+from scripts.item_map import Chest
+from scripts.level_data import LEVEL_FOLDER
+from scripts.projectile import Electric, Explosive, FMJ, Missile, Normal, Projectile
+from scripts.tilemap import Tile
+from scripts.utils import Animation, Timer
+
+# Classes there are a lot of in a level, each reported on its own line by type
+REPORTED = (Tile, Timer, Animation, Projectile, Chest, Camera, Entity)
+
+# Projectiles the boss fight is filled with, taking turns
+PROJECTILES = (Normal, FMJ, Explosive, Electric, Missile)
+
+
+def instance_size(value):
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += sys.getsizeof(value.__dict__)
+    return size
+
+
+def instances():
+    counts = {}
+    for value in gc.get_objects():
+        if isinstance(value, REPORTED):
+            name = type(value).__name__
+            count, size = counts.get(name, (0, 0))
+            counts[name] = count + 1, size + instance_size(value)
+    return counts
+
+
+def heap():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def report(title, heap_size, level):
+    print(f'{title}: {heap_size / 1024:.0f} KB of heap, {len(level.start_state.data) / 1024:.0f} KB of it the '
+          f'packed start state')
+    counts = instances()
+    for name, (count, size) in sorted(counts.items(), key=lambda item: -item[1][1]):
+        print(f'  {name:<18} {count:6} x {size / count:6.0f} B = {size / 1024:8.1f} KB')
+
+
+def fill_projectiles(level, count, rng):
+    # The image doesn't matter, they all share it
+    image = pygame.Surface((8, 4))
+    camera = level.camera
+    for i in range(count):
+        position = camera.x + rng.uniform(32, 544), camera.y + rng.uniform(32, 288)
+        direction = rng.choice((-1, 1))
+        projectile = PROJECTILES[i % len(PROJECTILES)]
+        y_direction = -2.55 if projectile is Missile else 0
+        projectile(level, image, position, 10, 6, direction, y_direction, level.enemy_projectiles)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Measure how much memory a level and a boss fight take up')
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--character', type=int, default=1)
+    parser.add_argument('--projectiles', type=int, default=400)
+    parser.add_argument('--folder', default=LEVEL_FOLDER, help='where the level is, like generated stress levels')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    headless = HeadlessLevel()
+
+    # Loaded once first, so the images and sounds are cached before anything is traced
+    headless.reset(args.level, args.character, 0, args.folder)
+    tracemalloc.start()
+
+    start = heap()
+    headless.reset(args.level, args.character, 0, args.folder)
+    headless.step()
+    report(f'Level {args.level}', heap() - start, headless.level)
+
+    boss_fight_state(headless, args.level, args.character, 0, args.folder)
+    fight = heap()
+    fill_projectiles(headless.level, args.projectiles, random.Random(0))
+    filled = heap()
+    print()
+    report(f'Boss fight with {len(headless.level.enemy_projectiles)} projectiles', filled - start, headless.level)
+    print(f'  {(filled - fight) / args.projectiles:.0f} B per projectile, with its rect, vectors and animations')
+
+    tracemalloc.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,115 @@
+import json
+import os
+import pygame
+from os.path import normcase
+
+# Level data refers to images by their position in a folder, so that order has to be the same everywhere.
+# The manifest records every asset folder's files in the order the levels were made with, along with
+# image and frame sizes, so loaders never walk directories.
+MANIFEST_PATH = 'assets/manifest.json'
+MANIFEST_ROOTS = ('assets/sprites',)
+
+# Each image is classed by how much of its alpha it uses: 'opaque' for none, 'colorkey' when every pixel is
+# fully on or off, and 'translucent' for real blending
+COLORKEY = (255, 0, 255)
+
+MANIFEST = {}
+IMAGE_ALPHA = {}
+manifest_loaded = False
+
+
+def sort_key(name):
+    # The order Windows lists a folder in, which is what the level editor saw
+    return name.upper()
+
+
+def frame_size(size):
+    # Sprite sheets are a row of square frames as tall as the sheet
+    width, height = size
+    if width > height and width % height == 0:
+        return [height, height]
+    return [width, height]
+
+
+def alpha_class(image):
+    pixels = pygame.image.tobytes(image, 'RGBA')
+    alpha = pixels[3::4]
+    if alpha.count(255) == len(alpha):
+        return 'opaque'
+
+    # Binary alpha works as a colorkey, as long as the key colour is not part of the image
+    key = bytes(COLORKEY) + b'\xff'
+    if not alpha.translate(None, b'\x00\xff') and not any(
+            pixels[i:i + 4] == key for i in range(0, len(pixels), 4) if pixels[i] == COLORKEY[0]):
+        return 'colorkey'
+    return 'translucent'
+
+
+def build_manifest():
+    manifest = {}
+    for root in MANIFEST_ROOTS:
+        for folder, folders, files in os.walk(root):
+            folders.sort(key=sort_key)
+            files = sorted(files, key=sort_key)
+            images = [pygame.image.load(f'{folder}/{file}') for file in files]
+            sizes = [list(image.get_size()) for image in images]
+            manifest[folder.replace(os.sep, '/')] = {
+                'folders': folders,
+                'files': files,
+                'sizes': sizes,
+                'frames': [frame_size(size) for size in sizes],
+                'alpha': [alpha_class(image) for image in images],
+            }
+
+    # One folder per line keeps the diffs readable
+    with open(MANIFEST_PATH, 'w') as file:
+        lines = [f'{json.dumps(folder)}: {json.dumps(manifest[folder])}' for folder in sorted(manifest)]
+        file.write('{\n' + ',\n'.join(lines) + '\n}\n')
+
+    print(f'Wrote {MANIFEST_PATH}: {len(manifest)} folders')
+    return manifest
+
+
+def load_manifest():
+    global manifest_loaded
+    if not manifest_loaded:
+        manifest_loaded = True
+        try:
+            manifest = json.loads(open(MANIFEST_PATH).read())
+        except FileNotFoundError:
+            return MANIFEST
+
+        for folder, entry in manifest.items():
+            MANIFEST[normcase(folder)] = entry
+            for file, alpha in zip(entry['files'], entry.get('alpha', ())):
+                IMAGE_ALPHA[normcase(f'{folder}/{file}')] = alpha
+
+    return MANIFEST
+
+
+def manifest_entry(path):
+    entry = load_manifest().get(normcase(path.rstrip('/')))
+    if entry is None and os.path.isdir(path):
+        # Not in the manifest yet, so list it the same way the manifest would
+        _, folders, files = next(os.walk(path))
+        entry = {'folders': sorted(folders, key=sort_key), 'files': sorted(files, key=sort_key)}
+    return entry
+
+
+def folder_files(path):
+    # Every file in a folder and its subfolders, in manifest order
+    entry = manifest_entry(path)
+    if entry is None:
+        return []
+
+    path = path.rstrip('/')
+    files = [f'{path}/{file}' for file in entry['files']]
+    for folder in entry['folders']:
+        files += folder_files(f'{path}/{folder}')
+    return files
+
+
+def image_alpha(path):
+    # Anything the manifest does not know about keeps its per-pixel alpha
+    load_manifest()
+    return IMAGE_ALPHA.get(normcase(path), 'translucent')
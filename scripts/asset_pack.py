@@ -0,0 +1,140 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import pygame
+from os.path import normcase
+
+# Raw pixel pack: images stored already decoded, so loading one is just pointing a surface at the mapped file.
+#
+# File layout:
+#   header   magic, version, length of the index
+#   index    JSON: pixel format, the files it was built from with their stamps, and where each image starts
+#   pixels   32 bit pixels for every image, one after another, as prepare left them
+MAGIC = b'CSPK'
+VERSION = 2
+HEADER = struct.Struct('<4sHI')
+
+# ARGB8888 in memory, which is what the display uses almost everywhere
+PIXEL_FORMAT = 'BGRA' if sys.byteorder == 'little' else 'ARGB'
+
+# A build that has held the lock for this long, in seconds, is taken to have died
+LOCK_TIMEOUT = 10 * 60
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def lock_pack(pack_path):
+    # Only one process builds a pack at a time. Gives back the lock file to remove when done, or None if some
+    # other process is building it or the folder can't be written to
+    lock_path = f'{pack_path}.lock'
+    try:
+        os.makedirs(os.path.dirname(pack_path) or '.', exist_ok=True)
+        if os.path.exists(lock_path) and time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT:
+            os.remove(lock_path)
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except OSError:
+        return None
+    return lock_path
+
+
+def build_pack(pack_path, paths, dependencies=(), prepare=None):
+    # Dependencies are files that change what goes in the pack without being in it, like the atlas manifest.
+    # prepare can change each decoded image before it is written
+    index = {'format': PIXEL_FORMAT, 'sources': {}, 'images': {}}
+    for path in list(paths) + list(dependencies):
+        if os.path.exists(path):
+            index['sources'][path] = file_stamp(path)
+
+    folder = os.path.dirname(pack_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    # Named for this process, so two builds at once can't write over each other's files
+    temp_path = f'{pack_path}.{os.getpid()}.tmp'
+    with open(temp_path + '.pixels', 'wb') as pixels:
+        offset = 0
+        for path in paths:
+            image = pygame.image.load(path)
+            if prepare is not None:
+                image = prepare(path, image)
+            data = pygame.image.tobytes(image, PIXEL_FORMAT)
+            index['images'][normcase(path)] = [offset, image.get_width(), image.get_height()]
+            pixels.write(data)
+            offset += len(data)
+
+    # Pad the index so the pixels start 4-byte aligned
+    index = json.dumps(index).encode()
+    index += b' ' * (-(HEADER.size + len(index)) % 4)
+
+    with open(temp_path, 'wb') as file, open(temp_path + '.pixels', 'rb') as pixels:
+        file.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        file.write(index)
+        while chunk := pixels.read(1 << 20):
+            file.write(chunk)
+    os.remove(temp_path + '.pixels')
+    os.replace(temp_path, pack_path)
+
+    return len(paths)
+
+
+def read_index(file):
+    header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, version, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return json.loads(file.read(length))
+
+
+def is_pack_stale(pack_path):
+    try:
+        with open(pack_path, 'rb') as file:
+            index = read_index(file)
+    except FileNotFoundError:
+        return True
+
+    if index is None or index['format'] != PIXEL_FORMAT:
+        return True
+
+    for path, stamp in index['sources'].items():
+        if not os.path.exists(path) or file_stamp(path) != stamp:
+            return True
+    return False
+
+
+class AssetPack:
+    def __init__(self, pack_path):
+        with open(pack_path, 'rb') as file:
+            index = read_index(file)
+            self.start = file.tell()
+            # Copy on write, so drawing onto a packed surface never touches the file
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        self.format = index['format']
+        self.images = index['images']
+        self.view = memoryview(self.buffer)
+
+        # Only if the display ended up with some other pixel format
+        self.needs_convert = None
+
+    def __contains__(self, path):
+        return normcase(path) in self.images
+
+    def get(self, path):
+        offset, width, height = self.images[normcase(path)]
+        start = self.start + offset
+        surface = pygame.image.frombuffer(self.view[start:start + width * height * 4], (width, height), self.format)
+
+        if self.needs_convert is None:
+            self.needs_convert = surface.get_masks()[:3] != pygame.display.get_surface().get_masks()[:3]
+        if self.needs_convert:
+            surface = surface.convert_alpha()
+
+        return surface
@@ -0,0 +1,111 @@
+import json
+import os
+import pygame
+
+from scripts.globals import ENEMY_NAMES, BOSS_NAMES, CHARACTER_NAMES
+from scripts.utils import ATLAS_FOLDER, folder_paths
+
+ATLAS_WIDTH = 2048
+ATLAS_MAX_HEIGHT = 4096
+
+# Anything bigger than this is left as its own file
+MAX_PACKED_SIZE = 1536
+
+
+def atlas_groups():
+    groups = {}
+
+    for tileset in sorted(os.listdir('assets/sprites/tilesets')):
+        folder = f'assets/sprites/tilesets/{tileset}'
+        groups[f'tileset {tileset}'] = (folder_paths(f'{folder}/tiles') + folder_paths(f'{folder}/ramps') +
+                                        folder_paths(f'{folder}/objects') +
+                                        folder_paths(f'{folder}/animated objects') +
+                                        folder_paths(f'{folder}/background/day'))
+
+    for name in ENEMY_NAMES:
+        groups[f'enemy {name}'] = folder_paths(f'assets/sprites/enemies/{name}')
+
+    for name in BOSS_NAMES:
+        groups[f'boss {name}'] = folder_paths(f'assets/sprites/bosses/{name}')
+
+    for name in CHARACTER_NAMES:
+        groups[f'character {name}'] = (folder_paths(f'assets/sprites/characters/{name}') +
+                                       folder_paths(f'assets/sprites/weapons/hands/{name}'))
+
+    groups['weapons'] = (folder_paths('assets/sprites/weapons/guns') +
+                         folder_paths('assets/sprites/weapons/bullets') +
+                         folder_paths('assets/sprites/weapons/shoot effects'))
+
+    groups['gui'] = (folder_paths('assets/sprites/gui') + folder_paths('assets/sprites/menus') +
+                     folder_paths('assets/sprites/misc') + folder_paths('assets/sprites/checkpoints') +
+                     folder_paths('assets/sprites/chests'))
+
+    return groups
+
+
+def pack(sizes, width=ATLAS_WIDTH, max_height=ATLAS_MAX_HEIGHT):
+    # Shelf packing: tallest images first, left to right, starting a new shelf when a row is full.
+    # Returns a list of pages, each a dict of index -> (x, y)
+    order = sorted(range(len(sizes)), key=lambda i: (sizes[i][1], sizes[i][0]), reverse=True)
+    pages = [{}]
+    x = y = shelf_height = 0
+
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        if y + h > max_height:
+            pages.append({})
+            x = y = shelf_height = 0
+
+        pages[-1][i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+
+    return pages
+
+
+def build_atlas(name, paths):
+    images = []
+    for path in paths:
+        image = pygame.image.load(path)
+        if image.get_width() <= MAX_PACKED_SIZE and image.get_height() <= MAX_PACKED_SIZE:
+            images.append((path, image))
+
+    atlases = {}
+    for page_number, page in enumerate(pack([image.get_size() for _, image in images])):
+        if not page:
+            continue
+
+        width = max(x + images[i][1].get_width() for i, (x, y) in page.items())
+        height = max(y + images[i][1].get_height() for i, (x, y) in page.items())
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+
+        rects = {}
+        for i, (x, y) in page.items():
+            path, image = images[i]
+            atlas.blit(image, (x, y))
+            rects[path] = [x, y, image.get_width(), image.get_height()]
+
+        file = f'{name}-{page_number}.png'
+        pygame.image.save(atlas, f'{ATLAS_FOLDER}/{file}')
+        atlases[file] = rects
+
+    return atlases
+
+
+def build_atlases():
+    os.makedirs(ATLAS_FOLDER, exist_ok=True)
+
+    manifest = {'atlases': {}}
+    for name, paths in atlas_groups().items():
+        if paths:
+            manifest['atlases'].update(build_atlas(name, paths))
+            print(f'Packed {name}: {len(paths)} images')
+
+    with open(f'{ATLAS_FOLDER}/manifest.json', 'w') as file:
+        file.write(json.dumps(manifest))
+
+    return manifest
@@ -1,61 +1,138 @@
 import pygame
+from collections import OrderedDict
+from threading import Lock
 
 from scripts.globals import GUN_NAMES
 
+# Decoded sound effects are kept under this many bytes. The least recently used ones are dropped first
+SFX_MEMORY_BUDGET = 16 * 1024 * 1024
 
-GUN_SHOT_SFX = {
-    name: pygame.mixer.Sound(f'assets/audio/sfx/guns/{name}.wav') for name in GUN_NAMES
-}
 
-ATTACK_SFX = {
-    'punch 1': pygame.mixer.Sound(f'assets/audio/sfx/attack/punch_1.wav'),
-    'punch 2': pygame.mixer.Sound(f'assets/audio/sfx/attack/punch_2.wav'),
-    'punch 3': pygame.mixer.Sound(f'assets/audio/sfx/attack/punch_3.wav'),
-    'metal hit 1': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_hit_1.wav'),
-    'metal hit 2': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_hit_2.wav'),
-    'metal hit 3': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_hit_3.wav'),
-    'metal hit 4': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_hit_4.wav'),
-    'metal whoosh 1': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_whoosh_1.wav'),
-    'metal whoosh 2': pygame.mixer.Sound(f'assets/audio/sfx/attack/metal_whoosh_2.wav'),
-    'bite': pygame.mixer.Sound(f'assets/audio/sfx/attack/bite.wav'),
-    'thrust up': pygame.mixer.Sound(f'assets/audio/sfx/attack/thrust_up.wav'),
-    'smash down': pygame.mixer.Sound(f'assets/audio/sfx/attack/smash_down.wav'),
-    'swoosh': pygame.mixer.Sound(f'assets/audio/sfx/attack/swoosh.wav'),
-    'gun shot': pygame.mixer.Sound(f'assets/audio/sfx/attack/gun_shot.wav'),
-    'laser shot': pygame.mixer.Sound(f'assets/audio/sfx/attack/laser_shot.wav'),
-    'laser shot 2': pygame.mixer.Sound(f'assets/audio/sfx/attack/laser_shot_2.wav'),
-    'warning beep': pygame.mixer.Sound(f'assets/audio/sfx/attack/warning_beep.wav'),
-    'flapping wings': pygame.mixer.Sound(f'assets/audio/sfx/attack/flapping_wings.wav'),
-}
+class SoundCache:
+    def __init__(self, budget):
+        self.budget = budget
+        self.size = 0
+        self.sounds = OrderedDict()
+        self.lock = Lock()
 
-DEATH_SFX = {
-    'human 1': pygame.mixer.Sound('assets/audio/sfx/death/human_death_1.wav'),
-    'human 2': pygame.mixer.Sound('assets/audio/sfx/death/human_death_2.wav'),
-    'human 3': pygame.mixer.Sound('assets/audio/sfx/death/human_death_3.wav'),
-    'human 4': pygame.mixer.Sound('assets/audio/sfx/death/human_death_4.wav'),
-    'human 5': pygame.mixer.Sound('assets/audio/sfx/death/human_death_5.wav'),
-    'demoness 1': pygame.mixer.Sound('assets/audio/sfx/death/demoness_1.wav'),
-    'demoness 2': pygame.mixer.Sound('assets/audio/sfx/death/demoness_2.wav'),
-    'player death': pygame.mixer.Sound('assets/audio/sfx/death/player_death.wav'),
-    'robot 1': pygame.mixer.Sound('assets/audio/sfx/death/robot_death_1.wav'),
-    'robot 2': pygame.mixer.Sound('assets/audio/sfx/death/robot_death_2.wav'),
-    'robot 3': pygame.mixer.Sound('assets/audio/sfx/death/robot_death_3.wav'),
-    'robot 4': pygame.mixer.Sound('assets/audio/sfx/death/robot_death_4.wav'),
-    'robot 5': pygame.mixer.Sound('assets/audio/sfx/death/robot_death_5.wav'),
-    'unique': pygame.mixer.Sound('assets/audio/sfx/death/unique.wav'),
-    'zombie 1': pygame.mixer.Sound('assets/audio/sfx/death/zombie_1.wav'),
-    'zombie 2': pygame.mixer.Sound('assets/audio/sfx/death/zombie_2.wav'),
-}
+    def load(self, lazy_sound):
+        with self.lock:
+            if lazy_sound.sound is not None:
+                self.sounds.move_to_end(lazy_sound)
+                return lazy_sound.sound
 
-MISC_SFX = {
-    'clip empty': pygame.mixer.Sound(f'assets/audio/sfx/guns/empty_gun_shot.wav'),
-    'electroshock': pygame.mixer.Sound('assets/audio/sfx/other/electroshock.wav'),
-    'electric shock': pygame.mixer.Sound('assets/audio/sfx/other/electric_shock.wav'),
-    'electric': pygame.mixer.Sound('assets/audio/sfx/other/electric.wav'),
-    'explosion 1': pygame.mixer.Sound('assets/audio/sfx/other/explosion1.wav'),
-    'dash 1': pygame.mixer.Sound('assets/audio/sfx/other/dash_1.wav'),
-    'dash 2': pygame.mixer.Sound('assets/audio/sfx/other/dash_2.wav'),
-}
+        # Decode outside the lock, so loading threads can decode several sounds at once
+        sound = pygame.mixer.Sound(lazy_sound.path)
+
+        with self.lock:
+            if lazy_sound.sound is None:
+                lazy_sound.sound = sound
+                self.sounds[lazy_sound] = self.sound_size(sound)
+                self.size += self.sounds[lazy_sound]
+                self.trim()
+            return lazy_sound.sound
+
+    def trim(self):
+        for lazy_sound in list(self.sounds):
+            if self.size <= self.budget:
+                break
+
+            # Never drop a sound while it is playing
+            if lazy_sound.sound.get_num_channels() > 0:
+                continue
+
+            self.size -= self.sounds.pop(lazy_sound)
+            lazy_sound.sound = None
+
+    @staticmethod
+    def sound_size(sound):
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+
+class LazySound:
+    def __init__(self, cache, path):
+        self.cache = cache
+        self.path = path
+        self.sound = None
+
+    def get(self):
+        return self.cache.load(self)
+
+    def play(self, *args, **kwargs):
+        return self.get().play(*args, **kwargs)
+
+    def stop(self):
+        # Nothing to stop if it was never decoded
+        if self.sound is not None:
+            self.sound.stop()
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class SoundBank(dict):
+    def __init__(self, paths, cache=None):
+        cache = SFX_CACHE if cache is None else cache
+        super().__init__({name: LazySound(cache, path) for name, path in paths.items()})
+
+
+SFX_CACHE = SoundCache(SFX_MEMORY_BUDGET)
+
+
+GUN_SHOT_SFX = SoundBank({
+    name: f'assets/audio/sfx/guns/{name}.wav' for name in GUN_NAMES
+})
+
+ATTACK_SFX = SoundBank({
+    'punch 1': f'assets/audio/sfx/attack/punch_1.wav',
+    'punch 2': f'assets/audio/sfx/attack/punch_2.wav',
+    'punch 3': f'assets/audio/sfx/attack/punch_3.wav',
+    'metal hit 1': f'assets/audio/sfx/attack/metal_hit_1.wav',
+    'metal hit 2': f'assets/audio/sfx/attack/metal_hit_2.wav',
+    'metal hit 3': f'assets/audio/sfx/attack/metal_hit_3.wav',
+    'metal hit 4': f'assets/audio/sfx/attack/metal_hit_4.wav',
+    'metal whoosh 1': f'assets/audio/sfx/attack/metal_whoosh_1.wav',
+    'metal whoosh 2': f'assets/audio/sfx/attack/metal_whoosh_2.wav',
+    'bite': f'assets/audio/sfx/attack/bite.wav',
+    'thrust up': f'assets/audio/sfx/attack/thrust_up.wav',
+    'smash down': f'assets/audio/sfx/attack/smash_down.wav',
+    'swoosh': f'assets/audio/sfx/attack/swoosh.wav',
+    'gun shot': f'assets/audio/sfx/attack/gun_shot.wav',
+    'laser shot': f'assets/audio/sfx/attack/laser_shot.wav',
+    'laser shot 2': f'assets/audio/sfx/attack/laser_shot_2.wav',
+    'warning beep': f'assets/audio/sfx/attack/warning_beep.wav',
+    'flapping wings': f'assets/audio/sfx/attack/flapping_wings.wav',
+})
+
+DEATH_SFX = SoundBank({
+    'human 1': 'assets/audio/sfx/death/human_death_1.wav',
+    'human 2': 'assets/audio/sfx/death/human_death_2.wav',
+    'human 3': 'assets/audio/sfx/death/human_death_3.wav',
+    'human 4': 'assets/audio/sfx/death/human_death_4.wav',
+    'human 5': 'assets/audio/sfx/death/human_death_5.wav',
+    'demoness 1': 'assets/audio/sfx/death/demoness_1.wav',
+    'demoness 2': 'assets/audio/sfx/death/demoness_2.wav',
+    'player death': 'assets/audio/sfx/death/player_death.wav',
+    'robot 1': 'assets/audio/sfx/death/robot_death_1.wav',
+    'robot 2': 'assets/audio/sfx/death/robot_death_2.wav',
+    'robot 3': 'assets/audio/sfx/death/robot_death_3.wav',
+    'robot 4': 'assets/audio/sfx/death/robot_death_4.wav',
+    'robot 5': 'assets/audio/sfx/death/robot_death_5.wav',
+    'unique': 'assets/audio/sfx/death/unique.wav',
+    'zombie 1': 'assets/audio/sfx/death/zombie_1.wav',
+    'zombie 2': 'assets/audio/sfx/death/zombie_2.wav',
+})
+
+MISC_SFX = SoundBank({
+    'clip empty': f'assets/audio/sfx/guns/empty_gun_shot.wav',
+    'electroshock': 'assets/audio/sfx/other/electroshock.wav',
+    'electric shock': 'assets/audio/sfx/other/electric_shock.wav',
+    'electric': 'assets/audio/sfx/other/electric.wav',
+    'explosion 1': 'assets/audio/sfx/other/explosion1.wav',
+    'dash 1': 'assets/audio/sfx/other/dash_1.wav',
+    'dash 2': 'assets/audio/sfx/other/dash_2.wav',
+})
 
 MUSIC = {
     'ambience': f'assets/audio/music/ambience.ogg',
@@ -68,3 +145,13 @@ MUSIC = {
     'game over': f'assets/audio/other/game over.wav',
 }
 
+SFX = {**GUN_SHOT_SFX, **ATTACK_SFX, **DEATH_SFX, **MISC_SFX}
+
+
+def prefetch(names):
+    for name in names:
+        # A missing file is only an error once something tries to play it
+        try:
+            SFX[name].get()
+        except FileNotFoundError:
+            continue
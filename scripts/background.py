@@ -1,39 +1,96 @@
+import pygame
+
+from scripts.asset_manifest import COLORKEY
+from scripts.globals import SCREEN_SIZE
 from scripts.utils import load_image
 
+# How fast each layer scrolls compared to the camera. Layers with the same speed are merged into one strip,
+# None means the layer never moves
+LAYER_SCROLL = {1: None, 2: 1, 3: 2, 4: 3, 5: 4}
+
 
 class Background:
     def __init__(self, tileset=None, time='day'):
         # Initialize
         self.images = {}
+        self.still = None
+        self.strips = []
+
+        # The last frame that was drawn, reused until the layers move by a whole pixel
+        self.frame = None
+        self.frame_key = None
+        self.frame_ready = False
 
         # Load data
         if tileset is not None:
             self.load(tileset, time)
 
-    def draw(self, surface, scroll):
+    def key(self, scroll):
+        # Whole pixel positions of the layers. The background only looks different when this changes
         horizontal = scroll[0] / 6
-        height = (-scroll[1] - 96 - 4)
+        height = int(-scroll[1] - 96 - 4)
+        return tuple(int((horizontal * speed) % 576) for speed, _ in self.strips), height
+
+    def draw(self, surface, scroll):
+        offsets, height = self.key(scroll)
 
-        # First layer
-        surface.blit(self.images[1], (0, 0))
+        # Only whole pixel changes show up on screen. While the layers keep moving they are drawn straight
+        # onto the surface, once they stop the frame is kept and reused
+        if (offsets, height) == self.frame_key:
+            if not self.frame_ready:
+                self.compose(self.frame, offsets, height)
+                self.frame_ready = True
+            surface.blit(self.frame, (0, 0))
+        else:
+            self.frame_key = offsets, height
+            self.frame_ready = False
+            self.compose(surface, offsets, height)
 
-        # Second layer
-        surface.blit(self.images[2], (-((horizontal * 1) % 576), height))
-        surface.blit(self.images[2], (-((horizontal * 1) % 576) + 576, height))
+    def compose(self, surface, offsets, height):
+        if surface is self.frame and self.frame.get_flags() & pygame.SRCALPHA:
+            self.frame.fill((0, 0, 0, 0))
+        surface.blit(self.still, (0, 0))
 
-        # Third layer
-        surface.blit(self.images[3], (-((horizontal * 2) % 576), height))
-        surface.blit(self.images[3], (-((horizontal * 2) % 576) + 576, height))
+        # Each strip holds its layers twice side by side, so one blit covers the wrap around
+        for (speed, strip), offset in zip(self.strips, offsets):
+            surface.blit(strip, (0, height), (offset, 0, SCREEN_SIZE[0], strip.get_height()))
 
-        # Fourth layer
-        surface.blit(self.images[4], (-((horizontal * 3) % 576), height))
-        surface.blit(self.images[4], (-((horizontal * 3) % 576) + 576, height))
+    def merge(self, layers, repeat):
+        # A single layer that does not repeat is used as it is
+        if len(layers) == 1 and repeat == 1:
+            return layers[0]
 
-        # Fifth layer
-        surface.blit(self.images[5], (-((horizontal * 4) % 576), height))
-        surface.blit(self.images[5], (-((horizontal * 4) % 576) + 576, height))
+        width = max(image.get_width() for image in layers) * repeat
+        height = max(image.get_height() for image in layers)
+
+        # Colorkey unless one of the layers really needs per-pixel alpha
+        if any(image.get_flags() & pygame.SRCALPHA for image in layers):
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        else:
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(COLORKEY)
+            surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+
+        for image in layers:
+            for i in range(repeat):
+                surface.blit(image, (i * image.get_width(), 0))
+        return surface
 
     def load(self, tileset, time):
         self.images = {
             i: load_image(f'assets/sprites/tilesets/{tileset}/background/{time}/{i}.png') for i in range(1, 6)
         }
+
+        groups = {}
+        for i, speed in LAYER_SCROLL.items():
+            groups.setdefault(speed, []).append(self.images[i])
+
+        self.still = self.merge(groups.pop(None), 1)
+        self.strips = [(speed, self.merge(layers, 2)) for speed, layers in groups.items()]
+
+        if self.still.get_flags() & pygame.SRCALPHA:
+            self.frame = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
+        else:
+            self.frame = pygame.Surface(SCREEN_SIZE).convert()
+        self.frame_key = None
+        self.frame_ready = False
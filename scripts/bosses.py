@@ -1,14 +1,18 @@
 import pygame
 import random
 from scripts.entity import Entity
-from scripts.utils import Animation, Timer, load_image
-from scripts.globals import FPS
+from scripts.utils import Animation, Timer, TickScheduler, load_image
+from scripts.globals import FPS, AI_TICK_RATE
 from scripts.projectile import RugbyBall, Missile, Normal, ThrownProjectile, Electric
 from scripts.enemies import Demoness
 from scripts.audio import ATTACK_SFX, DEATH_SFX, MISC_SFX
+from scripts.render import Z_ENTITIES
 
 
 class Boss(Entity):
+    # Every sound effect it can make, decoded before the level starts
+    SOUNDS = ()
+
     def __init__(self, level, name, size, position, speed, hp, image_offset, image_size=(72, 72)):
         super().__init__(level, size, position, speed, hp)
         # Display image
@@ -27,8 +31,9 @@ class Boss(Entity):
         self.image_size = image_size
 
         # AI
+        self.ai_ticker = TickScheduler(AI_TICK_RATE, TickScheduler.phase_at(position))
         self.selected_attack = 1
-        self.attack_cooldown = Timer(1000)
+        self.attack_cooldown = Timer(1000, self.level.clock)
         self.player_spotted = False
         self.visions = {}
         self.hit_player = False
@@ -36,7 +41,7 @@ class Boss(Entity):
         self.celebrate = False
 
         # Health
-        self.death_timer = Timer(5000)
+        self.death_timer = Timer(5000, self.level.clock)
         self.death_sound = 'human 1'
 
     def reset(self):
@@ -45,8 +50,8 @@ class Boss(Entity):
 
     def draw(self):
         position = self.image_position()
-        self.draw_health_bar(self.level.canvases[5], self.level.camera)
-        self.level.canvases[5].blit(self.display_image, (position[0] - self.level.camera.x, position[1] - self.level.camera.y))
+        self.draw_health_bar()
+        self.level.draw(Z_ENTITIES, self.display_image, position)
 
     def animate(self):
         # Flip
@@ -101,7 +106,7 @@ class Boss(Entity):
         pass
 
     def set_cooldown_timer(self, duration):
-        self.attack_cooldown = Timer(duration)
+        self.attack_cooldown = Timer(duration, self.level.clock)
         self.attack_cooldown.activate()
 
     def guard(self, player):
@@ -134,6 +139,13 @@ class Boss(Entity):
     def special(self, player):
         pass
 
+    def engaged(self):
+        # Attacks, sneers and specials react to animation frames, so they are followed every frame
+        for action, active in self.actions.items():
+            if active and action not in ('hurt', 'death', 'walk', 'idle'):
+                return True
+        return False
+
     def update_health(self):
         # Kill zone boundaries
         for tile in self.level.tilemap.get_tiles_around('boundaries', self.rect):
@@ -170,10 +182,10 @@ class Boss(Entity):
             if not self.death_timer:
                 self.dead = True
 
-    def draw_health_bar(self, surface, scroll):
-        pygame.draw.rect(surface, 'red', (self.rect.centerx - 10 - scroll[0], self.rect.y - scroll[1] - 10, 20, 3))
+    def draw_health_bar(self):
+        self.level.draw_rect(Z_ENTITIES, 'red', (self.rect.centerx - 10, self.rect.y - 10, 20, 3))
         scale = self.init_hp / 20
-        pygame.draw.rect(surface, 'green', (self.rect.centerx - 10 - scroll[0], self.rect.y - scroll[1] - 10, self.hp / scale, 3))
+        self.level.draw_rect(Z_ENTITIES, 'green', (self.rect.centerx - 10, self.rect.y - 10, self.hp / scale, 3))
 
     def update(self):
         if not self.level.camera.on_screen(self, 128):
@@ -183,14 +195,18 @@ class Boss(Entity):
         ramps = self.level.tilemap.get_tiles_around('ramps', self.rect)
         player = self.level.player
 
-        self.reset()
         self.apply_gravity()
-        self.update_vision()
-        self.guard(player)
-        if self.player_spotted:
-            self.choose_attack(player)
-            if not self.health_depleted():
-                self.handle_attacks(player)
+
+        # Decisions run at the AI tick rate, everything else runs every frame
+        if self.ai_ticker.tick(self.level.game.delta, self.engaged()):
+            self.reset()
+            self.update_vision()
+            self.guard(player)
+            if self.player_spotted:
+                self.choose_attack(player)
+                if not self.health_depleted():
+                    self.handle_attacks(player)
+
         self.update_health()
         self.on_death()
 
@@ -204,6 +220,8 @@ class Boss(Entity):
 
 
 class SportsMan(Boss):
+    SOUNDS = ('punch 2', 'punch 3', 'human 5')
+
     def __init__(self, level, position):
         super().__init__(level, '1 sportsman', (25, 44), position, 1.8, 800, (-14, -28), (72, 72))
 
@@ -226,7 +244,7 @@ class SportsMan(Boss):
 
         self.attack = {
             'direction': 1,
-            'timer': Timer(1600),
+            'timer': Timer(1600, self.level.clock),
         }
         self.selected_attack = 4
         self.ball_image = load_image('assets/sprites/bosses/1 sportsman/ball.png')
@@ -360,6 +378,8 @@ class SportsMan(Boss):
 
 
 class Tank(Boss):
+    SOUNDS = ('laser shot', 'thrust up', 'smash down', 'explosion 1', 'robot 3')
+
     def __init__(self, level, position):
         super().__init__(level, '2 tank', (63, 52), position, 0.9, 3000, (-4, -20), (72, 72))
 
@@ -382,7 +402,7 @@ class Tank(Boss):
 
         self.attack = {
             'direction': 1,
-            'timer': Timer(1600),
+            'timer': Timer(1600, self.level.clock),
             'velocity': 0,
             'frame': 0
         }
@@ -580,6 +600,8 @@ class Tank(Boss):
 
 
 class Mech(Boss):
+    SOUNDS = ('laser shot 2', 'metal hit 2', 'metal hit 4', 'robot 5')
+
     def __init__(self, level, position):
         super().__init__(level, '3 mech', (31, 49), position, 1.6, 2000, (-12, -47), (96, 96))
 
@@ -743,6 +765,8 @@ class Mech(Boss):
 
 
 class Vampire(Boss):
+    SOUNDS = ('dash 2', 'human 4') + Demoness.SOUNDS
+
     def __init__(self, level, position):
         super().__init__(level, '4 vampire', (17, 41), position, 1.5, 3000, (-14, -55), (96, 96))
 
@@ -766,7 +790,7 @@ class Vampire(Boss):
         # AI extras
         self.selected_attack = 1
         self.attack = {
-            'timer': Timer(1500),
+            'timer': Timer(1500, self.level.clock),
             'direction': 1,
             'count': 0
         }
@@ -781,19 +805,15 @@ class Vampire(Boss):
         position = self.image_position()
 
         # Display image
-        self.level.canvases[5].blit(self.display_image,
-                                    (position[0] - self.level.camera.x, position[1] - self.level.camera.y))
+        self.level.draw(Z_ENTITIES, self.display_image, position)
 
         # Health bar
-        self.draw_health_bar(self.level.canvases[5], self.level.camera)
+        self.draw_health_bar()
 
         # Summon effect
         if self.summon and not self.health_depleted():
             self.summon_effect.update(self.level.game.delta)
-            self.level.canvases[5].blit(
-                self.summon_effect.get_image(),
-                (self.summon_position[0] - self.level.camera.x, self.summon_position[1] - self.level.camera.y)
-            )
+            self.level.draw(Z_ENTITIES, self.summon_effect.get_image(), self.summon_position)
 
     def update_vision(self):
         self.visions = {
@@ -828,7 +848,7 @@ class Vampire(Boss):
             if self.visions['attack1'].colliderect(player):
                 self.actions['attack1'] = True
                 self.attack['direction'] = self.direction
-                self.attack['timer'] = Timer(random.randint(1000, 2000))
+                self.attack['timer'] = Timer(random.randint(1000, 2000), self.level.clock)
                 self.attack['timer'].activate()
         if self.selected_attack == 2:
             if self.visions['attack2'].colliderect(player):
@@ -955,6 +975,8 @@ class Vampire(Boss):
 
 
 class TheScientist(Boss):
+    SOUNDS = ('laser shot', 'flapping wings', 'human 4')
+
     def __init__(self, level, position):
         super().__init__(level, '5 the scientist', (21, 41), position, 1.5, 2000, (-14, -55), (96, 96))
 
@@ -979,7 +1001,7 @@ class TheScientist(Boss):
 
         self.attack = {
             'direction': 1,
-            'timer': Timer(1600),
+            'timer': Timer(1600, self.level.clock),
             'end position': position,
             'frame': 0,
             'counter': 0,
@@ -5,7 +5,10 @@ from scripts.utils import Timer
 
 
 class Camera:
-    def __init__(self, position=(0, 0), bounds=(0, -1_000_000, 1_000_000, 1_000_000)):
+    __slots__ = ('x', 'y', 'right', 'bottom', 'bounds', 'precise_x', 'precise_y', 'shake', 'shake_duration',
+                 'shake_strength')
+
+    def __init__(self, clock, position=(0, 0), bounds=(0, -1_000_000, 1_000_000, 1_000_000)):
         self.x, self.y = position
         self.right = self.x + SCREEN_SIZE[1]
         self.bottom = self.y + SCREEN_SIZE[1]
@@ -19,7 +22,7 @@ class Camera:
         self.precise_x, self.precise_y = position
 
         self.shake = False
-        self.shake_duration = Timer(0)
+        self.shake_duration = Timer(0, clock)
         self.shake_strength = 0
 
     def scroll(self, entity, smoothing=2):
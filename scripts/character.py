@@ -7,6 +7,7 @@ from scripts.entity import Entity
 from scripts.globals import FPS
 from scripts.gun import Gun
 from scripts.projectile import Electric
+from scripts.render import Z_ENTITIES
 from scripts.utils import Animation, load_images_folder, Timer
 
 DOUBLE_STATES = {'jump', 'run', 'idle', 'crouch', 'walk'}
@@ -14,6 +15,15 @@ EMOTES = ('angry', 'happy', 'talk', 'use', 'watch')
 
 
 class Character(Entity):
+    # Guns the player starts with, respawns with, and respawns with in a boss fight
+    START_GUNS = ('02', '08')
+    RESPAWN_GUNS = ('02', '15')
+    BOSS_RESPAWN_GUNS = ('09', '13')
+
+    # Every sound effect the player can make, decoded before the level starts. Guns play the sound named after them
+    SOUNDS = (('player death', 'clip empty', 'explosion 1', 'electroshock') +
+              START_GUNS + RESPAWN_GUNS + BOSS_RESPAWN_GUNS)
+
     def __init__(self, level, character, size, position, speed, hp, image_offset):
         super().__init__(level, size, position, speed, hp)
         self.actions = {
@@ -68,11 +78,12 @@ class Character(Entity):
             1: load_images_folder(f'assets/sprites/weapons/hands/{character}/1'),
             2: load_images_folder(f'assets/sprites/weapons/hands/{character}/2'),
         }
-        self.hand_image = self.hand_images[1][2]
+        # A copy, since getting hurt tints it and the loaded images are shared through the cache
+        self.hand_image = self.hand_images[1][2].copy()
         self.hand_index = 2
 
         # Guns
-        self.guns = [Gun(self.level, '02'), Gun(self.level, '08')]
+        self.guns = [Gun(self.level, name) for name in self.START_GUNS]
         self.guns_index = 0
         self.equipped_gun = self.guns[self.guns_index]
         self.hand_type = self.equipped_gun.type
@@ -81,7 +92,7 @@ class Character(Entity):
         self.offsets = pickle.loads(open(f'data/hand offsets/{character}', 'rb').read())
 
         # Lives and health
-        self.death_timer = Timer(3000)
+        self.death_timer = Timer(3000, self.level.clock)
         self.lives = 2
         self.respawn_point = list(self.position)
         self.dead = False
@@ -155,18 +166,16 @@ class Character(Entity):
 
         # Type 1 hand
         if self.hand_type == 1 and self.current_action in DOUBLE_STATES:
-            self.equipped_gun.draw(self.level.canvases[5], self.level.camera)
-            self.level.canvases[5].blit(self.hand_image,
-                                     (hand_pos[0] - self.level.camera[0], hand_pos[1] - self.level.camera[1]))
+            self.equipped_gun.draw()
+            self.level.draw(Z_ENTITIES, self.hand_image, hand_pos)
 
         # Character image
-        self.level.canvases[5].blit(self.display_image, (position[0] - self.level.camera[0], position[1] - self.level.camera[1]))
+        self.level.draw(Z_ENTITIES, self.display_image, position)
 
         # Type 2 hand
         if self.hand_type == 2 and self.current_action in DOUBLE_STATES:
-            self.equipped_gun.draw(self.level.canvases[5], self.level.camera)
-            self.level.canvases[5].blit(self.hand_image,
-                                     (hand_pos[0] - self.level.camera[0], hand_pos[1] - self.level.camera[1]))
+            self.equipped_gun.draw()
+            self.level.draw(Z_ENTITIES, self.hand_image, hand_pos)
 
     def image_position(self):
         position = list(self.position)
@@ -493,11 +502,11 @@ class Character(Entity):
 
         # Restore some guns
         if self.level.boss_fight:
-            self.guns = [Gun(self.level, '09'), Gun(self.level, '13')]
+            self.guns = [Gun(self.level, name) for name in self.BOSS_RESPAWN_GUNS]
             self.guns[0].ammo *= 5
             self.guns[1].ammo *= 5
         else:
-            self.guns = [Gun(self.level, '02'), Gun(self.level, '15')]
+            self.guns = [Gun(self.level, name) for name in self.RESPAWN_GUNS]
         self.equipped_gun = self.guns[0]
         self.hand_type = self.equipped_gun.type
 
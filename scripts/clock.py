@@ -0,0 +1,93 @@
+# Game time, in milliseconds. Every level has its own clock that only moves when the level is updated, so pausing
+# stops every timer in it, headless runs go as fast as they can be stepped, and levels running side by side don't
+# touch each other's timers. The game has one more for timers outside of levels, it moves every frame.
+#
+# Timers don't poll their clock, they are put into its timer wheel when they start and the wheel flags them as
+# finished when the clock gets there.
+
+# Every tick of the wheel is a millisecond. Four levels of 256 slots reach about 49 days ahead
+WHEEL_BITS = 8
+WHEEL_LEVELS = 4
+
+
+class TimerWheel:
+    # Hierarchical timer wheel. The first level has one slot per tick, each level above has one slot for a whole
+    # turn of the level below. When a lower level comes round to the start of a turn, the slot above is emptied
+    # into it, so everything is only moved a few times however far ahead it was scheduled
+    def __init__(self, bits=WHEEL_BITS, levels=WHEEL_LEVELS):
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.slots = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+
+        # The next tick to fire
+        self.tick = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, tick, item):
+        # Ticks that are already past fire with the next one
+        tick = max(tick, self.tick)
+        ahead = tick - self.tick
+        for level, slots in enumerate(self.slots):
+            if ahead >> (self.bits * (level + 1)) == 0 or level == len(self.slots) - 1:
+                slots[(tick >> (self.bits * level)) & self.mask].append((tick, item))
+                break
+        self.count += 1
+
+    def advance(self, tick):
+        # Everything due up to and including tick, in the order it was due
+        fired = []
+        while self.tick <= tick:
+            if self.count == 0:
+                self.tick = tick + 1
+                break
+
+            now = self.tick
+            if now & self.mask == 0:
+                self.cascade(now)
+
+            slot = self.slots[0][now & self.mask]
+            if slot:
+                self.count -= len(slot)
+                fired += [item for due, item in slot]
+                slot.clear()
+            self.tick += 1
+        return fired
+
+    def cascade(self, now):
+        for level in range(1, len(self.slots)):
+            index = (now >> (self.bits * level)) & self.mask
+            slot = self.slots[level][index]
+            self.slots[level][index] = []
+            self.count -= len(slot)
+            for due, item in slot:
+                self.schedule(due, item)
+            # Only go up a level when this one is starting a turn too
+            if index:
+                break
+
+
+class GameClock:
+    def __init__(self):
+        self.time = 0
+        self.scale = 1
+        self.paused = False
+        self.wheel = TimerWheel()
+
+    def advance(self, delta):
+        # delta is in seconds, like the game's. Gives back how much game time passed, for the level to move by
+        if self.paused:
+            return 0
+        delta *= self.scale
+        self.time += delta * 1000
+
+        for timer, end_time in self.wheel.advance(int(self.time)):
+            timer.expire(end_time)
+        return delta
+
+    def schedule(self, timer):
+        # Timers finish once the clock is past their end time
+        self.wheel.schedule(int(timer.end_time) + 1, (timer, timer.end_time))
+
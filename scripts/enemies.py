@@ -3,12 +3,16 @@ import pygame
 
 from scripts.audio import DEATH_SFX, ATTACK_SFX, MISC_SFX
 from scripts.entity import Entity
-from scripts.globals import FPS
+from scripts.globals import FPS, AI_TICK_RATE
 from scripts.projectile import ElectricBolt, Electric
-from scripts.utils import Animation, Timer, load_image
+from scripts.render import Z_ENTITIES
+from scripts.utils import Animation, Timer, TickScheduler, load_image
 
 
 class Enemy(Entity):
+    # Every sound effect it can make, decoded before the level starts
+    SOUNDS = ()
+
     def __init__(self, level, name, size, position, speed, hp, image_offset):
         super().__init__(level, size, position, speed, hp, level.enemies)
 
@@ -26,7 +30,8 @@ class Enemy(Entity):
         self.image_offset = image_offset
 
         # AI
-        self.stop_timer = Timer(random.randint(2000, 3500))
+        self.ai_ticker = TickScheduler(AI_TICK_RATE, TickScheduler.phase_at(position))
+        self.stop_timer = Timer(random.randint(2000, 3500), self.level.clock)
         self.stopped = False
         self.player_spotted = False
         self.vision = pygame.Rect(self.rect.x, self.rect.y, 120, 20)
@@ -42,7 +47,7 @@ class Enemy(Entity):
         self.hit_player = False
 
         # Health
-        self.death_timer = Timer(5000)
+        self.death_timer = Timer(5000, self.level.clock)
         self.attack_sound = 'punch 1'
         self.take_damage_sound = 'human 1'
         self.death_sound = str(random.choice(['human 1', 'human 2', 'human 3']))
@@ -55,7 +60,7 @@ class Enemy(Entity):
 
     def draw(self):
         position = self.image_position()
-        self.level.canvases[5].blit(self.display_image, (position[0] - self.level.camera.x, position[1] - self.level.camera.y))
+        self.level.draw(Z_ENTITIES, self.display_image, position)
 
     def animate(self):
         # Flip
@@ -114,7 +119,7 @@ class Enemy(Entity):
         if self.distance_walked < self.distance and not self.is_on_edge:
             self.actions['walk'] = True
             self.velocity[0] = self.speed * self.direction
-            self.distance_walked += self.speed * self.level.game.delta * FPS
+            self.distance_walked += self.speed * self.ai_ticker.delta * FPS
         else:
             self.actions['walk'] = False
             self.velocity[0] = 0
@@ -165,6 +170,10 @@ class Enemy(Entity):
     def attack(self, player):
         pass
 
+    def engaged(self):
+        # Attacks react to animation frames, so they are followed every frame until they finish
+        return self.actions['attack']
+
     def update_health(self):
         for bullet in self.level.player_bullets:
             if bullet.rect.colliderect(self.rect) and not self.health_depleted():
@@ -214,17 +223,20 @@ class Enemy(Entity):
         ramps = self.level.tilemap.get_tiles_around('ramps', self.rect)
         player = self.level.player
 
-        self.reset()
-        self.check_on_edge(tiles, ramps)
         self.apply_gravity()
 
-        if not self.player_spotted:
-            self.roam()
+        # Decisions run at the AI tick rate, everything else runs every frame
+        if self.ai_ticker.tick(self.level.game.delta, self.engaged()):
+            self.reset()
+            self.check_on_edge(tiles, ramps)
 
-        self.guard(player)
-        if self.offscreen():
-            self.player_spotted = False
-        self.attack(player)
+            if not self.player_spotted:
+                self.roam()
+
+            self.guard(player)
+            if self.offscreen():
+                self.player_spotted = False
+            self.attack(player)
 
         self.update_health()
         self.on_death()
@@ -238,6 +250,8 @@ class Enemy(Entity):
 
 
 class Batsman(Enemy):
+    SOUNDS = ('metal hit 1', 'metal hit 2', 'human 1', 'human 2', 'human 3')
+
     def __init__(self, level, pos):
         super().__init__(level, '01 batsman', (16, 32), pos, 1.5, 30, (-4, -16))
         self.image_offset = (-4, -16)
@@ -279,6 +293,8 @@ class Batsman(Enemy):
 
 
 class Pistolerro(Enemy):
+    SOUNDS = ('gun shot', 'human 1', 'human 2', 'human 3')
+
     def __init__(self, level, pos):
         super().__init__(level, '02 pistolerro', (17, 40), pos, 1.5, 30, (-6, -8))
 
@@ -335,6 +351,8 @@ class Pistolerro(Enemy):
 
 
 class GroundDrone(Enemy):
+    SOUNDS = ('robot 4',)
+
     def __init__(self, level, pos):
         super().__init__(level, '03 drone', (20, 24), pos, 1.5, 40, (-6, -24))
 
@@ -366,6 +384,8 @@ class GroundDrone(Enemy):
 
 
 class CyberHound(Enemy):
+    SOUNDS = ('bite', 'robot 2')
+
     def __init__(self, level, pos):
         super().__init__(level, '04 cyber hound', (37, 21), pos, 2.5, 70, (-5, -27))
 
@@ -415,6 +435,8 @@ class CyberHound(Enemy):
 
 
 class DockWorker(Enemy):
+    SOUNDS = ('punch 1', 'human 1', 'human 2', 'human 3')
+
     def __init__(self, level, pos):
         super().__init__(level, '05 dock worker',(17, 35), pos, 1.5, 20, (-15, -13))
 
@@ -460,6 +482,8 @@ class DockWorker(Enemy):
 
 
 class ExplosiveBot(Enemy):
+    SOUNDS = ('warning beep', 'explosion 1', 'robot 3')
+
     def __init__(self, level, pos):
         super().__init__(level, '06 explosive bot', (34, 28), pos, 1.5, 70, (-6, -20))
         self.warnings = 0
@@ -471,13 +495,9 @@ class ExplosiveBot(Enemy):
     def draw(self):
         position = self.image_position()
         if self.warnings < 2:
-            self.level.canvases[5].blit(self.display_image,
-                                        (position[0] - self.level.camera.x, position[1] - self.level.camera.y))
+            self.level.draw(Z_ENTITIES, self.display_image, position)
         else:
-            self.level.canvases[5].blit(
-                self.explosion.get_image(),
-                (self.attack_rect.centerx - self.level.camera.x - 64, self.attack_rect.y - self.level.camera.y)
-            )
+            self.level.draw(Z_ENTITIES, self.explosion.get_image(), (self.attack_rect.centerx - 64, self.attack_rect.y))
 
     def attack(self, player):
         if self.health_depleted():
@@ -522,6 +542,10 @@ class ExplosiveBot(Enemy):
         if self.explosion.finished:
             self.kill()
 
+    def engaged(self):
+        # The explosion plays out inside attack()
+        return self.actions['attack'] or self.warnings >= 2
+
     def update_health(self):
         for bullet in self.level.player_bullets:
             if bullet.rect.colliderect(self.rect) and not self.health_depleted():
@@ -542,6 +566,8 @@ class ExplosiveBot(Enemy):
 
 
 class Zapper(Enemy):
+    SOUNDS = ('electric shock', 'unique')
+
     def __init__(self, level, pos):
         super().__init__(level, '07 zapper',(19, 35), pos, 1.5, 50, (-13, -13))
 
@@ -558,7 +584,7 @@ class Zapper(Enemy):
         self.animations['resurrect'].images = list(reversed(self.animations['death'].images))
 
         self.resurrect = False
-        self.death_timer = Timer(1300)
+        self.death_timer = Timer(1300, self.level.clock)
 
         self.bolt_images = {
             1: load_image('assets/sprites/enemies/07 zapper/projectile1.png'),
@@ -622,6 +648,8 @@ class Zapper(Enemy):
 
 
 class Demoness(Enemy):
+    SOUNDS = ('punch 3', 'demoness 1', 'demoness 2')
+
     def __init__(self, level, pos):
         super().__init__(level, '08 demoness', (18, 35), pos, 2.0, 100, (-7, -13))
 
@@ -657,6 +685,8 @@ class Demoness(Enemy):
 
 
 class Zombie(Enemy):
+    SOUNDS = ('punch 3', 'zombie 1', 'zombie 2')
+
     def __init__(self, level, pos):
         super().__init__(level, '09 zombie', (17, 35), pos, 0.8, 200, (-3, -13))
 
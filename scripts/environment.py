@@ -0,0 +1,156 @@
+import random
+from numbers import Integral
+
+from scripts.headless import ACTION_KEYS, HeadlessLevel
+from scripts.level_data import LEVEL_FOLDER
+
+# Actions can also be given as a bit mask over this order, for agents that work with numbers
+ACTIONS = tuple(ACTION_KEYS)
+
+# Reward for each part of a step
+REWARD_PROGRESS = 1 / 32
+REWARD_KILL = 1
+REWARD_BOSS_DAMAGE = 0.1
+REWARD_DAMAGE_TAKEN = -0.1
+REWARD_DEATH = -10
+REWARD_COMPLETED = 100
+
+
+def action_names(action):
+    # Integral takes numpy integers too, which is what array based agents pass
+    if isinstance(action, Integral):
+        return {name for i, name in enumerate(ACTIONS) if action >> i & 1}
+    return set(action)
+
+
+class LevelEnv:
+    # A level as an environment for bots: reset() starts a run, step() plays one frame of held actions.
+    # An action going down counts as a key press on that frame, like it would from a keyboard.
+    # With an encoder (scripts/observation.py) observations are its arrays, overwritten every step
+    def __init__(self, max_frames=60 * 60 * 8, encoder=None):
+        self.encoder = encoder
+        self.headless = HeadlessLevel(draw=encoder is not None and encoder.screen is not None)
+        self.max_frames = max_frames
+
+        # Every env keeps its own random state, so runs repeat with the same seed however they are interleaved
+        self.random_state = None
+        self.held = set()
+
+        self.progress = 0
+        self.enemies = 0
+        self.boss_hp = 0
+        self.damage_taken = 0
+        self.deaths = 0
+
+    def reset(self, level, character, seed=None, folder=LEVEL_FOLDER, save_state=None):
+        state = random.getstate()
+        self.headless.reset(level, character, seed, folder, save_state)
+        self.random_state = random.getstate()
+        random.setstate(state)
+
+        self.held = set()
+        self.progress = self.headless.level.player.rect.x
+        self.enemies = len(self.headless.level.enemies)
+        self.boss_hp = self.boss().hp if self.boss() is not None else 0
+        self.damage_taken = 0
+        self.deaths = 0
+        return self.observe()
+
+    def boss(self):
+        boss = self.headless.level.boss
+        return boss if hasattr(boss, 'hp') else None
+
+    def step(self, action):
+        held = action_names(action)
+        pressed = held - self.held
+        self.held = held
+
+        state = random.getstate()
+        random.setstate(self.random_state)
+        self.headless.step(held, pressed)
+        self.random_state = random.getstate()
+        random.setstate(state)
+
+        reward = self.reward()
+        truncated = self.headless.frames >= self.max_frames
+        done = self.headless.done() or truncated
+        info = {'completed': self.headless.completed(), 'truncated': truncated and not self.headless.done(),
+                'frames': self.headless.frames}
+        return self.observe(), reward, done, info
+
+    def reward(self):
+        level = self.headless.level
+        reward = 0
+
+        # Moving further right than ever before
+        x = level.player.rect.x
+        if x > self.progress:
+            reward += (x - self.progress) * REWARD_PROGRESS
+            self.progress = x
+
+        enemies = len(level.enemies)
+        reward += max(self.enemies - enemies, 0) * REWARD_KILL
+        self.enemies = enemies
+
+        boss = self.boss()
+        if boss is not None:
+            reward += max(self.boss_hp - boss.hp, 0) * REWARD_BOSS_DAMAGE
+            self.boss_hp = boss.hp
+
+        reward += (self.headless.damage_taken - self.damage_taken) * REWARD_DAMAGE_TAKEN
+        reward += (self.headless.deaths - self.deaths) * REWARD_DEATH
+        self.damage_taken = self.headless.damage_taken
+        self.deaths = self.headless.deaths
+
+        if self.headless.completed():
+            reward += REWARD_COMPLETED
+        return reward
+
+    def observe(self):
+        level = self.headless.level
+        if self.encoder is not None:
+            return self.encoder.encode(level)
+
+        player = level.player
+        boss = self.boss()
+        return (
+            player.position.x, player.position.y, player.velocity.x, player.velocity.y,
+            player.hp, player.lives, player.equipped_gun.ammo, len(level.enemies),
+            boss.hp if boss is not None else 0, level.level_timer.get_time_left() / 1000,
+        )
+
+
+class VectorLevelEnv:
+    # Several independent levels stepped together. Nothing is drawn, so they all share one hidden display
+    def __init__(self, count, max_frames=60 * 60 * 8, make_encoder=None):
+        self.envs = [LevelEnv(max_frames, make_encoder() if make_encoder is not None else None)
+                     for _ in range(count)]
+        self.runs = [None] * count
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self, levels, characters, seeds, folder=LEVEL_FOLDER, save_state=None):
+        # One level, character and seed per env. Finished envs start the same level over with a new seed,
+        # or go back to the save state if there is one
+        self.runs = [[level, character, seed, folder, save_state]
+                     for level, character, seed in zip(levels, characters, seeds)]
+        return [env.reset(*run) for env, run in zip(self.envs, self.runs)]
+
+    def step(self, actions):
+        observations, rewards, dones, infos = [], [], [], []
+        for env, run, action in zip(self.envs, self.runs, actions):
+            observation, reward, done, info = env.step(action)
+            if done:
+                # Encoder arrays get reused by the reset, so the last observation is kept as a copy
+                if isinstance(observation, dict):
+                    observation = {key: array.copy() for key, array in observation.items()}
+                info['final observation'] = observation
+                if run[2] is not None:
+                    run[2] += len(self.envs)
+                observation = env.reset(*run)
+            observations.append(observation)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+        return observations, rewards, dones, infos
@@ -3,6 +3,7 @@ GRAVITY = .155
 FPS = 60
 SCREEN_SIZE = 576, 320
 TERMINAL_VELOCITY = 8
+AI_TICK_RATE = 15
 
 SPECS = {
     # Hand direction
@@ -36,6 +37,11 @@ DIRECTION_TO_INDEX = {
     (0, -1): 4
 }
 
+ENEMY_NAMES = ('01 batsman', '02 pistolerro', '03 drone', '04 cyber hound', '05 dock worker', '06 explosive bot',
+               '07 zapper', '08 demoness', '09 zombie')
+BOSS_NAMES = ('1 sportsman', '2 tank', '3 mech', '4 vampire', '5 the scientist')
+CHARACTER_NAMES = ('biker', 'punk', 'cyborg')
+
 GUN_NAMES = ('01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12', '13', '14', '15')
 EFFECTS = ('01', '02', '03', '04', '05', '06', '07', '08', '09', '10')
 GUNS = {
@@ -8,6 +8,7 @@ import pickle
 from scripts.audio import GUN_SHOT_SFX
 from scripts.globals import FPS, GUNS, EFFECTS, SPECS, INDEX_TO_DIRECTION
 from scripts.projectile import Normal, FMJ, Explosive, Electric
+from scripts.render import Z_ENTITIES, Z_TILES
 from scripts.utils import load_image, Timer, Animation
 
 BULLETS = {
@@ -17,8 +18,14 @@ BULLETS = {
     'electric': Electric
 }
 
-GUN_OFFSETS = pickle.loads(open('data/guns/offsets', 'rb').read())
-GUN_ATTRIBUTES = pickle.loads(open('data/guns/attributes', 'rb').read())
+# Gun data files, loaded the first time a gun is made
+GUN_DATA = {}
+
+
+def load_gun_data(name):
+    if name not in GUN_DATA:
+        GUN_DATA[name] = pickle.loads(open(f'data/guns/{name}', 'rb').read())
+    return GUN_DATA[name]
 
 
 class Gun:
@@ -27,13 +34,14 @@ class Gun:
         self.level = level
 
         # Gun attributes
+        attributes = load_gun_data('attributes')
         self.name = name
         self.type = GUNS[name]['type']
-        self.damage = GUN_ATTRIBUTES[name]['damage']
-        self.fire_rate = Timer(1000 - GUN_ATTRIBUTES[name]['fire rate'])
-        self.mag_size = GUN_ATTRIBUTES[name]['mag size']
-        self.ammo = GUN_ATTRIBUTES[name]['mag size']
-        self.bullet_speed = GUN_ATTRIBUTES[name]['bullet speed']
+        self.damage = attributes[name]['damage']
+        self.fire_rate = Timer(1000 - attributes[name]['fire rate'], self.level.clock)
+        self.mag_size = attributes[name]['mag size']
+        self.ammo = attributes[name]['mag size']
+        self.bullet_speed = attributes[name]['bullet speed']
         self.bullet_type = GUNS[name]['bullet type']
         self.automatic = GUNS[name]['auto']
 
@@ -49,10 +57,10 @@ class Gun:
         }
 
         self.effect_animations = {
-            1: Animation(f'assets/sprites/weapons/shoot effects/{EFFECTS[GUN_ATTRIBUTES[name]["effect"]]}_1.png',
-                         GUN_ATTRIBUTES[name]['effect fps'], False),
-            2: Animation(f'assets/sprites/weapons/shoot effects/{EFFECTS[GUN_ATTRIBUTES[name]["effect"]]}_2.png',
-                         GUN_ATTRIBUTES[name]['effect fps'], False),
+            1: Animation(f'assets/sprites/weapons/shoot effects/{EFFECTS[attributes[name]["effect"]]}_1.png',
+                         attributes[name]['effect fps'], False),
+            2: Animation(f'assets/sprites/weapons/shoot effects/{EFFECTS[attributes[name]["effect"]]}_2.png',
+                         attributes[name]['effect fps'], False),
         }
 
         self.image = self.gun_images[1]
@@ -69,17 +77,14 @@ class Gun:
         # Floating
         self.float_var = random.randint(0, 45)
 
-    def draw(self, surface, scroll):
-        surface.blit(self.image, (self.position[0] - scroll[0], self.position[1] - scroll[1]))
+    def draw(self):
+        self.level.draw(Z_ENTITIES, self.image, self.position)
         if self.play_effect:
-            surface.blit(self.effect_image,
-                                     (self.effect_pos[0] - scroll[0],
-                                      self.effect_pos[1] - scroll[1]))
+            self.level.draw(Z_ENTITIES, self.effect_image, self.effect_pos)
 
     def floating(self):
         self.float_var = (self.float_var + self.level.game.delta * FPS / 18) % 360
-        self.level.canvases[4].blit(self.gun_images[1],
-                     (self.position[0] - self.level.camera.x, self.position[1] + math.sin(self.float_var) * 5 - self.level.camera.y))
+        self.level.draw(Z_TILES, self.gun_images[1], (self.position[0], self.position[1] + math.sin(self.float_var) * 5))
 
     def update(self, delta, position, flip, direction, hand_index):
         # Get specs
@@ -107,7 +112,7 @@ class Gun:
         self.position = [position[0] - self.image.get_width() * flip, position[1]]
 
         # Update effect position
-        offset = GUN_OFFSETS['effect offsets'][self.name][hand_index]
+        offset = load_gun_data('offsets')['effect offsets'][self.name][hand_index]
         self.effect_pos = [position[0] + offset[0] * direction - 48 * flip, position[1] + offset[1]]
 
         # Update rect
@@ -117,7 +122,7 @@ class Gun:
 
     def bullet_position(self, direction, hand_index):
         position = list(self.position)
-        offset = GUN_OFFSETS['bullet offsets'][self.name][hand_index]
+        offset = load_gun_data('offsets')['bullet offsets'][self.name][hand_index]
 
         if direction < 0:
             position[0] += self.image.get_width() - self.bullet_image.get_width()
@@ -0,0 +1,165 @@
+import os
+import random
+from time import perf_counter
+
+# Levels run without a window or sound, for batch runs and bots. This has to happen before pygame starts
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from main import Game
+from scripts.globals import FPS
+from scripts.level_data import LEVEL_FOLDER, load_level
+from scripts.save_state import SaveState
+from scripts.utils import load_sprite_pack
+
+# Names for the keys the player reads, so inputs can be written down without pygame
+ACTION_KEYS = {
+    'left': pygame.K_a,
+    'right': pygame.K_d,
+    'up': pygame.K_w,
+    'down': pygame.K_s,
+    'jump': pygame.K_SPACE,
+    'crouch': pygame.K_c,
+    'shoot': pygame.K_j,
+    'aim': pygame.K_k,
+    'switch gun': pygame.K_i,
+    'interact': pygame.K_f,
+    'emote': pygame.K_e,
+    'rewind': pygame.K_F7,
+}
+
+CHARACTERS = {'biker': 1, 'punk': 2, 'cyborg': 3}
+
+
+def keys(actions):
+    return {ACTION_KEYS[action] for action in actions}
+
+
+class HeadlessLevel:
+    # One game without a display, reused for as many runs as needed. Every frame is a fixed step of game time
+    def __init__(self, delta=1 / FPS, draw=False, rewind=False):
+        self.game = Game(headless=True)
+        self.delta = delta
+
+        # Levels record themselves for rewinding only when asked to, it costs a few milliseconds a frame
+        self.game.rewind = rewind
+
+        # Headless levels skip drawing, unless something wants to look at the screen
+        self.game.headless = not draw
+        load_sprite_pack()
+
+        self.level = None
+        self.frames = 0
+        self.previous_hp = 0
+        self.damage_taken = 0
+        self.deaths = 0
+
+    def reset(self, level, character, seed=None, folder=LEVEL_FOLDER, save_state=None):
+        random.seed(seed)
+        self.game.character = character
+        self.game.key_presses = set()
+        self.game.held_key_presses = set()
+
+        state_manager = self.game.state_manager
+        state_manager.selected_level = level
+        state_manager.set_level(load_level(level, folder))
+        state_manager.change_state('level')
+
+        # No fade in
+        state_manager.phase = False
+        state_manager.alpha = 0
+
+        self.level = state_manager.level_scene
+        if save_state is not None:
+            # Runs from the same save state still play out differently for each seed
+            save_state.restore(self.level)
+            random.seed(seed)
+
+        self.frames = 0
+        self.previous_hp = self.level.player.hp
+        self.damage_taken = 0
+        self.deaths = 0
+        return self.level
+
+    def save(self):
+        return SaveState(self.level)
+
+    def restore(self, save_state):
+        save_state.restore(self.level)
+        self.previous_hp = self.level.player.hp
+
+    def step(self, held=(), pressed=()):
+        # held and pressed are action names. Pressed ones only count on this frame, like a key going down
+        self.game.held_key_presses = keys(held) | keys(pressed)
+        self.game.key_presses = keys(pressed)
+        self.game.delta = self.delta
+
+        player = self.level.player
+        was_alive = not player.health_depleted()
+        self.level.update()
+        self.frames += 1
+
+        # A respawn fills the health back up, that is not damage
+        if player.hp < self.previous_hp:
+            self.damage_taken += self.previous_hp - player.hp
+        if was_alive and player.health_depleted():
+            self.deaths += 1
+        self.previous_hp = player.hp
+
+    def completed(self):
+        return self.level.boss_fight and self.level.boss.dead
+
+    def failed(self):
+        return self.level.player.dead or not self.level.level_timer
+
+    def done(self):
+        return self.completed() or self.failed()
+
+
+def boss_fight_state(headless, level, character, seed=None, folder=LEVEL_FOLDER, max_frames=600):
+    # Drops the player just before the boss and waits for the fight to start, to benchmark or train on
+    # the fight without playing the whole level first
+    headless.reset(level, character, seed, folder)
+    boss, player = headless.level.boss, headless.level.player
+    if not hasattr(boss, 'rect'):
+        raise ValueError(f'Level {level} has no boss')
+
+    player.position.update(boss.position.x - 200, boss.position.y)
+    player.rect.topleft = player.position
+    while not headless.level.boss_fight and headless.frames < max_frames:
+        headless.step()
+    return headless.save()
+
+
+def run_episode(headless, level, character, seed, policy, max_frames, folder=LEVEL_FOLDER):
+    rng = random.Random(seed)
+    headless.reset(level, character, seed, folder)
+
+    frame_times = []
+    start = perf_counter()
+    while headless.frames < max_frames and not headless.done():
+        held, pressed = policy(headless.level, headless.frames, rng)
+        frame_start = perf_counter()
+        headless.step(held, pressed)
+        frame_times.append(perf_counter() - frame_start)
+
+    frame_times.sort()
+    return {
+        'level': level,
+        'character': character,
+        'seed': seed,
+        'completed': headless.completed(),
+        'failed': headless.failed(),
+        'frames': headless.frames,
+        'game time': headless.frames * headless.delta,
+        'wall time': perf_counter() - start,
+        'damage taken': headless.damage_taken,
+        'deaths': headless.deaths,
+        'frame ms': {
+            'mean': 1000 * sum(frame_times) / max(len(frame_times), 1),
+            'p95': 1000 * frame_times[int(len(frame_times) * 0.95)] if frame_times else 0,
+            'max': 1000 * frame_times[-1] if frame_times else 0,
+        },
+    }
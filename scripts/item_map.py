@@ -2,6 +2,7 @@ import pygame
 from scripts.globals import GUN_NAMES, SCREEN_SIZE
 from scripts.utils import Animation, load_image
 from scripts.gun import Gun
+from scripts.render import Z_OBJECTS
 
 
 class ItemMap:
@@ -29,17 +30,18 @@ class ItemMap:
                 gun.floating()
 
     def load(self, data):
-        self.chest_image = load_image(f'assets/sprites/chests/{data["tileset"]}.png')
+        self.chest_image = load_image(f'assets/sprites/chests/{data.tileset}.png')
 
-        for value in data['data']['guns'].values():
-            pos = value['pos'][0], value['pos'][1]
+        for pos, index in data.entities('guns'):
             size = (self.chest_image.get_height(), self.chest_image.get_height())
-            if data["tileset"] == 'green zone':
+            if data.tileset == 'green zone':
                 size = (32, 22)
-            self.chests.append(Chest(self.level, self.chest_image, size, GUN_NAMES[value['index']], pos))
+            self.chests.append(Chest(self.level, self.chest_image, size, GUN_NAMES[index], pos))
 
 
 class Chest:
+    __slots__ = ('level', 'animation', 'image', 'position', 'rect', 'opened', 'unlocked', 'gun_name')
+
     def __init__(self, level, image, size, gun_name, position):
         self.level = level
         self.animation = Animation(image, 5, False, size)
@@ -60,7 +62,7 @@ class Chest:
                 gun_list.append(Gun(self.level, self.gun_name, self.rect.topleft))
 
     def draw(self):
-        self.level.canvases[3].blit(self.image, (self.position[0] - self.level.camera[0], self.position[1] - self.level.camera[1]))
+        self.level.draw(Z_OBJECTS, self.image, self.position)
 
     def open(self):
         self.unlocked = True
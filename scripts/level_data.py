@@ -0,0 +1,227 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Levels are edited as JSON and played from a compiled binary, rebuilt whenever the JSON changes.
+# The compiled files live outside levels/, since the level editor numbers new levels by counting that folder.
+#
+# File layout:
+#   header   magic, version, length of the table of contents
+#   contents JSON: tileset, grid origin and size, texts, and where each grid and table starts
+#   grids    each tile layer either dense, one int16 per cell with -1 where it is empty, or sparse, int32
+#            (cell, index) rows for only the cells that have something. Whichever is smaller
+#   tables   int32 (x, y, index) rows for the things that get spawned
+LEVEL_FOLDER = 'levels'
+COMPILED_FOLDER = 'data/levels'
+
+MAGIC = b'CSLV'
+VERSION = 2
+HEADER = struct.Struct('<4sHI')
+
+TILE_SIZE = 32
+EMPTY = -1
+
+GRID_LAYERS = ('offgrid', 'tiles', 'ramps', 'ladders', 'objects', 'animated objects', 'checkpoints', 'boundaries')
+TABLE_LAYERS = ('enemies', 'bosses', 'guns', 'pickups')
+
+# Compiled levels stay mapped for the whole session, so restarting a level costs nothing
+LOADED_LEVELS = {}
+
+
+def json_path(number, folder=LEVEL_FOLDER):
+    return f'{folder}/level{number}.json'
+
+
+def compiled_path(number, folder=LEVEL_FOLDER):
+    # Levels from other folders, like generated ones, compile next to the shipped ones under their own folder
+    if folder == LEVEL_FOLDER:
+        return f'{COMPILED_FOLDER}/level{number}.lvl'
+    return f'{COMPILED_FOLDER}/{os.path.basename(os.path.normpath(folder))}/level{number}.lvl'
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def compile_level(path):
+    with open(path) as file:
+        data = json.loads(file.read())
+
+    cells = {}
+    for layer in GRID_LAYERS + TABLE_LAYERS:
+        cells[layer] = []
+        for value in data['data'].get(layer, {}).values():
+            x, y = value['pos'][0] // TILE_SIZE, value['pos'][1] // TILE_SIZE
+            cells[layer].append((x, y, value['index']))
+
+    grid_cells = [cell for layer in GRID_LAYERS for cell in cells[layer]]
+    if grid_cells:
+        origin = [min(cell[0] for cell in grid_cells), min(cell[1] for cell in grid_cells)]
+        width = max(cell[0] for cell in grid_cells) - origin[0] + 1
+        height = max(cell[1] for cell in grid_cells) - origin[1] + 1
+    else:
+        origin, width, height = [0, 0], 0, 0
+
+    blobs = []
+    offset = 0
+    contents = {
+        'tileset': data['tileset'],
+        'text': data.get('text', []),
+        'origin': origin,
+        'size': [width, height],
+        'source': source_stamp(path),
+        'byteorder': sys.byteorder,
+        'grids': {},
+        'tables': {},
+    }
+
+    for layer in GRID_LAYERS:
+        # Later cells win, like they do in the JSON
+        layer_cells = {(y - origin[1]) * width + (x - origin[0]): index for x, y, index in cells[layer]}
+        if len(layer_cells) * 8 < width * height * 2:
+            grid = array('i', [value for cell in sorted(layer_cells.items()) for value in cell])
+            contents['grids'][layer] = [offset, len(layer_cells)]
+        else:
+            grid = array('h', [EMPTY]) * (width * height)
+            for cell, index in layer_cells.items():
+                grid[cell] = index
+            contents['grids'][layer] = [offset, None]
+        blobs.append(grid.tobytes())
+        offset += len(blobs[-1])
+
+    for layer in TABLE_LAYERS:
+        table = array('i', [value for cell in cells[layer] for value in cell])
+        contents['tables'][layer] = [offset, len(cells[layer])]
+        blobs.append(table.tobytes())
+        offset += len(blobs[-1])
+
+    # Pad the contents so every grid and table starts 4-byte aligned
+    contents = json.dumps(contents).encode()
+    contents += b' ' * (-(HEADER.size + len(contents)) % 4)
+
+    return HEADER.pack(MAGIC, VERSION, len(contents)) + contents + b''.join(blobs)
+
+
+def build_level(number, folder=LEVEL_FOLDER):
+    compiled = compile_level(json_path(number, folder))
+
+    # Write to a temporary file first, so a half written level is never loaded
+    path = compiled_path(number, folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(compiled)
+    os.replace(temp_path, path)
+
+    return compiled
+
+
+def build_levels():
+    number = 1
+    while os.path.exists(json_path(number)):
+        size = len(build_level(number))
+        print(f'Compiled level {number}: {os.path.getsize(json_path(number))} -> {size} bytes')
+        number += 1
+
+
+def read_contents(buffer):
+    magic, version, length = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return json.loads(bytes(buffer[HEADER.size:HEADER.size + length]))
+
+
+def is_stale(number, folder=LEVEL_FOLDER):
+    try:
+        with open(compiled_path(number, folder), 'rb') as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return True
+            file.seek(0)
+            contents = read_contents(file.read(HEADER.size + HEADER.unpack(header)[2]))
+    except (FileNotFoundError, struct.error):
+        return True
+
+    if contents is None or contents['byteorder'] != sys.byteorder:
+        return True
+
+    # Without the JSON there is nothing to rebuild from
+    path = json_path(number, folder)
+    return os.path.exists(path) and contents['source'] != source_stamp(path)
+
+
+def load_level(number, folder=LEVEL_FOLDER):
+    key = folder, number
+    if key in LOADED_LEVELS and not LOADED_LEVELS[key].is_stale():
+        return LOADED_LEVELS[key]
+
+    if is_stale(number, folder):
+        try:
+            build_level(number, folder)
+        except OSError:
+            # Read only install: play from the compiled bytes without saving them
+            LOADED_LEVELS[key] = LevelData(number, compile_level(json_path(number, folder)), folder)
+            return LOADED_LEVELS[key]
+
+    with open(compiled_path(number, folder), 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    LOADED_LEVELS[key] = LevelData(number, buffer, folder)
+    return LOADED_LEVELS[key]
+
+
+class LevelData:
+    def __init__(self, number, buffer, folder=LEVEL_FOLDER):
+        self.number = number
+        self.folder = folder
+        self.buffer = buffer
+
+        contents = read_contents(buffer)
+        self.tileset = contents['tileset']
+        self.text = contents['text']
+        self.origin = contents['origin']
+        self.width, self.height = contents['size']
+        self.source = contents['source']
+
+        # Dense grids and the tables are views straight into the mapped file, nothing is copied. Sparse grids are
+        # filled in once here, they are only the layers with little in them
+        start = HEADER.size + HEADER.unpack_from(buffer)[2]
+        view = memoryview(buffer)
+        cells = self.width * self.height
+
+        self.grids = {}
+        for layer, (offset, count) in contents['grids'].items():
+            if count is None:
+                self.grids[layer] = view[start + offset:start + offset + cells * 2].cast('h')
+            else:
+                rows = view[start + offset:start + offset + count * 8].cast('i')
+                grid = array('h', [EMPTY]) * cells
+                for i in range(0, len(rows), 2):
+                    grid[rows[i]] = rows[i + 1]
+                self.grids[layer] = memoryview(grid)
+
+        self.tables = {}
+        for layer, (offset, count) in contents['tables'].items():
+            self.tables[layer] = view[start + offset:start + offset + count * 12].cast('i')
+
+    def get(self, layer, x, y):
+        x -= self.origin[0]
+        y -= self.origin[1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.grids[layer][y * self.width + x]
+        return EMPTY
+
+    def entities(self, layer):
+        # (pos, index) for everything placed on a table layer
+        table = self.tables[layer]
+        return [((table[i] * TILE_SIZE, table[i + 1] * TILE_SIZE), table[i + 2]) for i in range(0, len(table), 3)]
+
+    def is_stale(self):
+        try:
+            return self.source != source_stamp(json_path(self.number, self.folder))
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,46 @@
+from scripts.bosses import SportsMan, Tank, Mech, Vampire, TheScientist
+from scripts.character import Biker, Punk, Cyborg
+from scripts.enemies import (Batsman, Pistolerro, GroundDrone, CyberHound, DockWorker, ExplosiveBot,
+                             Zapper, Demoness, Zombie)
+from scripts.globals import GUN_NAMES
+
+# The classes behind the numbers in level data, and the character picked in the menu
+
+CHARACTER = {
+    1: Biker,
+    2: Punk,
+    3: Cyborg
+}
+
+
+ENEMIES = {
+    1: Batsman,
+    2: Pistolerro,
+    3: GroundDrone,
+    4: CyberHound,
+    5: DockWorker,
+    6: ExplosiveBot,
+    7: Zapper,
+    8: Demoness,
+    9: Zombie
+}
+
+
+BOSSES = {
+    1: SportsMan,
+    2: Tank,
+    3: Mech,
+    4: Vampire,
+    5: TheScientist
+}
+
+
+def level_sound_names(data, character):
+    # Sounds the player and everything placed in the level can make, and the guns in its chests
+    classes = [CHARACTER[character]]
+    classes += [ENEMIES[index + 1] for _, index in data.entities('enemies')]
+    classes += [BOSSES[index + 1] for _, index in data.entities('bosses')]
+
+    names = [name for cls in dict.fromkeys(classes) for name in cls.SOUNDS]
+    names += [GUN_NAMES[index] for _, index in data.entities('guns')]
+    return list(dict.fromkeys(names))
@@ -0,0 +1,155 @@
+import os
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Lock
+from time import perf_counter
+
+from scripts.audio import SFX
+from scripts.globals import ENEMY_NAMES, BOSS_NAMES, CHARACTER_NAMES, GUN_NAMES
+from scripts.level_data import load_level
+from scripts.level_entities import level_sound_names
+from scripts.utils import cache_image, is_image_cached, is_image_packed, image_source, folder_paths, load_image
+
+# One decoding thread per core, plus one for whoever is waiting on the disk
+LOADER_WORKERS = (os.cpu_count() or 1) + 1
+
+
+def level_asset_paths(data, character):
+    tileset = data.tileset
+    paths = []
+
+    # Tileset, background and chests
+    for folder in ('tiles', 'ramps', 'objects', 'background/day'):
+        paths += folder_paths(f'assets/sprites/tilesets/{tileset}/{folder}')
+    paths += folder_paths('assets/sprites/checkpoints')
+    paths.append(f'assets/sprites/chests/{tileset}.png')
+
+    # Enemies and bosses that are placed in the level. The vampire summons demonesses
+    enemies = {index for _, index in data.entities('enemies')}
+    bosses = {index for _, index in data.entities('bosses')}
+    if BOSS_NAMES.index('4 vampire') in bosses:
+        enemies.add(ENEMY_NAMES.index('08 demoness'))
+    for index in sorted(enemies):
+        paths += folder_paths(f'assets/sprites/enemies/{ENEMY_NAMES[index]}')
+    for index in sorted(bosses):
+        paths += folder_paths(f'assets/sprites/bosses/{BOSS_NAMES[index]}')
+
+    # The player, their hands and every gun they could end up holding
+    name = CHARACTER_NAMES[character - 1]
+    paths += folder_paths(f'assets/sprites/characters/{name}')
+    paths += folder_paths(f'assets/sprites/weapons/hands/{name}')
+    for gun in GUN_NAMES:
+        paths += [f'assets/sprites/weapons/guns/{gun}_{i}.png' for i in (1, 2)]
+        paths += [f'assets/sprites/weapons/bullets/{gun}_{i}.png' for i in (1, 2)]
+    paths += folder_paths('assets/sprites/weapons/shoot effects')
+    paths += folder_paths('assets/sprites/misc')
+
+    return paths
+
+
+class LevelPreloader:
+    def __init__(self, level, character, workers=LOADER_WORKERS):
+        self.level = level
+        self.character = character
+
+        # Progress. Every image is decoded then converted, every sound is only decoded,
+        # and every image the level uses is finished by load_image
+        self.steps = 0
+        self.decoded = 0
+        self.converted = 0
+        self.total_bytes = 0
+        self.lock = Lock()
+
+        # Decoding happens on a thread pool, since the decoders let go of the GIL while they work.
+        # Conversion to the display format stays on the main thread
+        self.decoded_images = Queue()
+        self.level_images = Queue()
+        # None until work has submitted every decoding job
+        self.jobs = None
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.future = self.executor.submit(self.work)
+
+    def work(self):
+        # Compiles the level first if its JSON changed
+        data = load_level(self.level)
+
+        # Images packed into an atlas come from the atlas file instead.
+        # Ones in the sprite pack are already decoded, so they are left for load_image
+        paths = list(dict.fromkeys(level_asset_paths(data, self.character)))
+        sources = dict.fromkeys(image_source(path) for path in paths)
+        images = [path for path in sources if not is_image_cached(path) and not is_image_packed(path)]
+
+        # Sound effects the level can play
+        sounds = [SFX[name] for name in level_sound_names(data, self.character) if SFX[name].sound is None]
+
+        self.steps = len(images) * 2 + len(sounds) + len(paths)
+        for path in paths:
+            self.level_images.put(path)
+        self.jobs = ([self.executor.submit(self.decode_image, path) for path in images] +
+                     [self.executor.submit(self.decode_sound, sound) for sound in sounds])
+
+        return data
+
+    def decode_image(self, path):
+        self.decoded_images.put((path, pygame.image.load(path)))
+        self.count_decoded(path)
+
+    def decode_sound(self, sound):
+        # A missing file is only an error once something tries to play it
+        try:
+            sound.get()
+        except FileNotFoundError:
+            pass
+        else:
+            self.count_decoded(sound.path)
+
+    def count_decoded(self, path):
+        size = os.path.getsize(path)
+        with self.lock:
+            self.decoded += 1
+            self.total_bytes += size
+
+    def update(self, budget=0.004):
+        # Convert a few decoded images every frame, so no single frame takes long
+        start = perf_counter()
+        while perf_counter() - start < budget:
+            try:
+                path, image = self.decoded_images.get_nowait()
+            except Empty:
+                break
+            cache_image(path, image)
+            self.converted += 1
+
+        # Then let load_image cut out and reduce the alpha of every image the level uses,
+        # once the files they come from are ready
+        while perf_counter() - start < budget and self.decoded_images.empty() and self.jobs is not None and all(
+                job.done() for job in self.jobs):
+            try:
+                load_image(self.level_images.get_nowait())
+            except Empty:
+                break
+            self.converted += 1
+
+    def get_progress(self):
+        if not self.future.done():
+            return 0
+        if self.steps == 0:
+            return 1
+        return min(1, (self.decoded + self.converted) / self.steps)
+
+    def get_total_bytes(self):
+        return self.total_bytes
+
+    def done(self):
+        # If work failed before submitting anything, get_data re-raises it
+        return (self.future.done() and all(job.done() for job in self.jobs or ()) and
+                self.decoded_images.empty() and self.level_images.empty())
+
+    def get_data(self):
+        # Re-raises anything that went wrong on the loading threads
+        data = self.future.result()
+        for job in self.jobs or ():
+            job.result()
+        self.executor.shutdown(wait=False)
+        return data
@@ -0,0 +1,137 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError('Observations for bots need numpy, pip install numpy. The game itself runs without it') from error
+
+from scripts.globals import SCREEN_SIZE
+from scripts.level_data import EMPTY
+from scripts.level_entities import ENEMIES, BOSSES
+
+# Observations for bots, built from the level state instead of rendered frames. Everything is written into
+# arrays made once, so an observation costs no allocations, just a few copies. This is the only part of the game
+# that needs numpy, and nothing imports it apart from bots that use an encoder.
+#
+#   grid         int16 (layers, height, width) tile window around the camera centre, index + 1 and 0 for empty
+#   player       float32 (PLAYER_FEATURES,)
+#   entities     float32 (max entities, ENTITY_FEATURES) enemies then the boss near the window, unused rows 0
+#   projectiles  float32 (max projectiles, PROJECTILE_FEATURES) player bullets then enemy projectiles
+#   screen       uint8 (height, width) greyscale screen, only when a screen size is given
+#
+# Positions are in tiles relative to the camera centre, velocities in pixels a frame.
+GRID_LAYERS = ('tiles', 'ramps', 'ladders', 'checkpoints')
+
+PLAYER_FEATURES = 8     # x, y, velocity x, velocity y, hp, lives, ammo, direction
+ENTITY_FEATURES = 7     # present, kind, x, y, velocity x, velocity y, hp
+PROJECTILE_FEATURES = 6     # present, owner (1 player, -1 enemy), x, y, velocity x, velocity y
+
+# How far past the edges of the grid window entities are still included, in tiles
+ENTITY_MARGIN = 4
+
+# Bosses come after the enemies
+ENTITY_KINDS = {cls: index for index, cls in ENEMIES.items()}
+ENTITY_KINDS.update({cls: len(ENEMIES) + index for index, cls in BOSSES.items()})
+
+
+class ObservationEncoder:
+    def __init__(self, size=(24, 14), max_entities=32, max_projectiles=64, screen_size=None):
+        self.size = size
+        self.grid = np.zeros((len(GRID_LAYERS), size[1], size[0]), np.int16)
+        self.player = np.zeros(PLAYER_FEATURES, np.float32)
+        self.entities = np.zeros((max_entities, ENTITY_FEATURES), np.float32)
+        self.projectiles = np.zeros((max_projectiles, PROJECTILE_FEATURES), np.float32)
+
+        # Scaled down then greyed, in surfaces made once
+        self.screen = None
+        if screen_size is not None:
+            self.screen = np.zeros((screen_size[1], screen_size[0]), np.uint8)
+            self.scaled = pygame.Surface(screen_size).convert()
+            self.grey = pygame.Surface(screen_size).convert()
+
+        # Numpy views of the compiled level grids, made once per level
+        self.data = None
+        self.grids = None
+
+    def observation(self):
+        observation = {'grid': self.grid, 'player': self.player, 'entities': self.entities,
+                       'projectiles': self.projectiles}
+        if self.screen is not None:
+            observation['screen'] = self.screen
+        return observation
+
+    def encode(self, level):
+        centre = (level.camera[0] + SCREEN_SIZE[0] / 2) / 32, (level.camera[1] + SCREEN_SIZE[1] / 2) / 32
+        self.encode_grid(level.tilemap.data, centre)
+        self.encode_player(level.player, centre)
+        self.encode_entities(level, centre)
+        self.encode_projectiles(level, centre)
+        if self.screen is not None:
+            self.encode_screen(level.screen)
+        return self.observation()
+
+    def encode_grid(self, data, centre):
+        if data is not self.data:
+            self.data = data
+            self.grids = [np.frombuffer(data.grids[layer], np.int16).reshape(data.height, data.width)
+                          for layer in GRID_LAYERS]
+
+        # The window in level cells, then the part of it that is inside the level grid
+        left = int(centre[0]) - self.size[0] // 2 - data.origin[0]
+        top = int(centre[1]) - self.size[1] // 2 - data.origin[1]
+        x1, y1 = max(left, 0), max(top, 0)
+        x2, y2 = min(left + self.size[0], data.width), min(top + self.size[1], data.height)
+
+        if x1 > left or y1 > top or x2 < left + self.size[0] or y2 < top + self.size[1]:
+            self.grid.fill(EMPTY + 1)
+        if x1 >= x2 or y1 >= y2:
+            return
+
+        for grid, out in zip(self.grids, self.grid):
+            np.add(grid[y1:y2, x1:x2], 1, out=out[y1 - top:y2 - top, x1 - left:x2 - left])
+
+    def encode_player(self, player, centre):
+        self.player[:] = (player.position.x / 32 - centre[0], player.position.y / 32 - centre[1],
+                          player.velocity.x, player.velocity.y, player.hp, player.lives,
+                          player.equipped_gun.ammo, player.direction)
+
+    def encode_entities(self, level, centre):
+        entities = self.entities
+        reach_x = self.size[0] / 2 + ENTITY_MARGIN
+        reach_y = self.size[1] / 2 + ENTITY_MARGIN
+
+        targets = list(level.enemies)
+        if hasattr(level.boss, 'hp') and not level.boss.dead:
+            targets.append(level.boss)
+
+        count = 0
+        for entity in targets:
+            x = entity.position.x / 32 - centre[0]
+            y = entity.position.y / 32 - centre[1]
+            if -reach_x < x < reach_x and -reach_y < y < reach_y:
+                entities[count] = (1, ENTITY_KINDS.get(type(entity), 0), x, y,
+                                   entity.velocity.x, entity.velocity.y, entity.hp)
+                count += 1
+                if count == len(entities):
+                    break
+        entities[count:] = 0
+
+    def encode_projectiles(self, level, centre):
+        projectiles = self.projectiles
+        count = 0
+        for owner, group in ((1, level.player_bullets), (-1, level.enemy_projectiles)):
+            for projectile in group:
+                if count == len(projectiles):
+                    break
+                projectiles[count] = (1, owner, projectile.position.x / 32 - centre[0],
+                                      projectile.position.y / 32 - centre[1],
+                                      projectile.velocity.x, projectile.velocity.y)
+                count += 1
+        projectiles[count:] = 0
+
+    def encode_screen(self, screen):
+        pygame.transform.scale(screen, self.scaled.get_size(), self.scaled)
+        pygame.transform.grayscale(self.scaled, self.grey)
+        pixels = pygame.surfarray.pixels_red(self.grey)
+        np.copyto(self.screen, pixels.T)
+        del pixels
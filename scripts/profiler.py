@@ -0,0 +1,107 @@
+import builtins
+import sys
+import pygame
+from time import perf_counter
+
+# Cold start to the first menu frame should stay under this many seconds
+STARTUP_BUDGET = 2.0
+
+
+class StartupProfiler:
+    def __init__(self, budget=STARTUP_BUDGET):
+        self.budget = budget
+        self.start_time = perf_counter()
+        self.end_time = None
+
+        # Modules: name -> [total time, self time]
+        self.modules = {}
+        self.import_stack = []
+
+        # Assets: path -> [kind, time, count]
+        self.assets = {}
+
+        self.originals = {}
+        self.install()
+
+    @classmethod
+    def from_args(cls, args):
+        # --startup-budget=SECONDS overrides the default budget
+        budget = STARTUP_BUDGET
+        for arg in args:
+            if arg.startswith('--startup-budget='):
+                budget = float(arg.split('=', 1)[1])
+        return cls(budget)
+
+    def install(self):
+        self.originals = {
+            'import': builtins.__import__,
+            'image': pygame.image.load,
+            'sound': pygame.mixer.Sound,
+            'font': pygame.font.Font,
+            'music': pygame.mixer.music.load,
+        }
+        builtins.__import__ = self.timed_import
+        pygame.image.load = self.timed_asset('image', self.originals['image'])
+        pygame.mixer.Sound = self.timed_asset('sound', self.originals['sound'])
+        pygame.font.Font = self.timed_asset('font', self.originals['font'])
+        pygame.mixer.music.load = self.timed_asset('music', self.originals['music'])
+
+    def uninstall(self):
+        builtins.__import__ = self.originals['import']
+        pygame.image.load = self.originals['image']
+        pygame.mixer.Sound = self.originals['sound']
+        pygame.font.Font = self.originals['font']
+        pygame.mixer.music.load = self.originals['music']
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Already imported modules cost nothing worth reporting
+        if level != 0 or name in sys.modules:
+            return self.originals['import'](name, globals, locals, fromlist, level)
+
+        self.import_stack.append(0)
+        start = perf_counter()
+        try:
+            return self.originals['import'](name, globals, locals, fromlist, level)
+        finally:
+            total = perf_counter() - start
+            children = self.import_stack.pop()
+            if self.import_stack:
+                self.import_stack[-1] += total
+            self.modules[name] = [total, total - children]
+
+    def timed_asset(self, kind, function):
+        def wrapper(path, *args, **kwargs):
+            start = perf_counter()
+            result = function(path, *args, **kwargs)
+            record = self.assets.setdefault(str(path), [kind, 0, 0])
+            record[1] += perf_counter() - start
+            record[2] += 1
+            return result
+        return wrapper
+
+    def finish(self):
+        if self.end_time is None:
+            self.end_time = perf_counter()
+            self.uninstall()
+
+    def report(self, limit=15):
+        self.finish()
+        total = self.end_time - self.start_time
+        asset_total = sum(record[1] for record in self.assets.values())
+
+        print(f'Startup to first menu frame: {total * 1000:.1f} ms (budget {self.budget * 1000:.0f} ms)')
+
+        print(f'\nSlowest modules (self time, total time), {len(self.modules)} imported')
+        modules = sorted(self.modules.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (module_total, module_self) in modules[:limit]:
+            print(f'  {module_self * 1000:8.1f} {module_total * 1000:8.1f}  {name}')
+
+        print(f'\nSlowest assets, {len(self.assets)} loaded in {asset_total * 1000:.1f} ms')
+        assets = sorted(self.assets.items(), key=lambda item: item[1][1], reverse=True)
+        for path, (kind, asset_time, count) in assets[:limit]:
+            print(f'  {asset_time * 1000:8.1f}  {kind:<6} x{count}  {path}')
+
+        if total > self.budget:
+            print('\nStartup is over budget')
+            return 1
+        return 0
@@ -2,14 +2,19 @@ import pygame
 
 from scripts.audio import MISC_SFX
 from scripts.globals import FPS, GRAVITY, TERMINAL_VELOCITY
-from scripts.utils import Animation, Timer, load_image
+from scripts.render import Z_OBJECTS
+from scripts.utils import Animation, Timer
 
-# Some preloaded images to be used in explosions
-EXPLOSION_IMAGE = load_image('assets/sprites/misc/explosion1.png')
-ELECTRIC_IMAGE = load_image('assets/sprites/misc/electric.png')
+# Images used in explosions. They are loaded the first time something explodes
+EXPLOSION_IMAGE = 'assets/sprites/misc/explosion1.png'
+ELECTRIC_IMAGE = 'assets/sprites/misc/electric.png'
 
 
 class Projectile(pygame.sprite.Sprite):
+    # Boss fights can have hundreds of these. Sprites still have a __dict__, but it only holds their groups
+    __slots__ = ('level', 'position', 'velocity', 'image', 'rect', 'damage', 'hit_entity', 'hit_tiles',
+                 'knockback_force')
+
     def __init__(self, level, image, position, damage, speed, x_direction, y_direction, group=()):
         super().__init__(group)
         # Access to level
@@ -30,7 +35,7 @@ class Projectile(pygame.sprite.Sprite):
         self.knockback_force = (0, 0)
 
     def draw(self):
-        self.level.canvases[3].blit(self.image, (self.position[0] - self.level.camera[0], self.position[1] - self.level.camera[1]))
+        self.level.draw(Z_OBJECTS, self.image, self.position)
 
     def apply_gravity(self):
         pass
@@ -65,18 +70,24 @@ class Projectile(pygame.sprite.Sprite):
 
 
 class Normal(Projectile):
+    __slots__ = ()
+
     def on_impact(self):
         if self.hit_entity or self.hit_tiles:
             self.kill()
 
 
 class FMJ(Projectile):
+    __slots__ = ()
+
     def on_impact(self):
         if self.hit_tiles:
             self.kill()
 
 
 class Explosive(Projectile):
+    __slots__ = ('explosion_animation', 'exploded')
+
     def __init__(self, level, image, pos, damage, speed, x_direction, y_direction, group=()):
         super().__init__(level, image, pos, damage, speed, x_direction, y_direction, group)
 
@@ -133,6 +144,8 @@ class Explosive(Projectile):
 
 
 class Electric(Projectile):
+    __slots__ = ('explosion', 'exploded')
+
     def __init__(self, level, image, pos, damage, speed, x_direction, y_direction, group=()):
         super().__init__(level, image, pos, damage, speed, x_direction, y_direction, group)
 
@@ -156,6 +169,8 @@ class Electric(Projectile):
 
 
 class ElectricBolt(Normal):
+    __slots__ = 'animation',
+
     def __init__(self, level, image, position, damage, speed, x_direction, y_direction, group=()):
         self.animation = Animation(image, 9, True, (16, 16))
 
@@ -163,10 +178,12 @@ class ElectricBolt(Normal):
 
     def draw(self):
         self.image = self.animation.get_image()
-        self.level.canvases[3].blit(self.image, (self.position[0] - self.level.camera[0], self.position[1] - self.level.camera[1]))
+        self.level.draw(Z_OBJECTS, self.image, self.position)
 
 
 class ThrownProjectile(Normal):
+    __slots__ = ()
+
     def __init__(self, level, image, position, damage, speed, x_direction, y_direction, group):
         super().__init__(level, image, position, damage, speed, x_direction, y_direction, group)
 
@@ -178,9 +195,11 @@ class ThrownProjectile(Normal):
 
 
 class RugbyBall(Normal):
+    __slots__ = ('timer', 'bounces')
+
     def __init__(self, level, image, position, x_direction, group=()):
         super().__init__(level, image, position, 10, 6, x_direction, 0, group)
-        self.timer = Timer(1000)
+        self.timer = Timer(1000, self.level.clock)
         self.bounces = 0
 
     def apply_gravity(self):
@@ -230,6 +249,8 @@ class RugbyBall(Normal):
 
 
 class Missile(Explosive, ThrownProjectile):
+    __slots__ = ()
+
     def __init__(self, level, image, position, damage, speed, x_direction, y_direction, group):
         super().__init__(level, image, position, damage, speed, x_direction, y_direction, group)
         self.velocity = pygame.Vector2(x_direction * speed, y_direction)
@@ -0,0 +1,164 @@
+import pygame
+from queue import Queue, Full
+from threading import Condition, Thread
+
+from scripts.globals import SCREEN_SIZE
+
+# Draw order, lowest first. Anything with the same z is drawn in the order it was submitted. The background
+# goes straight onto the screen before any of these
+Z_OFFGRID = 1
+Z_OBJECTS = 3
+Z_TILES = 4
+Z_ENTITIES = 5
+
+
+class DrawList:
+    # Everything drawn at one z in a frame, in world coordinates. Flushed with as few calls into pygame
+    # as possible, with the camera taken off all positions at once
+    def __init__(self):
+        self.images = []
+        self.fills = []
+
+    def __len__(self):
+        return len(self.images) + len(self.fills)
+
+    def blit(self, image, position, flags=0):
+        # Positions are copied, since sprites keep moving before the list is flushed
+        self.images.append((image, position[0], position[1], flags))
+
+    def rect(self, colour, rect):
+        # Solid rectangles are drawn between the images that were added before and after them
+        self.fills.append((len(self.images), colour, rect))
+
+    def commands(self, camera, view):
+        x, y = camera[0], camera[1]
+        commands = []
+        start = 0
+        for end, colour, rect in self.fills:
+            self.blits(commands, start, end, x, y, view)
+            commands.append((colour, (rect[0] - x, rect[1] - y, rect[2], rect[3])))
+            start = end
+        self.blits(commands, start, len(self.images), x, y, view)
+
+        self.images.clear()
+        self.fills.clear()
+        return commands
+
+    def blits(self, commands, start, end, x, y, view):
+        # Anything completely outside the camera is dropped here
+        left, top, right, bottom = view
+        items = [(image, (ix - x, iy - y), None, flags) for image, ix, iy, flags in self.images[start:end]
+                 if ix < right and iy < bottom and ix + image.get_width() > left and iy + image.get_height() > top]
+        if items:
+            commands.append(items)
+
+
+def draw_commands(surface, commands):
+    # A list is one blits call, anything else is a (colour, rect) fill
+    for command in commands:
+        if type(command) is list:
+            surface.blits(command, False)
+        else:
+            surface.fill(*command)
+
+
+class RenderQueue:
+    def __init__(self):
+        self.layers = {}
+
+        # Stats for the last frame that was flushed
+        self.submitted = 0
+        self.draw_calls = 0
+
+    def layer(self, z):
+        layer = self.layers.get(z)
+        if layer is None:
+            layer = self.layers[z] = DrawList()
+        return layer
+
+    def submit(self, image, position, z, flags=0):
+        self.layer(z).blit(image, position, flags)
+
+    def submit_rect(self, colour, rect, z):
+        self.layer(z).rect(colour, rect)
+
+    def take(self, camera):
+        # The frame as a list of screen space commands, sorted, culled and ready to draw. Nothing in it
+        # changes afterwards, so it can be drawn on another thread
+        view = camera[0], camera[1], camera[0] + SCREEN_SIZE[0], camera[1] + SCREEN_SIZE[1]
+        self.submitted = sum(len(layer) for layer in self.layers.values())
+        commands = []
+        for z in sorted(self.layers):
+            commands += self.layers[z].commands(camera, view)
+        self.draw_calls = len(commands)
+        return commands
+
+    def flush(self, surface, camera):
+        draw_commands(surface, self.take(camera))
+
+    def clear(self):
+        for layer in self.layers.values():
+            layer.images.clear()
+            layer.fills.clear()
+
+
+class RenderThread:
+    # Draws level frames on a thread of its own while the main thread simulates the next one. The two only
+    # overlap on pygame builds whose blits let go of the GIL, 2.6 keeps it and ends up slower than drawing
+    # on the main thread, so it is off by default. Frames are drawn into a back buffer and swapped to the front
+    # when finished. Presenting the front buffer stays on the main thread, since SDL wants the window
+    # touched from there
+    def __init__(self, size, latency=1):
+        self.buffers = [pygame.Surface(size).convert(), pygame.Surface(size).convert()]
+        self.condition = Condition()
+        self.error = None
+
+        # At most `latency` frames wait to be drawn, after that the simulation waits for the renderer
+        self.frames = Queue(maxsize=latency)
+        self.submitted = 0
+        self.completed = 0
+
+        self.thread = Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def submit(self, background, camera, commands):
+        self.submitted += 1
+        frame = self.submitted, background, (camera[0], camera[1]), commands
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.frames.put(frame, timeout=0.1)
+                return self.submitted
+            except Full:
+                pass
+
+    def work(self):
+        try:
+            while (frame := self.frames.get()) is not None:
+                number, background, camera, commands = frame
+                back = self.buffers[1]
+                back.fill(0)
+                background.draw(back, camera)
+                draw_commands(back, commands)
+
+                with self.condition:
+                    self.buffers.reverse()
+                    self.completed = number
+                    self.condition.notify_all()
+        except BaseException as error:
+            with self.condition:
+                self.error = error
+                self.condition.notify_all()
+
+    def present(self, surface, frame=0):
+        # Shows the newest finished frame, waiting for `frame` if it is not done yet
+        with self.condition:
+            self.condition.wait_for(lambda: self.completed >= frame or self.error is not None)
+            if self.error is not None:
+                raise self.error
+            surface.blit(self.buffers[0], (0, 0))
+
+    def stop(self):
+        self.frames.put(None)
+        self.thread.join()
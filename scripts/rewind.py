@@ -0,0 +1,350 @@
+import pickle
+import random
+import weakref
+import zlib
+
+import pygame
+
+from scripts.save_state import CLOCK, IMMUTABLE, LEVEL, SHARED, SaveState, fields, level_state, slot_names
+
+# Rewinding keeps the last few seconds of a level under a fixed number of bytes, to look at exactly what
+# happened in the frames before something went wrong.
+#
+# Every recorded frame is the level state flattened into a table, one entry per object, keyed by the id of
+# the live object. Each segment starts with a whole table, the keyframe, and the frames after it only keep
+# what changed since the frame before. All of it is pickled and compressed. When the records go over the
+# budget, the oldest segment is dropped.
+REWIND_BUDGET = 4 * 1024 * 1024
+KEYFRAME_INTERVAL = 30
+
+# Recording every frame costs a few milliseconds, every other frame is still smooth to step back through
+REWIND_INTERVAL = 2
+
+# Images made every frame, like flipped sprites, are gone by the time anyone rewinds to them. They are drawn
+# as this until the next update makes them again
+MISSING_IMAGE = pygame.Surface((1, 1), pygame.SRCALPHA)
+
+# What sprites keep their groups in. Restored sprites start with none and join the level's groups again
+SPRITE_GROUPS = type(vars(pygame.sprite.Sprite())['_Sprite__g'])
+
+LEVEL_REFERENCE = 'level',
+CLOCK_REFERENCE = 'clock',
+GROUPS_REFERENCE = 'groups',
+
+
+class SharedObjects:
+    # Things that are referenced rather than recorded, by number. Images are only weakly held, everything
+    # else shared is an asset or a class that lives for the whole game anyway
+    def __init__(self):
+        self.numbers = {}
+        self.objects = {}
+        self.images = {}
+        self.count = 0
+
+    def number(self, value):
+        key = id(value)
+        number = self.numbers.get(key)
+        if number is None:
+            number = self.numbers[key] = self.count
+            self.count += 1
+            if isinstance(value, pygame.Surface):
+                self.images[number] = weakref.ref(value, lambda ref: self.forget(key, number))
+            else:
+                self.objects[number] = value
+        return number
+
+    def forget(self, key, number):
+        if self.numbers.get(key) == number:
+            del self.numbers[key]
+        self.images.pop(number, None)
+
+    def get(self, number):
+        if number in self.objects:
+            return self.objects[number]
+        image = self.images.get(number)
+        image = image() if image is not None else None
+        return image if image is not None else MISSING_IMAGE
+
+
+class StateTable:
+    # Flattens the level state into {object id: entry}. Entries only hold numbers, strings and references:
+    # (id,) for another entry, ('shared', number) for something shared, and ('level',) or ('clock',) for the level
+    # and its clock. Rects and vectors are small and usually made new every frame, so they are kept inline as their
+    # values
+    def __init__(self, shared):
+        self.shared = shared
+        self.names = {}
+        self.slots = {}
+        self.kinds = {}
+
+    def encode(self, level):
+        self.level = level
+        self.clock = level.clock
+        self.table = {}
+        root = self.reference(level_state(level))
+        table, self.table, self.level, self.clock = self.table, None, None, None
+        return root, table
+
+    def reference(self, value):
+        cls = type(value)
+        kind = self.kinds.get(cls) or self.kind(cls)
+        if kind == 'value':
+            return value
+        if kind == 'shared':
+            number = self.shared.numbers.get(id(value))
+            return 'shared', number if number is not None else self.shared.number(value)
+        if kind == 'rect':
+            return 'rect', value.x, value.y, value.w, value.h
+        if kind == 'vector':
+            return 'vector', value.x, value.y
+        if value is self.level:
+            return LEVEL_REFERENCE
+        if value is self.clock:
+            return CLOCK_REFERENCE
+
+        key = id(value)
+        if key not in self.table:
+            # Marked first, for objects that end up referring back to themselves
+            self.table[key] = None
+            self.table[key] = self.entry(value)
+        return key,
+
+    def kind(self, cls):
+        if issubclass(cls, IMMUTABLE):
+            kind = 'value'
+        elif issubclass(cls, SHARED):
+            kind = 'shared'
+        elif cls is pygame.Rect:
+            kind = 'rect'
+        elif cls is pygame.Vector2:
+            kind = 'vector'
+        else:
+            kind = 'entry'
+        self.kinds[cls] = kind
+        return kind
+
+    def entry(self, value):
+        cls = type(value)
+        reference = self.reference
+        if cls is list:
+            return 'list', tuple([reference(item) for item in value])
+        if cls is tuple:
+            return 'tuple', tuple([reference(item) for item in value])
+        if isinstance(value, dict):
+            return 'dict', self.shared.number(cls), tuple([(reference(key), reference(item))
+                                                           for key, item in value.items()])
+        if cls is set:
+            return 'set', tuple([reference(item) for item in value])
+
+        if cls not in self.slots:
+            self.slots[cls] = slot_names(cls)
+        slots = self.slots[cls]
+        if hasattr(value, '__dict__') and not slots:
+            names = tuple(value.__dict__)
+            values = value.__dict__.values()
+        elif hasattr(value, '__dict__') or slots:
+            items = fields(value)
+            names = tuple([name for name, item in items])
+            values = [item for name, item in items]
+        else:
+            raise TypeError(f"Can't record a {cls.__name__} for rewinding")
+
+        names = self.names.setdefault(names, names)
+        return 'object', self.shared.number(cls), names, tuple(
+            [reference(item) for item in values] if '_Sprite__g' not in names else
+            [GROUPS_REFERENCE if name == '_Sprite__g' else reference(item) for name, item in zip(names, values)])
+
+    def decode(self, root, table):
+        self.table = table
+        self.built = {}
+        state = self.build(root)
+        self.table = self.built = None
+        return state
+
+    def build(self, value):
+        if type(value) is not tuple:
+            return value
+        kind = value[0]
+        if kind == 'rect':
+            return pygame.Rect(value[1:])
+        if kind == 'vector':
+            return pygame.Vector2(value[1], value[2])
+        if kind == 'shared':
+            return self.shared.get(value[1])
+        if value == LEVEL_REFERENCE:
+            return LEVEL
+        if value == CLOCK_REFERENCE:
+            return CLOCK
+        if value == GROUPS_REFERENCE:
+            return SPRITE_GROUPS()
+
+        key = kind
+        built = self.built
+        if key in built:
+            return built[key]
+
+        entry = self.table[key]
+        kind = entry[0]
+        if kind == 'list':
+            result = built[key] = []
+            result.extend(self.build(item) for item in entry[1])
+        elif kind == 'tuple':
+            result = tuple(self.build(item) for item in entry[1])
+        elif kind == 'dict':
+            result = built[key] = self.shared.get(entry[1])()
+            for item_key, item in entry[2]:
+                result[self.build(item_key)] = self.build(item)
+        elif kind == 'set':
+            result = built[key] = set()
+            result.update(self.build(item) for item in entry[1])
+        else:
+            cls = self.shared.get(entry[1])
+            result = built[key] = cls.__new__(cls)
+            for name, item in zip(entry[2], entry[3]):
+                setattr(result, name, self.build(item))
+        built[key] = result
+        return result
+
+
+def changes(previous, table):
+    # Entries that are new or different since the last frame. Objects that kept their fields only keep the
+    # fields that changed, as (index, value) pairs
+    result = {}
+    for key, entry in table.items():
+        old = previous.get(key)
+        if old == entry:
+            continue
+        if old is not None and entry[0] == 'object' and old[:3] == entry[:3]:
+            result[key] = 'patch', tuple([(i, item) for i, (old_item, item) in enumerate(zip(old[3], entry[3]))
+                                          if old_item != item])
+        else:
+            result[key] = entry
+    return result
+
+
+def apply_changes(table, changes):
+    for key, entry in changes.items():
+        if entry[0] == 'patch':
+            old = table[key]
+            items = list(old[3])
+            for i, item in entry[1]:
+                items[i] = item
+            entry = old[:3] + (tuple(items),)
+        table[key] = entry
+
+
+def pack(record):
+    return zlib.compress(pickle.dumps(record, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def unpack(data):
+    return pickle.loads(zlib.decompress(data))
+
+
+class Segment:
+    def __init__(self, frame, keyframe):
+        self.frames = [frame]
+        self.records = [keyframe]
+        self.size = len(keyframe)
+
+
+class RewindBuffer:
+    def __init__(self, budget=REWIND_BUDGET, interval=REWIND_INTERVAL, keyframe_interval=KEYFRAME_INTERVAL):
+        self.budget = budget
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+
+        self.shared = SharedObjects()
+        self.tables = StateTable(self.shared)
+        self.segments = []
+        self.size = 0
+        self.frame = 0
+
+        # The last recorded table, to compare the next frame against
+        self.previous = None
+        self.random_state = None
+
+    def __len__(self):
+        return sum(len(segment.frames) for segment in self.segments)
+
+    def frames(self):
+        return [frame for segment in self.segments for frame in segment.frames]
+
+    def record(self, level):
+        # Called once a frame, only every interval-th frame is kept
+        self.frame += 1
+        if self.frame % self.interval:
+            return
+
+        root, table = self.tables.encode(level)
+        ticks = level.clock.time
+        level_number = level.state_manager.selected_level
+
+        # The random state is big, so frames only keep it when it changed
+        random_state = random.getstate()
+        if random_state == self.random_state:
+            random_state = None
+        else:
+            self.random_state = random_state
+
+        segment = self.segments[-1] if self.segments else None
+        if segment is None or self.previous is None or len(segment.frames) >= self.keyframe_interval:
+            data = pack((level_number, ticks, self.random_state, root, table))
+            segment = Segment(self.frame, data)
+            self.segments.append(segment)
+        else:
+            data = pack((level_number, ticks, random_state, root, changes(self.previous, table)))
+            segment.frames.append(self.frame)
+            segment.records.append(data)
+            segment.size += len(data)
+        self.size += len(data)
+        self.previous = table
+
+        # The segment being recorded is never dropped, however big it is
+        while self.size > self.budget and len(self.segments) > 1:
+            self.size -= self.segments.pop(0).size
+
+    def table(self, frame):
+        for segment in self.segments:
+            if frame in segment.frames:
+                break
+        else:
+            raise KeyError(f'Frame {frame} is not recorded, the buffer has frames {self.frames()[:1]} to '
+                           f'{self.frames()[-1:]}')
+
+        # From the keyframe, through every frame after it
+        level_number, ticks, random_state, root, table = unpack(segment.records[0])
+        for data in segment.records[1:segment.frames.index(frame) + 1]:
+            level_number, ticks, frame_random_state, root, frame_changes = unpack(data)
+            apply_changes(table, frame_changes)
+            if frame_random_state is not None:
+                random_state = frame_random_state
+        return level_number, ticks, random_state, root, table
+
+    def save_state(self, frame):
+        level_number, ticks, random_state, root, table = self.table(frame)
+        return SaveState.from_state(level_number, ticks, random_state, self.tables.decode(root, table))
+
+    def back(self, level, frames=1):
+        # Goes back to an earlier frame, and forgets the ones after it
+        recorded = self.frames()
+        if len(recorded) <= frames:
+            return False
+
+        frame = recorded[-frames - 1]
+        self.save_state(frame).restore(level)
+        random_state = random.getstate()
+        while self.segments[-1].frames[-1] != frame:
+            segment = self.segments[-1]
+            segment.frames.pop()
+            data = segment.records.pop()
+            segment.size -= len(data)
+            self.size -= len(data)
+            if not segment.frames:
+                self.segments.pop()
+
+        # Recording carries on from here. The restored objects are new, so the next frame starts a segment
+        self.frame = frame
+        self.previous = None
+        self.random_state = random_state
+        return True
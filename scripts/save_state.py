@@ -0,0 +1,253 @@
+import io
+import os
+import pickle
+import random
+import types
+import zlib
+
+import pygame
+
+from scripts import audio
+from scripts.audio import LazySound, SoundBank, SoundCache
+from scripts.utils import FRAME_CACHE, IMAGE_CACHE, Timer, load_frames, load_image
+
+# A save state is a copy of everything in a level that changes while it is played. Restoring one puts copies
+# of it back into a level that is already loaded, so it can be restored any number of times and nothing is
+# read from disk. Tiles, images and sounds never change, so they are shared rather than copied.
+#
+# On disk it is a compressed pickle. Images and sounds are written as the asset they came from, only images
+# made while playing are written out as pixels.
+VERSION = 3
+
+# Quick saves from the game, one per level
+SAVE_STATE_FOLDER = 'data/save states'
+
+# Level attributes that change while playing. Sprite groups are saved as lists of their sprites
+LEVEL_STATE = ('player', 'enemies', 'boss', 'player_bullets', 'enemy_projectiles', 'camera', 'level_timer',
+               'level_completed', 'boss_fight', 'boundaries', 'counter')
+ITEM_STATE = ('chests', 'guns')
+
+IMMUTABLE = (int, float, bool, str, bytes, type(None))
+SHARED = (pygame.Surface, pygame.mixer.Sound, pygame.font.Font, LazySound, SoundBank, SoundCache, type,
+          types.FunctionType, types.BuiltinFunctionType)
+
+# Stand in for the level and its clock in saved states, so they can be restored into another copy of the same level
+LEVEL = object()
+CLOCK = object()
+
+
+def quick_save_path(number):
+    return f'{SAVE_STATE_FOLDER}/level{number}.state'
+
+
+def level_state(level):
+    # The live objects, not copies
+    state = {name: getattr(level, name) for name in LEVEL_STATE}
+    for name, value in state.items():
+        if isinstance(value, pygame.sprite.AbstractGroup):
+            state[name] = value.sprites()
+    state['item map'] = {name: getattr(level.item_map, name) for name in ITEM_STATE}
+    return state
+
+
+def copy_state(value, memo):
+    if isinstance(value, IMMUTABLE) or isinstance(value, SHARED):
+        return value
+    if id(value) in memo:
+        return memo[id(value)]
+
+    cls = type(value)
+    if cls is list:
+        copy = memo[id(value)] = []
+        copy.extend(copy_state(item, memo) for item in value)
+    elif cls is tuple:
+        copy = memo[id(value)] = tuple(copy_state(item, memo) for item in value)
+    elif isinstance(value, dict):
+        copy = memo[id(value)] = cls()
+        for key, item in value.items():
+            copy[copy_state(key, memo)] = copy_state(item, memo)
+    elif cls is set:
+        copy = memo[id(value)] = {copy_state(item, memo) for item in value}
+    elif cls is pygame.Rect:
+        copy = memo[id(value)] = value.copy()
+    elif cls is pygame.Vector2:
+        copy = memo[id(value)] = pygame.Vector2(value)
+    elif hasattr(value, '__dict__') or hasattr(cls, '__slots__'):
+        copy = memo[id(value)] = cls.__new__(cls)
+        for name, item in fields(value):
+            if name == '_Sprite__g':
+                # Sprites join their groups again when they are restored
+                setattr(copy, name, type(item)())
+            else:
+                setattr(copy, name, copy_state(item, memo))
+    else:
+        raise TypeError(f"Can't save a {cls.__name__} in a save state")
+    return copy
+
+
+def slot_names(cls):
+    names = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = slots,
+        names += [name for name in slots if name not in ('__dict__', '__weakref__')]
+    return names
+
+
+def fields(value):
+    names = list(getattr(value, '__dict__', ())) + slot_names(type(value))
+    return [(name, getattr(value, name)) for name in names if hasattr(value, name)]
+
+
+class SaveState:
+    def __init__(self, level):
+        self.level_number = level.state_manager.selected_level
+        self.ticks = level.clock.time
+        self.random_state = random.getstate()
+        self.state = copy_state(level_state(level), {id(level): LEVEL, id(level.clock): CLOCK})
+
+    @staticmethod
+    def from_state(level_number, ticks, random_state, state):
+        save_state = SaveState.__new__(SaveState)
+        save_state.level_number = level_number
+        save_state.ticks = ticks
+        save_state.random_state = random_state
+        save_state.state = state
+        return save_state
+
+    def restore(self, level):
+        if level.state_manager.selected_level != self.level_number:
+            raise ValueError(f'Save state is for level {self.level_number}, not level '
+                             f'{level.state_manager.selected_level}')
+
+        memo = {id(LEVEL): level, id(CLOCK): level.clock}
+        state = copy_state(self.state, memo)
+
+        # Timers still count from when they were saved, and go into the clock's wheel again
+        shift = level.clock.time - self.ticks
+        for value in memo.values():
+            if isinstance(value, Timer) and value.active:
+                value.start_time += shift
+                value.schedule()
+
+        item_state = state.pop('item map')
+        for name, value in state.items():
+            current = getattr(level, name)
+            if isinstance(current, pygame.sprite.AbstractGroup):
+                current.empty()
+                current.add(*value)
+            else:
+                setattr(level, name, value)
+        for name, value in item_state.items():
+            setattr(level.item_map, name, value)
+
+        random.setstate(self.random_state)
+        level.render_queue.clear()
+
+    def pack(self):
+        file = io.BytesIO()
+        StatePickler(file).dump((VERSION, self.level_number, self.ticks, self.random_state, self.state))
+        return zlib.compress(file.getvalue())
+
+    @staticmethod
+    def unpack(data, source='Save state'):
+        version, level_number, ticks, random_state, state = StateUnpickler(io.BytesIO(zlib.decompress(data))).load()
+        if version != VERSION:
+            raise ValueError(f'{source} is version {version}, this game reads version {VERSION}')
+
+        return SaveState.from_state(level_number, ticks, random_state, state)
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = self.pack()
+        with open(path, 'wb') as output:
+            output.write(data)
+
+    @staticmethod
+    def read(path):
+        with open(path, 'rb') as file:
+            return SaveState.unpack(file.read(), f'Save state {path}')
+
+
+class PackedSaveState:
+    # A save state kept the way it is written to disk, a few tens of KB instead of a copy of every object in the
+    # level. It is unpacked again every time it is restored
+    def __init__(self, save_state):
+        self.level_number = save_state.level_number
+        self.data = save_state.pack()
+
+    def unpack(self):
+        return SaveState.unpack(self.data)
+
+    def restore(self, level):
+        self.unpack().restore(level)
+
+
+def sound_banks():
+    return {sound.path: sound for bank in vars(audio).values() if isinstance(bank, SoundBank)
+            for sound in bank.values()}
+
+
+class StatePickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+
+        # Where every loaded image came from
+        self.assets = {id(image): ('image', key) for key, image in IMAGE_CACHE.items()}
+        for (key, size), frames in FRAME_CACHE.items():
+            for i, frame in enumerate(frames):
+                self.assets[id(frame)] = 'frame', key, size, i
+
+        self.surfaces = {}
+
+    def persistent_id(self, value):
+        if value is LEVEL:
+            return 'level',
+        if value is CLOCK:
+            return 'clock',
+        if isinstance(value, LazySound):
+            return 'sound', value.path
+        if not isinstance(value, pygame.Surface):
+            return None
+
+        if id(value) in self.assets:
+            return self.assets[id(value)]
+
+        # Made while playing, like flipped or tinted images. Each one is written once
+        if id(value) in self.surfaces:
+            return 'surface', self.surfaces[id(value)]
+        self.surfaces[id(value)] = index = len(self.surfaces)
+        return ('surface', index, value.get_size(), bool(value.get_flags() & pygame.SRCALPHA), value.get_colorkey(),
+                pygame.image.tobytes(value, 'RGBA'))
+
+
+class StateUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.sounds = sound_banks()
+        self.surfaces = {}
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == 'level':
+            return LEVEL
+        if kind == 'clock':
+            return CLOCK
+        if kind == 'sound':
+            return self.sounds[pid[1]]
+        if kind == 'image':
+            return load_image(pid[1])
+        if kind == 'frame':
+            return load_frames(pid[1], pid[2])[pid[3]]
+        if kind == 'surface':
+            if len(pid) == 2:
+                return self.surfaces[pid[1]]
+            index, size, alpha, colorkey, pixels = pid[1:]
+            surface = pygame.image.frombytes(pixels, size, 'RGBA')
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            if colorkey is not None:
+                surface.set_colorkey(colorkey, pygame.RLEACCEL)
+            self.surfaces[index] = surface
+            return surface
+        raise pickle.UnpicklingError(f'Unknown asset in save state: {kind}')
@@ -2,6 +2,8 @@ import pygame
 from math import ceil
 
 from scripts.globals import SCREEN_SIZE
+from scripts.level_data import EMPTY
+from scripts.render import Z_OBJECTS, Z_OFFGRID, Z_TILES
 from scripts.utils import load_images_folder
 
 
@@ -24,79 +26,79 @@ LAYER_IMAGE_MAPPINGS = {
 class TileMap:
     def __init__(self, level, data=None):
         self.level = level
-        self.data = {}
+        self.data = None
         self.images = {}
 
         if data is not None:
             self.load(data)
 
     def draw(self):
-        for y in range(int(self.level.camera[1] // 32) - 5, int((self.level.camera[1] + SCREEN_SIZE[1]) // 32) + 6):
-            for x in range(int(self.level.camera[0] // 32) - 5, int((self.level.camera[0] + SCREEN_SIZE[0]) // 32) + 6):
-                loc = f'{x},{y}'
-                if loc in self.data['offgrid']:
-                    tile = self.data['offgrid'][loc]
-                    image = self.images['tiles'][tile['index']]
-                    pos = tile['pos'][0] - self.level.camera[0], tile['pos'][1] - self.level.camera[1]
-                    self.level.canvases[1].blit(image, pos)
-
-                if loc in self.data['objects']:
-                    tile = self.data['objects'][loc]
-                    image = self.images['objects'][tile['index']]
-                    pos = (tile['pos'][0] - self.level.camera[0],
-                           tile['pos'][1] + (32 - image.get_height()) - self.level.camera[1])
-                    self.level.canvases[3].blit(image, pos)
-
-                if loc in self.data['tiles']:
-                    tile = self.data['tiles'][loc]
-                    image = self.images['tiles'][tile['index']]
-                    pos = tile['pos'][0] - self.level.camera[0], tile['pos'][1] - self.level.camera[1]
-                    self.level.canvases[4].blit(image, pos)
-
-                if loc in self.data['ramps']:
-                    tile = self.data['ramps'][loc]
-                    image = self.images['ramps'][tile['index']]
-                    pos = tile['pos'][0] - self.level.camera[0], tile['pos'][1] - self.level.camera[1]
-                    self.level.canvases[4].blit(image, pos)
-
-                if loc in self.data['ladders']:
-                    tile = self.data['ladders'][loc]
-                    image = self.images['objects'][tile['index']]
-                    pos = (tile['pos'][0] + (32 - image.get_width()) / 2 - self.level.camera[0],
-                           tile['pos'][1] + (32 - image.get_height()) - self.level.camera[1])
-                    self.level.canvases[4].blit(image, pos)
-
-                if loc in self.data['checkpoints']:
-                    tile = self.data['checkpoints'][loc]
-                    image = self.images['checkpoints'][tile['index']]
-                    pos = (tile['pos'][0] + (32 - image.get_width()) / 2 - self.level.camera[0],
-                           tile['pos'][1] + (32 - image.get_height()) - self.level.camera[1])
-                    self.level.canvases[3].blit(image, pos)
+        camera = self.level.camera
+        data = self.data
+        width = data.width
+
+        # Only the part of the screen that overlaps the level grid
+        first_x = max(int(camera[0] // 32) - 5, data.origin[0])
+        last_x = min(int((camera[0] + SCREEN_SIZE[0]) // 32) + 6, data.origin[0] + width)
+        first_y = max(int(camera[1] // 32) - 5, data.origin[1])
+        last_y = min(int((camera[1] + SCREEN_SIZE[1]) // 32) + 6, data.origin[1] + data.height)
+
+        offgrid, objects, tiles = data.grids['offgrid'], data.grids['objects'], data.grids['tiles']
+        ramps, ladders, checkpoints = data.grids['ramps'], data.grids['ladders'], data.grids['checkpoints']
+
+        level = self.level
+        for y in range(first_y, last_y):
+            row = (y - data.origin[1]) * width - data.origin[0]
+            for x in range(first_x, last_x):
+                cell = row + x
+                pos = x * 32, y * 32
+
+                if offgrid[cell] != EMPTY:
+                    level.draw(Z_OFFGRID, self.images['tiles'][offgrid[cell]], pos)
+
+                if objects[cell] != EMPTY:
+                    image = self.images['objects'][objects[cell]]
+                    level.draw(Z_OBJECTS, image, (pos[0], pos[1] + (32 - image.get_height())))
+
+                if tiles[cell] != EMPTY:
+                    level.draw(Z_TILES, self.images['tiles'][tiles[cell]], pos)
+
+                if ramps[cell] != EMPTY:
+                    level.draw(Z_TILES, self.images['ramps'][ramps[cell]], pos)
+
+                if ladders[cell] != EMPTY:
+                    image = self.images['objects'][ladders[cell]]
+                    level.draw(Z_TILES, image, (pos[0] + (32 - image.get_width()) / 2, pos[1] + (32 - image.get_height())))
+
+                if checkpoints[cell] != EMPTY:
+                    image = self.images['checkpoints'][checkpoints[cell]]
+                    level.draw(Z_OBJECTS, image, (pos[0] + (32 - image.get_width()) / 2, pos[1] + (32 - image.get_height())))
 
     def get_tiles_around(self, layer, rect):
         tiles = []
-        grid_pos = rect.x // 32, rect.y // 32
-        for h in range(-1, ceil(rect.h / 32) + 1):
-            for w in range(-1, ceil(rect.w / 32) + 1):
-                loc = f'{grid_pos[0] + w},{grid_pos[1] + h}'
-                if loc in self.data[layer]:
-                    index = self.data[layer][loc]['index']
-                    image = self.images[LAYER_IMAGE_MAPPINGS[layer]][index]
-                    pos = self.data[layer][loc]['pos']
-                    tiles.append(Tile(image, pos, index))
+        data = self.data
+        grid = data.grids[layer]
+        images = self.images[LAYER_IMAGE_MAPPINGS[layer]]
+
+        # The cells around the rect, clipped to the level grid
+        first_x = max(rect.x // 32 - 1, data.origin[0])
+        last_x = min(rect.x // 32 + ceil(rect.w / 32), data.origin[0] + data.width - 1)
+        first_y = max(rect.y // 32 - 1, data.origin[1])
+        last_y = min(rect.y // 32 + ceil(rect.h / 32), data.origin[1] + data.height - 1)
+
+        for y in range(first_y, last_y + 1):
+            row = (y - data.origin[1]) * data.width - data.origin[0]
+            for x in range(first_x, last_x + 1):
+                index = grid[row + x]
+                if index != EMPTY:
+                    tiles.append(Tile(images[index], (x * 32, y * 32), index))
         return tiles
 
     def load(self, data):
-        tileset = data['tileset']
+        tileset = data.tileset
 
-        self.data['offgrid'] = data['data']['offgrid']
-        self.data['tiles'] = data['data']['tiles']
-        self.data['ramps'] = data['data']['ramps']
-        self.data['ladders'] = data['data']['ladders']
-        self.data['objects'] = data['data']['objects']
-        self.data['animated objects'] = data['data']['animated objects']
-        self.data['checkpoints'] = data['data']['checkpoints']
-        self.data['boundaries'] = data['data']['boundaries']
+        # Compiled level, see scripts/level_data.py
+        self.data = data
 
         self.images = {
             'tiles': load_images_folder(f'assets/sprites/tilesets/{tileset}/tiles'),
@@ -107,6 +109,8 @@ class TileMap:
 
 
 class Tile:
+    __slots__ = ('image', 'rect', 'index')
+
     def __init__(self, image, pos, index):
         self.image = image
         self.rect = pygame.Rect(pos[0], pos[1], 32, 32)
@@ -1,16 +1,195 @@
+import json
+import os
 import pygame
-from os import walk
+from collections import OrderedDict
+from os.path import normcase, basename
+from threading import Lock, Thread
+
+from scripts.asset_manifest import COLORKEY, MANIFEST_PATH, folder_files, image_alpha
+from scripts.asset_pack import AssetPack, build_pack, is_pack_stale, lock_pack
+
+# Converted images and cut animation frames, shared by everything that loads the same file
+IMAGE_CACHE = {}
+FRAME_CACHE = {}
+
+# Fonts are shared by everything that asks for the same file and size. Rendered text is kept for a while,
+# the least recently used strings are dropped first
+FONT_CACHE = {}
+TEXT_CACHE = OrderedDict()
+TEXT_CACHE_SIZE = 256
+
+# Texture atlases made by build_assets.py. Images packed into them are handed out as subsurfaces
+ATLAS_FOLDER = 'assets/atlases'
+ATLAS_INDEX = {}
+atlas_index_loaded = False
+
+# Every image file the game decodes, kept raw in one pack. When any of them changes the pack is rebuilt in the
+# background, and the game decodes the PNGs until the next time it starts
+SPRITE_PACK = 'assets/pack/sprites.pack'
+sprite_pack = None
+sprite_pack_loaded = False
+sprite_pack_lock = Lock()
+
+
+def load_atlas_index():
+    global atlas_index_loaded
+    if not atlas_index_loaded:
+        atlas_index_loaded = True
+        try:
+            manifest = json.loads(open(f'{ATLAS_FOLDER}/manifest.json').read())
+        except FileNotFoundError:
+            return ATLAS_INDEX
+
+        for file, images in manifest['atlases'].items():
+            for path, rect in images.items():
+                ATLAS_INDEX[normcase(path)] = (f'{ATLAS_FOLDER}/{file}', rect)
+
+    return ATLAS_INDEX
+
+
+def image_source(path):
+    # The file that has to be decoded to get this image
+    atlas = load_atlas_index().get(normcase(path))
+    return path if atlas is None else atlas[0]
+
+
+def sprite_pack_sources():
+    return sorted(dict.fromkeys(image_source(path) for path in folder_paths('assets/sprites')))
+
+
+def prepare_pixels(path, image):
+    # Colorkey images go into the pack with the key colour where they are see through, so loading them only has to
+    # set how they are blitted. Opaque ones are already fully opaque. Atlases get this done for each image in them
+    atlas_images = [(image_path, rect) for image_path, (atlas, rect) in load_atlas_index().items() if atlas == path]
+    for image_path, rect in atlas_images or [(path, image.get_rect())]:
+        if image_alpha(image_path) == 'colorkey':
+            # Alpha is all or nothing in these, so blending onto the key colour copies them exactly
+            region = pygame.Surface(pygame.Rect(rect).size, pygame.SRCALPHA)
+            region.fill(COLORKEY)
+            region.blit(image, (0, 0), rect)
+            image.blit(region, rect)
+    return image
+
+
+def pack_sprites():
+    return build_pack(SPRITE_PACK, sprite_pack_sources(), [MANIFEST_PATH, f'{ATLAS_FOLDER}/manifest.json'],
+                      prepare_pixels)
+
+
+def build_sprite_pack():
+    print(f'Packed {pack_sprites()} images into {SPRITE_PACK}')
+
+
+def is_sprite_pack_stale():
+    return is_pack_stale(SPRITE_PACK)
+
+
+def rebuild_sprite_pack():
+    # On a thread, since it decodes every image. Batch runs start lots of processes at once, only the one that
+    # gets the lock builds it. Not a daemon, so quitting waits for the pack to be finished
+    lock = lock_pack(SPRITE_PACK)
+    if lock is not None:
+        Thread(target=build_locked_sprite_pack, args=(lock,)).start()
+
+
+def build_locked_sprite_pack(lock):
+    try:
+        pack_sprites()
+    except (OSError, pygame.error):
+        # Stays stale, the next run tries again
+        pass
+    finally:
+        os.remove(lock)
+
+
+def load_sprite_pack():
+    global sprite_pack, sprite_pack_loaded
+    # The loading thread can get here at the same time as the main thread
+    with sprite_pack_lock:
+        if not sprite_pack_loaded:
+            sprite_pack_loaded = True
+            try:
+                if is_pack_stale(SPRITE_PACK):
+                    # Decode the PNGs like when there is no pack, while a new one is built
+                    rebuild_sprite_pack()
+                    sprite_pack = None
+                else:
+                    sprite_pack = AssetPack(SPRITE_PACK)
+            except OSError:
+                # Unreadable pack: decode the PNGs like before
+                sprite_pack = None
+
+    return sprite_pack
+
+
+def is_image_packed(path):
+    pack = load_sprite_pack()
+    return pack is not None and path in pack
 
 
 def load_image(path):
-    return pygame.image.load(path).convert_alpha()
+    key = normcase(path)
+    if key not in IMAGE_CACHE:
+        atlas = load_atlas_index().get(key)
+        if atlas is None and is_image_packed(path):
+            image = alpha_mode(path, sprite_pack.get(path))
+        elif atlas is None:
+            image = reduce_alpha(path, pygame.image.load(path).convert_alpha())
+        elif is_image_packed(atlas[0]):
+            image = alpha_mode(path, load_image(atlas[0]).subsurface(atlas[1]))
+        else:
+            image = reduce_alpha(path, load_image(atlas[0]).subsurface(atlas[1]))
+        IMAGE_CACHE[key] = image
+    return IMAGE_CACHE[key]
+
+
+def cache_image(path, image):
+    # Used for images that were decoded somewhere else, like on a loading thread
+    IMAGE_CACHE[normcase(path)] = reduce_alpha(path, image.convert_alpha())
+
+
+def alpha_mode(path, image):
+    # Packed images already have their pixels ready, see prepare_pixels, so only blending is turned off. Nothing
+    # is copied and the surface still points into the pack
+    alpha = image_alpha(path)
+    if alpha in ('opaque', 'colorkey'):
+        image.set_alpha(None)
+    if alpha == 'colorkey':
+        image.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return image
+
+
+def reduce_alpha(path, image):
+    # Per-pixel alpha blending is only kept for images that really blend. The asset manifest says which those are.
+    # Images decoded from PNGs have their pixels changed here instead of in the pack
+    alpha = image_alpha(path)
+    if alpha == 'opaque':
+        return image.convert()
+
+    if alpha == 'colorkey':
+        surface = pygame.Surface(image.get_size()).convert()
+        surface.fill(COLORKEY)
+        surface.blit(image, (0, 0))
+        surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        return surface
+
+    return image
+
+
+def is_image_cached(path):
+    return normcase(image_source(path)) in IMAGE_CACHE
+
+
+def folder_paths(path):
+    return [file for file in folder_files(path) if file.lower().endswith('.png')]
 
 
 def load_images_folder(path):
-    images = []
-    for root, _, files in walk(path):
-        for file in files:
-            images.append(load_image(root + '/' + file))
+    # Levels refer to these images by index, so the order comes from the asset manifest
+    files = folder_files(path)
+    images = [None] * len(files)
+    for i, file in enumerate(files):
+        images[i] = load_image(file)
     return images
 
 
@@ -18,10 +197,18 @@ def cut_sprite_sheet(image, size) -> list[pygame.Surface]:
     images = []
     w, h = size
 
+    # Frames of opaque and colorkey sheets stay that way, unless a frame reaches past the sheet
+    keep_format = not image.get_flags() & pygame.SRCALPHA and h <= image.get_height()
+
     for i in range(image.get_width() // w):
-        surf = pygame.Surface((w, h), pygame.SRCALPHA)
         area = (i * w, 0, w, h)
-        surf.blit(image, (0, 0), area)
+        if keep_format:
+            surf = image.subsurface(area).copy()
+            if image.get_colorkey() is not None:
+                surf.set_colorkey(image.get_colorkey(), pygame.RLEACCEL)
+        else:
+            surf = pygame.Surface((w, h), pygame.SRCALPHA)
+            surf.blit(image, (0, 0), area)
         images.append(surf)
 
     return images
@@ -29,12 +216,11 @@ def cut_sprite_sheet(image, size) -> list[pygame.Surface]:
 
 def load_enemy_icons(path, size):
     images = []
-    for root, _, files in walk(path):
-        for file in files:
-            if file.lower() == 'idle.png':
-                image = load_image(root + '/' + file)
-                image = cut_sprite_sheet(image, size)
-                images.append(image[0])
+    for file in folder_files(path):
+        if basename(file).lower() == 'idle.png':
+            image = load_image(file)
+            image = cut_sprite_sheet(image, size)
+            images.append(image[0])
     return images
 
 
@@ -53,12 +239,48 @@ def debug_rect(surface, rect, scroll=(0, 0), colour='green'):
     pygame.draw.rect(surface, colour, rect, 1)
 
 
+def load_font(path, size):
+    key = normcase(path), size
+    if key not in FONT_CACHE:
+        FONT_CACHE[key] = pygame.font.Font(path, size)
+    return FONT_CACHE[key]
+
+
+def load_sys_font(name, size, bold=False):
+    key = name, size, bold
+    if key not in FONT_CACHE:
+        FONT_CACHE[key] = pygame.font.SysFont(name, size, bold)
+    return FONT_CACHE[key]
+
+
+def cached_text(key, make):
+    if key in TEXT_CACHE:
+        TEXT_CACHE.move_to_end(key)
+        return TEXT_CACHE[key]
+
+    TEXT_CACHE[key] = make()
+    if len(TEXT_CACHE) > TEXT_CACHE_SIZE:
+        TEXT_CACHE.popitem(last=False)
+    return TEXT_CACHE[key]
+
+
+def render_text(font, text, colour, bg_colour=None, antialias=True):
+    # Same as font.render, but only renders each string once while it keeps being used
+    colour = tuple(colour) if isinstance(colour, list) else colour
+    bg_colour = tuple(bg_colour) if isinstance(bg_colour, list) else bg_colour
+    return cached_text((font, text, colour, bg_colour, antialias),
+                       lambda: font.render(text, antialias, colour, bg_colour))
+
+
 def debug_info(surface, info, pos, center=False, size=20, text_colour='white', bg_colour='orange'):
-    font = pygame.font.Font('assets/fonts/data-latin.ttf', size)
-    text = font.render(str(info), True, text_colour, bg_colour)
-    surf = pygame.Surface((text.get_width() + 2, text.get_height() + 2))
-    surf.fill(bg_colour)
-    surf.blit(text, (1, 1))
+    def make():
+        text = load_font('assets/fonts/data-latin.ttf', size).render(str(info), True, text_colour, bg_colour)
+        surf = pygame.Surface((text.get_width() + 2, text.get_height() + 2))
+        surf.fill(bg_colour)
+        surf.blit(text, (1, 1))
+        return surf
+
+    surf = cached_text(('debug', str(info), size, text_colour, bg_colour), make)
 
     if center:
         pos = pos[0] - surf.get_width() / 2, pos[1] - surf.get_height() / 2
@@ -66,12 +288,23 @@ def debug_info(surface, info, pos, center=False, size=20, text_colour='white', b
     surface.blit(surf, pos)
 
 
+def load_frames(path, size):
+    # A tuple, so every animation of the same sheet can share it
+    key = normcase(path), tuple(size)
+    if key not in FRAME_CACHE:
+        FRAME_CACHE[key] = tuple(cut_sprite_sheet(load_image(path), size))
+    return FRAME_CACHE[key]
+
+
 class Animation:
+    # Levels have hundreds of these, slots keep them small
+    __slots__ = ('images', 'fps', 'loop', 'frame', 'finished')
+
     def __init__(self, image, fps, loop=True, size=(48, 48)):
         if isinstance(image, str):
-            image = load_image(image)
-
-        self.images = cut_sprite_sheet(image, size)
+            self.images = load_frames(image, size)
+        else:
+            self.images = cut_sprite_sheet(image, size)
         self.fps = fps
         self.loop = loop
         self.frame = 0
@@ -106,37 +339,98 @@ class Animation:
 
 
 class Timer:
-    def __init__(self, duration):
+    # Counts the time of a clock, usually the level's, see scripts/clock.py. The clock deactivates it when it runs
+    # out, or calls callback if it was given one
+    __slots__ = ('duration', 'clock', 'callback', 'active', 'start_time', 'end_time', 'time_elapsed')
+
+    def __init__(self, duration, clock, callback=None):
         self.duration = duration
+        self.clock = clock
+        self.callback = callback
         self.active = False
         self.start_time = 0
+        self.end_time = 0
         self.time_elapsed = 0
 
     def activate(self):
         if not self.active:
-            self.start_time = pygame.time.get_ticks()
+            self.start_time = self.clock.time
             self.active = True
+            self.schedule()
+
+    def schedule(self):
+        self.end_time = self.start_time + self.duration
+        self.clock.schedule(self)
 
     def deactivate(self):
         self.start_time = 0
         self.active = False
 
+    def expire(self, end_time):
+        # Left over from an earlier run of the timer
+        if not self.active or end_time != self.end_time:
+            return
+        if self.clock.time - self.start_time <= self.duration:
+            # The duration went up while it was running
+            self.schedule()
+            return
+
+        self.time_elapsed = self.clock.time - self.start_time
+        self.deactivate()
+        if self.callback is not None:
+            self.callback()
+
     def get_time_left(self):
         return self.duration - self.time_elapsed
 
     def update(self):
         if self.active:
-            self.time_elapsed = pygame.time.get_ticks() - self.start_time
-            if pygame.time.get_ticks() - self.start_time > self.duration:
-                self.deactivate()
+            self.time_elapsed = self.clock.time - self.start_time
 
     def set_duration(self, duration):
         self.duration = duration
+        if self.active and self.start_time + duration < self.end_time:
+            self.schedule()
 
     def __bool__(self):
         return self.active
 
 
+class TickScheduler:
+    # Golden ratio spacing keeps the phases of any number of schedulers evenly spread out
+    PHASE_STEP = 0.6180339887
+
+    def __init__(self, rate, phase=0):
+        self.interval = 1 / rate
+        self.elapsed = phase * self.interval
+        self.since_last = 0
+        self.delta = 0
+
+    @classmethod
+    def phase_at(cls, position, cell=32):
+        # A phase from where something spawns, so it is the same every time a level is loaded. Neighbouring
+        # cells are a golden ratio step apart
+        index = int(position[0]) // cell + int(position[1]) // cell * 1024
+        return (index * cls.PHASE_STEP) % 1
+
+    def tick(self, delta, force=False):
+        self.elapsed += delta
+        self.since_last += delta
+
+        if self.elapsed >= self.interval:
+            self.elapsed %= self.interval
+        elif not force:
+            return False
+
+        # Time that passed since the last tick, used by decisions that scale with time
+        self.delta = self.since_last
+        self.since_last = 0
+        return True
+
+    def set_rate(self, rate):
+        self.interval = 1 / rate
+
+
 class TextButton:
     def __init__(self, btn_size, text, font='calibri', font_size=28, text_colour='yellow', bg_colour='white',
                  bd_width=-1, bd_colour='black'):
@@ -144,8 +438,7 @@ class TextButton:
         self.image.fill(bg_colour)
         pygame.draw.rect(self.image, bd_colour, ((0, 0), btn_size), bd_width)
 
-        font = pygame.font.SysFont(font, font_size, True)
-        text = font.render(text, True, text_colour)
+        text = render_text(load_sys_font(font, font_size, True), text, text_colour)
 
         center = self.image.get_rect().center
         self.image.blit(text, (center[0] - text.get_width() / 2,
@@ -1,59 +1,34 @@
-import json
 import math
+import os
 from datetime import timedelta
 
 import pygame
 
-from scripts.audio import MUSIC
+from scripts.audio import MUSIC, prefetch
 from scripts.background import Background
-from scripts.bosses import SportsMan, Tank, Mech, Vampire, TheScientist
 from scripts.camera import Camera
-from scripts.character import Biker, Punk, Cyborg
-from scripts.enemies import (Batsman, Pistolerro, GroundDrone, CyberHound, DockWorker, ExplosiveBot,
-                             Zapper, Demoness, Zombie)
+from scripts.clock import GameClock
 from scripts.globals import SCREEN_SIZE, FPS
 from scripts.item_map import ItemMap
+from scripts.level_data import load_level
+from scripts.level_entities import BOSSES, CHARACTER, ENEMIES, level_sound_names
+from scripts.render import RenderQueue, Z_OBJECTS
+from scripts.rewind import RewindBuffer
+from scripts.save_state import PackedSaveState, SaveState, quick_save_path
 from scripts.tilemap import TileMap
-from scripts.utils import Timer, load_image, InvisibleButton
-
-CHARACTER = {
-    1: Biker,
-    2: Punk,
-    3: Cyborg
-}
-
-
-ENEMIES = {
-    1: Batsman,
-    2: Pistolerro,
-    3: GroundDrone,
-    4: CyberHound,
-    5: DockWorker,
-    6: ExplosiveBot,
-    7: Zapper,
-    8: Demoness,
-    9: Zombie
-}
-
-
-BOSSES = {
-    1: SportsMan,
-    2: Tank,
-    3: Mech,
-    4: Vampire,
-    5: TheScientist
-}
-
+from scripts.utils import Timer, load_image, render_text, InvisibleButton
 
 class Level:
-    def __init__(self, game, state_manager):
+    def __init__(self, game, state_manager, loaded_data=None):
         self.game = game
         self.state_manager = state_manager
         self.screen = pygame.display.get_surface()
 
-        # Level stuff
-        self.camera = Camera()
-        self.canvases = {i: pygame.Surface(self.screen.get_size()) for i in range(1, 7)}
+        # Level stuff. Everything in the level counts time on its own clock
+        self.clock = GameClock()
+        self.camera = Camera(self.clock)
+        self.render_queue = RenderQueue()
+        self.first_frame = None
 
         # Images
         self.images = {
@@ -74,17 +49,21 @@ class Level:
         self.enemies = pygame.sprite.Group()
         self.boss = pygame.sprite.GroupSingle()
 
-        # Load data from file
-        loaded_data = json.loads(open(f'levels/level{self.state_manager.selected_level}.json').read())
+        # Compiled level data, unless it was already preloaded
+        if loaded_data is None:
+            loaded_data = load_level(self.state_manager.selected_level)
+
+        # Sound effects, already decoded if the level was preloaded
+        prefetch(level_sound_names(loaded_data, self.game.character))
 
         # Text from level data
         self.texts = []
-        for pos, text in loaded_data['text']:
-            ttt = self.game.fonts[17].render(text, True, '#111111')
+        for pos, text in loaded_data.text:
+            ttt = render_text(self.game.fonts[17], text, '#111111')
             self.texts.append((pos, ttt))
 
         # Background
-        self.background = Background(loaded_data['tileset'], 'day')
+        self.background = Background(loaded_data.tileset, 'day')
 
         # Tile map
         self.tilemap = TileMap(self, loaded_data)
@@ -96,15 +75,15 @@ class Level:
         self.player = CHARACTER[self.game.character](self, (252, 210))
 
         # Enemies
-        for value in loaded_data['data']['enemies'].values():
-            ENEMIES[value['index'] + 1](self, value['pos'])
+        for pos, index in loaded_data.entities('enemies'):
+            ENEMIES[index + 1](self, pos)
 
         # Boss
-        for value in loaded_data['data']['bosses'].values():
-            self.boss = BOSSES[value['index'] + 1](self, value['pos'])
+        for pos, index in loaded_data.entities('bosses'):
+            self.boss = BOSSES[index + 1](self, pos)
 
         # Start level timer
-        self.level_timer = Timer(1000 * 60 * 8)
+        self.level_timer = Timer(1000 * 60 * 8, self.clock)
         self.level_timer.activate()
         self.level_completed = False
 
@@ -112,33 +91,50 @@ class Level:
         self.boss_fight = False
         self.boundaries = [0, 0]
 
-        # Music
+        self.counter = 0
+
+        # Restarting goes back to this instead of loading the level again. F5 saves, F9 goes back to the save
+        self.start_state = PackedSaveState(SaveState(self))
+        self.quick_save = None
+
+        # Run the game with --rewind to record the level as it is played, see scripts/rewind.py
+        self.rewind = RewindBuffer() if self.game.rewind else None
+
+        self.play_music()
+
+    def play_music(self):
         pygame.mixer.music.load(MUSIC[f'music {self.state_manager.selected_level}'])
         pygame.mixer.music.set_volume(0.5)
         pygame.mixer.music.play(-1)
 
-        self.counter = 0
+    def restart(self, save_state=None):
+        # The game over and level complete screens change the music
+        music_changed = self.level_completed
+        (save_state or self.start_state).restore(self)
+        if music_changed:
+            self.play_music()
+        self.state_manager.alpha = 310
+        self.state_manager.phase = True
 
     def main(self):
         # Update camera
         if not self.player.off_map:
             self.camera.scroll(self.player, 24)
 
-        # Canvases
-        self.canvases = {i: pygame.Surface(self.screen.get_size(), pygame.SRCALPHA) for i in range(1, 7)}
-
-        # Background
-        self.background.draw(self.canvases[1], self.camera)
+        # Background, straight onto the screen under everything else. The render thread draws its own
+        if self.game.render_thread is None and not self.game.headless:
+            self.background.draw(self.screen, self.camera)
 
         # Update tilemap
-        self.tilemap.draw()
+        if not self.game.headless:
+            self.tilemap.draw()
 
         # Update item map
         self.item_map.draw()
 
         # Text goes here
         for pos, text in self.texts:
-            self.canvases[3].blit(text, (pos[0] - self.camera.x - 6 * 32, pos[1] - self.camera.y))
+            self.draw(Z_OBJECTS, text, (pos[0] - 6 * 32, pos[1]))
 
         # Projectiles
         self.player_bullets.update()
@@ -162,9 +158,23 @@ class Level:
         # The player
         self.player.update()
 
-        # Draw everything
-        for layer in self.canvases.values():
-            self.screen.blit(layer, (0, 0))
+        # Draw everything, or hand it to the render thread and show the last frame it finished
+        if self.game.headless:
+            self.render_queue.clear()
+        elif self.game.render_thread is None:
+            self.render_queue.flush(self.screen, self.camera)
+        else:
+            frame = self.game.render_thread.submit(self.background, self.camera, self.render_queue.take(self.camera))
+            if self.first_frame is None:
+                self.first_frame = frame
+            self.game.render_thread.present(self.screen, self.first_frame)
+
+    def draw(self, z, image, position, flags=0):
+        # Positions are in the world, the camera comes off when the queue is flushed
+        self.render_queue.submit(image, position, z, flags)
+
+    def draw_rect(self, z, colour, rect):
+        self.render_queue.submit_rect(colour, rect, z)
 
     def hud(self):
         # Health bar
@@ -175,24 +185,24 @@ class Level:
             self.screen.blit(self.images['hp bar'], (20 + i * 32, 20))
 
         # Lives
-        lives = self.game.fonts[17].render(f'Lives left: {self.player.lives}', True, 'white')
+        lives = render_text(self.game.fonts[17], f'Lives left: {self.player.lives}', 'white')
         self.screen.blit(lives, (576 - lives.get_width() - 48, 20))
 
         # Level timer
         time_delta = str(timedelta(milliseconds=self.level_timer.get_time_left()))
-        timer_text = self.game.fonts[17].render(time_delta[2:7], True, 'white')
+        timer_text = render_text(self.game.fonts[17], time_delta[2:7], 'white')
         self.screen.blit(timer_text, (SCREEN_SIZE[0] / 2 - timer_text.get_width() / 2, 20))
 
         # Guns
         gun1 = self.player.guns[0]
-        text1 = self.game.fonts[15].render(f'{gun1.ammo}', True, 'white')
+        text1 = render_text(self.game.fonts[15], f'{gun1.ammo}', 'white')
         self.screen.blit(gun1.gun_images[1], (22, 48))
         self.screen.blit(text1, (22 + 35, -5 + 48))
         if self.player.guns_index == 0:
             pygame.draw.rect(self.screen, 'orange', (15, 44, 3, 15))
 
         gun2 = self.player.guns[1]
-        text2 = self.game.fonts[15].render(f'{gun2.ammo}', True, 'white')
+        text2 = render_text(self.game.fonts[15], f'{gun2.ammo}', 'white')
         self.screen.blit(gun2.gun_images[1], (22, 48 + 24))
         self.screen.blit(text2, (22 + 35, -5 + 48 + 24))
         if self.player.guns_index == 1:
@@ -222,7 +232,7 @@ class Level:
         # Restart
         self.buttons['32x32'].set_pos((8 * 32 + 16, 5 * 32), False)
         if self.buttons['32x32'].click(self.game.mouse_rect, click):
-            self.state_manager.set_level()
+            self.restart()
             self.game.mouse_button_down = True
 
         # Select level
@@ -244,7 +254,7 @@ class Level:
 
         self.buttons['32x32'].set_pos((7 * 32, 5 * 32), False)
         if self.buttons['32x32'].click(self.game.mouse_rect, click):
-            self.state_manager.set_level()
+            self.restart()
             self.game.mouse_button_down = True
 
         self.buttons['32x32'].set_pos((10 * 32, 5 * 32), False)
@@ -262,6 +272,9 @@ class Level:
                 self.state_manager.alpha = 0
 
     def update(self):
+        # Game time only moves while the level is being played
+        self.game.delta = self.clock.advance(self.game.delta)
+
         # Pause
         if pygame.K_ESCAPE in self.game.key_presses and not (
                 self.game.key_down or self.state_manager.phase or self.level_completed or self.player.dead):
@@ -269,11 +282,34 @@ class Level:
             self.state_manager.change_state('pause')
             self.game.key_down = True
 
+        # Quick save and load
+        if pygame.K_F5 in self.game.key_presses and not self.level_completed:
+            self.quick_save = SaveState(self)
+            try:
+                self.quick_save.write(quick_save_path(self.state_manager.selected_level))
+            except OSError:
+                # Read only install, the save still lasts until the level is left
+                pass
+        if pygame.K_F9 in self.game.key_presses:
+            path = quick_save_path(self.state_manager.selected_level)
+            if self.quick_save is None and os.path.exists(path):
+                self.quick_save = SaveState.read(path)
+            if self.quick_save is not None:
+                self.restart(self.quick_save)
+
+        # Holding F7 steps back through the recorded frames, a little faster than they were played
+        rewinding = self.rewind is not None and pygame.K_F7 in self.game.held_key_presses
+        if rewinding:
+            self.rewind.back(self)
+
         # Main stuff
         self.main()
+        if self.rewind is not None and not rewinding:
+            self.rewind.record(self)
 
         # HUD
-        self.hud()
+        if not self.game.headless:
+            self.hud()
 
         # Level completed by defeating the boss
         if self.boss_fight and self.boss.dead:
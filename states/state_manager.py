@@ -3,9 +3,13 @@ import pygame
 from scripts.globals import FPS, SCREEN_SIZE
 from scripts.audio import MUSIC
 from scripts.background import Background
+from scripts.loader import LevelPreloader
 from scripts.utils import load_image, InvisibleButton
 from states.level import Level
 
+# Menus only redraw the parts of the screen that changed, see update_menu
+MENU_STATES = ('start', 'controls', 'select level', 'select character', 'pause')
+
 
 class StateManager:
     def __init__(self, game):
@@ -45,23 +49,31 @@ class StateManager:
 
         # The level itself
         self.level_scene = None
+        self.preloader = None
         self.completed_levels = 1
         self.selected_level = 1
         self.state = 'start'
         self.prev_state = 'start'
 
+        # Dirty rect rendering for menus. The key is everything that decides what a menu frame looks like
+        self.menu_key = None
+        self.level_snapshot = None
+
     def draw_background(self):
-        # Update scroll
-        self.scroll[0] = (self.scroll[0] + self.game.delta * FPS) % (576 * 24)
+        # The pause screen and the controls opened from it show the level as it was when paused
+        if self.level_snapshot is not None:
+            self.screen.blit(self.level_snapshot, (0, 0))
+            return
 
         # Draw background
         self.background.draw(self.screen, self.scroll)
 
-        # Draw some grass for lively animation
-        for i in range(int(self.scroll[0] // 32), int((self.scroll[0] + 672) // 32) + 1):
-            self.screen.blit(self.images['tile1'], (i * 32 - self.scroll[0], 320 - 96))
-            self.screen.blit(self.images['tile2'], (i * 32 - self.scroll[0], 320 - 64))
-            self.screen.blit(self.images['tile2'], (i * 32 - self.scroll[0], 320 - 32))
+        # Draw some grass for lively animation, on whole pixels so it only changes when the scroll does
+        scroll = int(self.scroll[0])
+        for i in range(scroll // 32, (scroll + 672) // 32 + 1):
+            self.screen.blit(self.images['tile1'], (i * 32 - scroll, 320 - 96))
+            self.screen.blit(self.images['tile2'], (i * 32 - scroll, 320 - 64))
+            self.screen.blit(self.images['tile2'], (i * 32 - scroll, 320 - 32))
 
     def start_screen(self):
         # Quit
@@ -156,15 +168,23 @@ class StateManager:
 
         # Draw effect
         if self.phase:
+            self.preloader.update()
             if self.alpha > 200:
                 pygame.mixer.music.fadeout(1000)
             self.blackout_screen.set_alpha(self.alpha)
             self.alpha += 3 * self.game.delta * FPS
             self.screen.blit(self.blackout_screen, (0, 0))
             if self.alpha > 255:
+                # Stay on the black screen until the level has finished loading. Loading new music while
+                # the old one is still fading out blocks until the fade is over, so wait for that too
+                if not self.preloader.done() or pygame.mixer.music.get_busy():
+                    self.draw_loading_bar()
+                    return
+
                 # self.phase = False
                 self.alpha = 0
-                self.set_level()
+                self.set_level(self.preloader.get_data())
+                self.preloader = None
                 self.change_state('level')
             return
 
@@ -176,21 +196,21 @@ class StateManager:
         if self.buttons['64x64'].click(self.game.mouse_rect, click):
             self.game.character = 1
             self.game.mouse_button_down = True
-            self.phase = True
+            self.preload_level()
 
         # Select Punk
         self.buttons['64x64'].set_pos((8 * 32, 4 * 32))
         if self.buttons['64x64'].click(self.game.mouse_rect, click):
             self.game.character = 2
             self.game.mouse_button_down = True
-            self.phase = True
+            self.preload_level()
 
         # Select Cyborg
         self.buttons['64x64'].set_pos((11 * 32, 4 * 32))
         if self.buttons['64x64'].click(self.game.mouse_rect, click):
             self.game.character = 3
             self.game.mouse_button_down = True
-            self.phase = True
+            self.preload_level()
 
         # Quit to previous screen
         self.buttons['18x18'].set_pos((13 * 32 + 11, 2 * 32 + 8))
@@ -228,8 +248,18 @@ class StateManager:
             self.change_state('select level')
             self.game.mouse_button_down = True
 
-    def set_level(self):
-        self.level_scene = Level(self.game, self)
+    def draw_loading_bar(self):
+        progress = self.preloader.get_progress()
+        pygame.draw.rect(self.screen, '#333333', (32, SCREEN_SIZE[1] - 24, SCREEN_SIZE[0] - 64, 4))
+        pygame.draw.rect(self.screen, 'white', (32, SCREEN_SIZE[1] - 24, (SCREEN_SIZE[0] - 64) * progress, 4))
+
+    def preload_level(self):
+        # Start loading the level in the background while the screen fades out
+        self.preloader = LevelPreloader(self.selected_level, self.game.character)
+        self.phase = True
+
+    def set_level(self, loaded_data=None):
+        self.level_scene = Level(self.game, self, loaded_data)
         self.alpha = 310
         self.phase = True
 
@@ -237,9 +267,60 @@ class StateManager:
         self.prev_state = self.state
         self.state = new_state
 
-    def update(self):
+        # Leaving the pause screen for anything but the controls lets go of the level snapshot
+        if new_state not in ('pause', 'controls'):
+            self.level_snapshot = None
+
+    def menu_dirty_rects(self):
+        # Scroll the scenery, then work out which parts of the screen it changed since the last menu frame
+        self.scroll[0] = (self.scroll[0] + self.game.delta * FPS) % (576 * 24)
+
+        if self.level_snapshot is not None:
+            scenery = None
+        else:
+            scenery = self.background.key(self.scroll), int(self.scroll[0])
+
+        key = self.state, scenery, self.game.data['levels completed']
+        previous, self.menu_key = self.menu_key, key
+
+        if previous is None or previous[0] != key[0] or previous[2] != key[2]:
+            return [self.screen.get_rect()]
+        if previous[1] == key[1]:
+            return []
+        if previous[1][0] == key[1][0]:
+            # Only the grass moved
+            return [pygame.Rect(0, 320 - 96, SCREEN_SIZE[0], 96)]
+        return [self.screen.get_rect()]
+
+    def update_menu(self):
+        # The first pause frame still has the level on screen, keep that to draw behind the pause menu
+        if self.state == 'pause' and self.level_snapshot is None:
+            self.level_snapshot = self.screen.copy()
+
+        # Menus still handle input every frame, but their drawing is clipped to what changed
+        dirty = self.menu_dirty_rects()
+        self.screen.set_clip(dirty[0] if dirty else (0, 0, 0, 0))
         self.draw_background()
+        self.update_state()
+        self.screen.set_clip(None)
+
+        # A state change shows up on the next frame, which then redraws everything
+        return dirty
 
+    def update(self):
+        # Menus return the parts of the screen that changed. Everything else redraws the whole screen
+        if self.state in MENU_STATES and not self.phase:
+            return self.update_menu()
+
+        self.menu_key = None
+        self.screen.fill('#03befc')
+        if self.state != 'level':
+            self.scroll[0] = (self.scroll[0] + self.game.delta * FPS) % (576 * 24)
+            self.draw_background()
+        self.update_state()
+        return None
+
+    def update_state(self):
         # Manage state here
         if self.state == 'start':
             self.start_screen()
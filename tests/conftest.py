@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# The game loads everything relative to the repo, so tests run from there
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def repo_folder(monkeypatch):
+    monkeypatch.chdir(ROOT)
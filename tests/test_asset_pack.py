@@ -0,0 +1,39 @@
+import os
+import time
+
+import pygame
+
+from scripts.asset_pack import LOCK_TIMEOUT, AssetPack, build_pack, is_pack_stale, lock_pack
+
+
+def write_image(path, colour):
+    image = pygame.Surface((4, 3), pygame.SRCALPHA)
+    image.fill(colour)
+    pygame.image.save(image, str(path))
+
+
+def test_pack_goes_stale_when_a_source_changes(tmp_path):
+    source, pack = tmp_path / 'a.png', str(tmp_path / 'pack' / 'sprites.pack')
+    write_image(source, (10, 20, 30, 255))
+    assert is_pack_stale(pack)
+    build_pack(pack, [str(source)])
+    assert not is_pack_stale(pack)
+
+    write_image(source, (40, 50, 60, 255))
+    os.utime(source, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert is_pack_stale(pack)
+    build_pack(pack, [str(source)])
+    assert not is_pack_stale(pack)
+    assert str(source) in AssetPack(pack)
+
+
+def test_only_one_build_holds_the_lock(tmp_path):
+    pack = str(tmp_path / 'pack' / 'sprites.pack')
+    lock = lock_pack(pack)
+    assert lock is not None
+    assert lock_pack(pack) is None
+
+    # A lock left behind by a build that died is taken over
+    old = time.time() - LOCK_TIMEOUT - 1
+    os.utime(lock, (old, old))
+    assert lock_pack(pack) == lock
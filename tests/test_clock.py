@@ -0,0 +1,41 @@
+import random
+
+from scripts.clock import GameClock, TimerWheel
+from scripts.utils import Timer
+
+
+def test_wheel_fires_everything_on_its_tick():
+    rng = random.Random(0)
+    for bits, levels in ((2, 2), (3, 3), (8, 4)):
+        wheel = TimerWheel(bits, levels)
+        now = -1
+        for _ in range(300):
+            for _ in range(rng.randint(0, 3)):
+                due = now + 1 + int(rng.expovariate(1 / rng.choice((5, 100, 3000, 100000))))
+                wheel.schedule(due, due)
+            previous, now = now, now + rng.randint(0, 400)
+            for due in wheel.advance(now):
+                assert previous < due <= now
+        wheel.advance(10 ** 9)
+        assert len(wheel) == 0
+
+
+def test_timer_runs_on_its_own_clock():
+    clock, other = GameClock(), GameClock()
+    timer = Timer(100, clock)
+    timer.activate()
+    other.advance(1)
+    assert timer
+    clock.advance(0.1)
+    assert timer
+    clock.advance(0.002)
+    assert not timer
+
+
+def test_paused_clock_stops_timers():
+    clock = GameClock()
+    timer = Timer(100, clock)
+    timer.activate()
+    clock.paused = True
+    assert clock.advance(1) == 0
+    assert timer
@@ -0,0 +1,47 @@
+import pytest
+
+from scripts.environment import ACTIONS, LevelEnv, VectorLevelEnv, action_names
+
+FRAMES = 120
+
+
+def test_interleaved_envs_keep_their_own_time():
+    single = LevelEnv()
+    single.reset(1, 1, 0)
+    for _ in range(FRAMES):
+        single.step(0)
+    expected = single.headless.level.level_timer.get_time_left()
+
+    envs = VectorLevelEnv(2)
+    envs.reset([1, 1], [1, 1], [0, 1])
+    for _ in range(FRAMES):
+        envs.step([0, 0])
+    assert [env.headless.level.level_timer.get_time_left() for env in envs.envs] == [expected, expected]
+    assert [env.headless.level.clock.time for env in envs.envs] == [single.headless.level.clock.time] * 2
+
+
+def enemy_state(level):
+    return [(type(enemy).__name__, round(enemy.position.x, 3), round(enemy.position.y, 3), enemy.hp,
+             enemy.current_action) for enemy in level.enemies]
+
+
+def play(env, seed):
+    env.reset(1, 1, seed)
+    for frame in range(FRAMES):
+        env.step({'right'} if frame % 40 < 30 else {'right', 'shoot'})
+    return enemy_state(env.headless.level)
+
+
+def test_same_seed_repeats_in_one_process():
+    env = LevelEnv()
+    first = play(env, 3)
+    assert play(env, 3) == first
+    assert play(LevelEnv(), 3) == first
+
+
+def test_numpy_integer_actions_are_bit_masks():
+    numpy = pytest.importorskip('numpy')
+    assert action_names(3) == set(ACTIONS[:2])
+    for kind in (numpy.int64, numpy.int32, numpy.uint8):
+        assert action_names(kind(3)) == set(ACTIONS[:2])
+    assert action_names(numpy.arange(4)[2]) == {ACTIONS[1]}
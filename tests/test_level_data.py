@@ -0,0 +1,23 @@
+import json
+import os
+
+from scripts.level_data import EMPTY, GRID_LAYERS, TILE_SIZE, LevelData, compile_level, json_path
+
+
+def test_compiled_levels_match_their_json_and_are_smaller():
+    number = 1
+    while os.path.exists(json_path(number)):
+        layers = json.loads(open(json_path(number)).read())['data']
+        compiled = compile_level(json_path(number))
+        data = LevelData(number, compiled)
+        assert len(compiled) < os.path.getsize(json_path(number))
+
+        for layer in GRID_LAYERS:
+            cells = {(value['pos'][0] // TILE_SIZE, value['pos'][1] // TILE_SIZE): value['index']
+                     for value in layers.get(layer, {}).values()}
+            filled = sum(1 for index in data.grids[layer] if index != EMPTY)
+            assert filled == len(cells)
+            for (x, y), index in cells.items():
+                assert data.get(layer, x, y) == index
+        number += 1
+    assert number > 1
@@ -0,0 +1,43 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from scripts.globals import SCREEN_SIZE
+from scripts.render import RenderQueue, RenderThread, Z_ENTITIES, Z_TILES
+
+
+class Background:
+    def draw(self, surface, camera):
+        surface.fill((40, 60, 80), (0, 0, SCREEN_SIZE[0], SCREEN_SIZE[1] // 2))
+
+
+def submit_frame(queue, frame):
+    image = pygame.Surface((16, 16))
+    image.fill((200, frame * 20 % 256, 0))
+    for i in range(30):
+        queue.submit(image, (i * 24 + frame, 100 + i % 3 * 20), Z_ENTITIES)
+    queue.submit_rect((0, 0, 255), (frame * 4, 120, 40, 8), Z_TILES)
+
+
+def test_render_thread_draws_what_the_main_thread_would():
+    pygame.display.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+    background, camera = Background(), (10, 20)
+    queue = RenderQueue()
+    expected, screen = pygame.Surface(SCREEN_SIZE).convert(), pygame.Surface(SCREEN_SIZE).convert()
+    thread = RenderThread(SCREEN_SIZE)
+    try:
+        for frame in range(1, 6):
+            submit_frame(queue, frame)
+            number = thread.submit(background, camera, queue.take(camera))
+            thread.present(screen, number)
+
+            expected.fill(0)
+            background.draw(expected, camera)
+            submit_frame(queue, frame)
+            queue.flush(expected, camera)
+            assert pygame.image.tobytes(screen, 'RGB') == pygame.image.tobytes(expected, 'RGB')
+    finally:
+        thread.stop()
@@ -0,0 +1,46 @@
+from scripts.headless import HeadlessLevel
+from scripts.rewind import RewindBuffer
+
+from test_save_state import frame_state
+
+
+def record(headless, rewind, frames):
+    states = {}
+    for frame in range(frames):
+        headless.step({'right'} if frame % 40 < 30 else {'right', 'jump', 'shoot'})
+        rewind.record(headless.level)
+        states[rewind.frame] = frame_state(headless.level)
+    return states
+
+
+def test_recorded_frames_come_back():
+    headless = HeadlessLevel()
+    headless.reset(1, 1, 0)
+    rewind = RewindBuffer(interval=1, keyframe_interval=10)
+    states = record(headless, rewind, 45)
+
+    # Every frame from its table, keyframes and the ones made of changes alike
+    for frame in rewind.frames():
+        rewind.save_state(frame).restore(headless.level)
+        assert frame_state(headless.level) == states[frame]
+
+    # Stepping back restores the frame before and forgets the ones after it
+    frames = rewind.frames()
+    for steps in range(1, 20):
+        assert rewind.back(headless.level)
+        assert frame_state(headless.level) == states[frames[-steps - 1]]
+        assert rewind.frames() == frames[:-steps]
+
+
+def test_long_sessions_stay_under_budget():
+    headless = HeadlessLevel()
+    headless.reset(1, 1, 0)
+    rewind = RewindBuffer(budget=128 * 1024, keyframe_interval=10)
+    record(headless, rewind, 600)
+
+    assert rewind.size <= rewind.budget
+    assert rewind.size == sum(len(data) for segment in rewind.segments for data in segment.records)
+    # The oldest frames were dropped, the newest are all still there
+    frames = rewind.frames()
+    assert frames[0] > rewind.interval
+    assert frames == list(range(frames[0], rewind.frame + 1, rewind.interval))
@@ -0,0 +1,53 @@
+from scripts.headless import HeadlessLevel
+from scripts.save_state import SaveState
+
+FRAMES = 90
+
+
+def frame_state(level):
+    # The clock keeps going after a restore and timers are moved along with it, which can be off in the last bits
+    player = level.player
+    state = [(round(player.position.x, 3), round(player.position.y, 3), player.hp, player.current_action,
+              player.equipped_gun.name, player.equipped_gun.ammo, round(level.level_timer.get_time_left(), 3),
+              (level.camera.x, level.camera.y))]
+    state += [(type(enemy).__name__, round(enemy.position.x, 3), round(enemy.position.y, 3), enemy.hp,
+               enemy.current_action) for enemy in level.enemies]
+    state += [(round(projectile.position.x, 3), round(projectile.position.y, 3))
+              for group in (level.player_bullets, level.enemy_projectiles) for projectile in group]
+    return state
+
+
+def play(headless):
+    frames = []
+    for frame in range(FRAMES):
+        headless.step({'right'} if frame % 40 < 30 else {'right', 'jump', 'shoot'})
+        frames.append(frame_state(headless.level))
+    return frames
+
+
+def test_restored_state_replays_the_same_frames(tmp_path):
+    headless = HeadlessLevel()
+    headless.reset(1, 1, 0)
+    play(headless)
+
+    # Played on from the middle of the level straight away, after restoring in memory, and after going to disk
+    saved = headless.save()
+    saved.write(tmp_path / 'level1.state')
+    expected = play(headless)
+
+    headless.restore(saved)
+    assert play(headless) == expected
+
+    headless.restore(SaveState.read(tmp_path / 'level1.state'))
+    assert play(headless) == expected
+
+
+def test_restart_replays_the_level_from_the_start():
+    headless = HeadlessLevel()
+    headless.reset(1, 1, 0)
+    started = frame_state(headless.level)
+    expected = play(headless)
+
+    headless.level.restart()
+    assert frame_state(headless.level) == started
+    assert play(headless) == expected
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_startup_stays_under_budget():
+    # A fresh process, so imports and assets are as cold as a real start. The profiler exits with 1 when the first
+    # menu frame takes longer than STARTUP_BUDGET
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    result = subprocess.run([sys.executable, 'main.py', '--profile-startup'], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert 'Startup to first menu frame' in result.stdout, result.stderr
+    assert result.returncode == 0, result.stdout